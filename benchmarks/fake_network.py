@@ -0,0 +1,106 @@
+# benchmarks/fake_network.py
+import ipaddress
+import socket
+import struct
+import threading
+import time
+from netbox_autodiscovery.discovery import range_scan
+from netbox_autodiscovery.discovery.dns_resolver import TYPE_PTR, _read_name
+
+
+def _fraction(ip: str, salt: int = 0) -> float:
+    """Stable pseudo-random value in [0, 1) per address, so every run sees the same network."""
+    n = int(ipaddress.IPv4Address(ip)) ^ salt
+    return (n * 2654435761) % 0xFFFFFFFF / 0xFFFFFFFF
+
+
+def is_alive(ip: str, alive_ratio: float) -> bool:
+    return _fraction(ip) < alive_ratio
+
+
+class FakeSweeper:
+    """
+    Probe backend with the sweep() interface of the real sweepers that
+    answers from is_alive() instead of the network. `rtt` seconds are
+    spent per block of `window` hosts, roughly what a paced sweep of a
+    healthy LAN costs, so the writer side still overlaps with probing.
+    """
+
+    def __init__(self, alive_ratio: float = 0.3, rtt: float = 0.0, window: int = 4096):
+        self.alive_ratio = alive_ratio
+        self.rtt = rtt
+        self.window = window
+        self.probed = 0
+
+    def sweep(self, hosts):
+        for ip in hosts:
+            if self.rtt and self.probed % self.window == 0:
+                time.sleep(self.rtt)
+            self.probed += 1
+            yield ip, is_alive(ip, self.alive_ratio)
+
+    def close(self):
+        pass
+
+
+def install_fake_probe(alive_ratio: float = 0.3, rtt: float = 0.0, name: str = "bench") -> str:
+    """Register the fake backend as a range scan probe; select it with params["probes"] = [name]."""
+    def opener(params, network):
+        return FakeSweeper(alive_ratio, rtt, int(params.get("ping_window") or 4096))
+
+    range_scan.PROBES[name] = opener
+    return name
+
+
+class FakeDnsServer:
+    """
+    UDP DNS server answering PTR queries with host-a-b-c-d.<domain> for
+    a stable `named_ratio` of the addresses and NXDOMAIN for the rest.
+    Point a range scan at it with params["dns_servers"] = server.address.
+    """
+
+    def __init__(self, named_ratio: float = 0.8, domain: str = "bench.example", ttl: int = 3600,
+                 host: str = "127.0.0.1"):
+        self.named_ratio = named_ratio
+        self.domain = domain
+        self.ttl = ttl
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, 0))
+        self.address = "%s:%d" % self.sock.getsockname()
+        self.queries = 0
+        self._stopped = False
+
+    def _answer(self, query: bytes) -> bytes:
+        qid, _ = struct.unpack("!HH", query[:4])
+        qname, end = _read_name(query, 12)
+        question = query[12:end + 4]
+        labels = qname.split(".")
+        if len(labels) != 6 or labels[4:] != ["in-addr", "arpa"]:
+            return struct.pack("!HHHHHH", qid, 0x8183, 1, 0, 0, 0) + question
+        ip = ".".join(reversed(labels[:4]))
+        if _fraction(ip, salt=0x5A5A5A5A) >= self.named_ratio:
+            return struct.pack("!HHHHHH", qid, 0x8183, 1, 0, 0, 0) + question
+        target = f"host-{ip.replace('.', '-')}.{self.domain}"
+        rdata = b"".join(bytes([len(part)]) + part.encode() for part in target.split(".")) + b"\x00"
+        answer = b"\xc0\x0c" + struct.pack("!HHIH", TYPE_PTR, 1, self.ttl, len(rdata)) + rdata
+        return struct.pack("!HHHHHH", qid, 0x8180, 1, 1, 0, 0) + question + answer
+
+    def _serve(self):
+        while not self._stopped:
+            try:
+                query, addr = self.sock.recvfrom(512)
+            except OSError:
+                return
+            self.queries += 1
+            try:
+                self.sock.sendto(self._answer(query), addr)
+            except (struct.error, IndexError):
+                continue
+
+    def start(self) -> "FakeDnsServer":
+        threading.Thread(target=self._serve, name="fake-dns", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stopped = True
+        self.sock.close()
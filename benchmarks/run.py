@@ -0,0 +1,197 @@
+# benchmarks/run.py
+"""
+Benchmark the Cisco and range scanners end to end against local fakes and
+a throwaway NetBox test database.
+
+    NETBOX_ROOT=/opt/netbox/netbox python benchmarks/run.py --json results.json
+    NETBOX_ROOT=/opt/netbox/netbox python benchmarks/run.py --baseline results.json
+
+The NetBox configuration must list netbox_autodiscovery in PLUGINS and its
+database user must be allowed to create databases. Every scenario is run
+`--repeat` times on the same database, so the first run is cold (empty
+DB, empty caches) and the later ones measure the unchanged-device and
+cached-DNS paths. Reported per run: wall time, SNMP PDUs answered by the
+fake agents, SQL queries issued by the scanning thread and the process'
+peak RSS so far (a high-water mark: run one scenario per invocation for
+an isolated figure).
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+if os.environ.get("NETBOX_ROOT"):
+    sys.path.insert(0, os.environ["NETBOX_ROOT"])
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "netbox.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from netbox_autodiscovery.models import Scanner, ScanRun  # noqa: E402
+from netbox_autodiscovery.discovery.cisco_scan import run_cisco_scan  # noqa: E402
+from netbox_autodiscovery.discovery.range_scan import run_network_scan  # noqa: E402
+from snmp_agent import SnmpAgent, cisco_dataset  # noqa: E402
+from fake_network import FakeDnsServer, install_fake_probe  # noqa: E402
+
+
+METRICS = ("wall_s", "snmp_pdus", "sql_queries", "peak_rss_mb")
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _scanner(name: str, type: str, **params) -> Scanner:
+    scanner, _ = Scanner.objects.update_or_create(name=name, defaults={"type": type, "params": params})
+    return scanner
+
+
+def _measure(scan, scanner: Scanner, counters) -> dict:
+    run = ScanRun.objects.create(scanner=scanner, status=ScanRun.RunStatus.RUNNING)
+    before = sum(c() for c in counters)
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        stats = scan(scanner.params, run)
+        wall = time.perf_counter() - start
+    return {
+        "wall_s": round(wall, 3),
+        "snmp_pdus": sum(c() for c in counters) - before,
+        "sql_queries": len(queries),
+        "peak_rss_mb": _peak_rss_mb(),
+        "stats": stats,
+    }
+
+
+# ---------------------------
+# Scenarios
+# ---------------------------
+
+def bench_cisco(args) -> list[dict]:
+    """One switch on a local port, polled with the blocking session."""
+    data = cisco_dataset("bench-sw-1", ports=args.ports, vlans=args.vlans, trunks=args.trunks)
+    agent = SnmpAgent(data).start()
+    try:
+        scanner = _scanner(
+            "bench-cisco", Scanner.ScannerType.CISCO, hostname=agent.host, snmp_port=agent.port,
+            community="public", max_repetitions=args.max_repetitions,
+        )
+        return [_measure(run_cisco_scan, scanner, [lambda: agent.requests]) for _ in range(args.repeat)]
+    finally:
+        agent.stop()
+
+
+def bench_fleet(args) -> list[dict]:
+    """`--devices` switches on 127.0.0.x sharing one port, polled concurrently."""
+    agents = []
+    try:
+        for n in range(args.devices):
+            data = cisco_dataset(f"bench-sw-{n + 2}", ports=args.ports, vlans=args.vlans, trunks=args.trunks)
+            port = agents[0].port if agents else 0
+            agents.append(SnmpAgent(data, host=f"127.0.0.{n + 2}", port=port).start())
+        scanner = _scanner(
+            "bench-fleet", Scanner.ScannerType.CISCO, hosts=[a.host for a in agents], snmp_port=agents[0].port,
+            community="public", max_repetitions=args.max_repetitions, concurrency=args.concurrency,
+        )
+        counters = [lambda a=a: a.requests for a in agents]
+        return [_measure(run_cisco_scan, scanner, counters) for _ in range(args.repeat)]
+    finally:
+        for agent in agents:
+            agent.stop()
+
+
+def bench_range(args) -> list[dict]:
+    """Range sweep of `--cidr` through the fake probe and a local PTR server."""
+    probe = install_fake_probe(alive_ratio=args.alive_ratio)
+    dns = FakeDnsServer().start()
+    try:
+        scanner = _scanner(
+            "bench-range", Scanner.ScannerType.RANGE, cidr=args.cidr, probes=[probe], dns_servers=dns.address,
+        )
+        return [_measure(run_network_scan, scanner, []) for _ in range(args.repeat)]
+    finally:
+        dns.stop()
+
+
+SCENARIOS = {
+    "cisco": bench_cisco,
+    "fleet": bench_fleet,
+    "range": bench_range,
+}
+
+
+# ---------------------------
+# Reporting
+# ---------------------------
+
+def _report(results: dict):
+    print(f"{'scenario':<10}{'run':>4}" + "".join(f"{m:>14}" for m in METRICS))
+    for name, runs in results.items():
+        for i, row in enumerate(runs, 1):
+            print(f"{name:<10}{i:>4}" + "".join(f"{row[m]:>14}" for m in METRICS))
+
+
+def _compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return the metrics that got worse than the baseline by more than `tolerance`."""
+    regressions = []
+    for name, runs in results.items():
+        for i, (row, base) in enumerate(zip(runs, baseline.get(name, [])), 1):
+            for metric in ("wall_s", "snmp_pdus", "sql_queries"):
+                old, new = base.get(metric), row[metric]
+                if old and new > old * (1 + tolerance):
+                    regressions.append(f"{name} run {i}: {metric} {old} -> {new}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append",
+                        help="scenario to run, may be repeated (default: all)")
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--ports", type=int, default=48)
+    parser.add_argument("--vlans", type=int, default=64)
+    parser.add_argument("--trunks", type=int, default=4)
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--max-repetitions", type=int, default=25)
+    parser.add_argument("--cidr", default="10.200.0.0/20")
+    parser.add_argument("--alive-ratio", type=float, default=0.3)
+    parser.add_argument("--json", metavar="FILE", help="write the results to FILE")
+    parser.add_argument("--baseline", metavar="FILE", help="fail if worse than the results in FILE")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative regression against --baseline (default 0.2)")
+    parser.add_argument("--keepdb", action="store_true", help="reuse the test database between invocations")
+    args = parser.parse_args(argv)
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=args.keepdb)
+    try:
+        results = {name: SCENARIOS[name](args) for name in (args.scenario or SCENARIOS)}
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+    _report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = _compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"❌ {line}")
+        if regressions:
+            return 1
+        print("✅ No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+# benchmarks/snmp_agent.py
+import bisect
+import socket
+import threading
+import zlib
+from pyasn1.codec.ber import decoder, encoder
+from pysnmp.proto import api, rfc1902, rfc1905
+
+
+def _oid(dotted: str) -> tuple:
+    return tuple(int(part) for part in dotted.split("."))
+
+
+# same OIDs the scanner reads, see CiscoProfile in netbox_autodiscovery/discovery/drivers.py
+SYS_DESCR = _oid("1.3.6.1.2.1.1.1.0")
+SYS_OBJECT_ID = _oid("1.3.6.1.2.1.1.2.0")
+SYS_UPTIME = _oid("1.3.6.1.2.1.1.3.0")
+SYS_NAME = _oid("1.3.6.1.2.1.1.5.0")
+CHASSIS_ID = _oid("1.3.6.1.4.1.9.3.6.3")
+IF_TABLE_LAST_CHANGE = _oid("1.3.6.1.2.1.31.1.5.0")
+VTP_REVISION = _oid("1.3.6.1.4.1.9.9.46.1.2.1.1.4.1")
+VTP_LAST_CHANGE = _oid("1.3.6.1.4.1.9.9.46.1.2.1.1.6.1")
+IF_NAME = _oid("1.3.6.1.2.1.31.1.1.1.1")
+IF_TYPE = _oid("1.3.6.1.2.1.2.2.1.3")
+IF_ADMIN = _oid("1.3.6.1.2.1.2.2.1.7")
+IF_OPER = _oid("1.3.6.1.2.1.2.2.1.8")
+VTP_VLAN_STATE = _oid("1.3.6.1.4.1.9.9.46.1.3.1.1.2")
+VTP_VLAN_NAME = _oid("1.3.6.1.4.1.9.9.46.1.3.1.1.4")
+VM_VLAN = _oid("1.3.6.1.4.1.9.9.68.1.2.2.1.2")
+TRUNK_STATUS = _oid("1.3.6.1.4.1.9.9.46.1.6.1.1.14")
+TRUNK_BITMAPS = [_oid(f"1.3.6.1.4.1.9.9.46.1.6.1.1.{col}") for col in (4, 17, 18, 19)]
+
+
+def _bitmaps(vids) -> list[bytes]:
+    """Encode VLAN ids as the four 128-byte vlanTrunkPortVlansEnabled* columns."""
+    columns = [bytearray(128) for _ in range(4)]
+    for vid in vids:
+        column, bit = divmod(vid, 1024)
+        columns[column][bit // 8] |= 0x80 >> (bit % 8)
+    return [bytes(c) for c in columns]
+
+
+def cisco_dataset(name: str = "bench-sw", ports: int = 48, vlans: int = 64, trunks: int = 4,
+                  revision: int = 1) -> dict:
+    """
+    Synthetic Cisco switch MIB: `ports` Ethernet interfaces, `vlans` VTP
+    VLANs (ids 10, 11, ...) and `trunks` trunk ports carrying all of them;
+    the other ports are access ports spread over the VLANs. Bump
+    `revision` to make the change markers move between runs.
+    """
+    vids = [10 + n for n in range(vlans)]
+    data = {
+        SYS_DESCR: rfc1902.OctetString(f"Cisco IOS Software, C2960 Software, bench revision {revision}"),
+        SYS_OBJECT_ID: rfc1902.ObjectIdentifier("1.3.6.1.4.1.9.1.716"),  # catalyst2960-48TT
+        SYS_UPTIME: rfc1902.TimeTicks(100 * revision),
+        SYS_NAME: rfc1902.OctetString(name),
+        CHASSIS_ID: rfc1902.OctetString(f"FOC{zlib.crc32(name.encode()) % 10 ** 8:08d}"),
+        IF_TABLE_LAST_CHANGE: rfc1902.TimeTicks(revision),
+        VTP_REVISION: rfc1902.Gauge32(revision),
+        VTP_LAST_CHANGE: rfc1902.OctetString(f"bench-{revision}"),
+    }
+    for vid in vids:
+        index = (1, vid)  # managementDomain.vlanId
+        data[VTP_VLAN_STATE + index] = rfc1902.Integer(1)
+        data[VTP_VLAN_NAME + index] = rfc1902.OctetString(f"VLAN{vid:04d}")
+
+    trunk_maps = _bitmaps(vids)
+    for port in range(1, ports + 1):
+        index = (10100 + port,)
+        data[IF_NAME + index] = rfc1902.OctetString(f"Gi1/0/{port}")
+        data[IF_TYPE + index] = rfc1902.Integer(6)  # ethernetCsmacd
+        data[IF_ADMIN + index] = rfc1902.Integer(1)
+        data[IF_OPER + index] = rfc1902.Integer(1 if port % 3 else 2)
+        if port > ports - trunks:
+            data[TRUNK_STATUS + index] = rfc1902.Integer(1)
+            for column, octets in zip(TRUNK_BITMAPS, trunk_maps):
+                data[column + index] = rfc1902.OctetString(octets)
+        else:
+            data[TRUNK_STATUS + index] = rfc1902.Integer(2)
+            if vids:
+                data[VM_VLAN + index] = rfc1902.Integer(vids[port % len(vids)])
+    return data
+
+
+class SnmpAgent:
+    """
+    Minimal SNMPv1/v2c agent answering GET, GETNEXT and GETBULK from a
+    static {oid tuple: value} dict on a UDP socket, in a daemon thread.
+    Any community is accepted. `requests` counts the PDUs received.
+    """
+
+    def __init__(self, data: dict, host: str = "127.0.0.1", port: int = 0):
+        self.data = data
+        self.oids = sorted(data)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.host, self.port = self.sock.getsockname()
+        self.requests = 0
+        self._stopped = False
+
+    def _next(self, oid: tuple):
+        i = bisect.bisect_right(self.oids, oid)
+        if i == len(self.oids):
+            return oid, rfc1905.endOfMibView
+        return self.oids[i], self.data[self.oids[i]]
+
+    def _respond(self, packet: bytes) -> bytes:
+        version = int(api.decodeMessageVersion(packet))
+        proto = api.protoModules[version]
+        msg, _ = decoder.decode(packet, asn1Spec=proto.Message())
+        req = proto.apiMessage.getPDU(msg)
+        rsp_msg = proto.apiMessage.getResponse(msg)
+        rsp = proto.apiMessage.getPDU(rsp_msg)
+        oids = [tuple(oid) for oid, _ in proto.apiPDU.getVarBinds(req)]
+
+        out = []
+        if req.isSameTypeWith(proto.GetRequestPDU()):
+            out = [(oid, self.data.get(oid, rfc1905.noSuchInstance)) for oid in oids]
+        elif req.isSameTypeWith(proto.GetNextRequestPDU()):
+            out = [self._next(oid) for oid in oids]
+        elif version == api.protoVersion2c and req.isSameTypeWith(proto.GetBulkRequestPDU()):
+            non_rep = int(proto.apiBulkPDU.getNonRepeaters(req))
+            max_rep = int(proto.apiBulkPDU.getMaxRepetitions(req))
+            out = [self._next(oid) for oid in oids[:non_rep]]
+            cursor = oids[non_rep:]
+            for _ in range(max_rep):
+                row = [self._next(oid) for oid in cursor]
+                out.extend(row)
+                cursor = [oid for oid, _ in row]
+        proto.apiPDU.setVarBinds(rsp, out)
+        return encoder.encode(rsp_msg)
+
+    def _serve(self):
+        while not self._stopped:
+            try:
+                packet, addr = self.sock.recvfrom(65535)
+            except OSError:
+                return
+            self.requests += 1
+            try:
+                self.sock.sendto(self._respond(packet), addr)
+            except Exception:  # malformed request: drop it like a real agent would
+                continue
+
+    def start(self) -> "SnmpAgent":
+        threading.Thread(target=self._serve, name=f"snmp-agent-{self.host}", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stopped = True
+        self.sock.close()
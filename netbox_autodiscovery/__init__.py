@@ -9,6 +9,26 @@ class AutoDiscoveryConfig(PluginConfig):
     min_version = "4.0.0"
     author = "Alireza Adabi"
     author_email = "alireza.adabi78@gmail.com"
+    default_settings = {
+        # scheduler (manage.py autodiscovery_scheduler)
+        "scheduler_tick": 30,          # seconds between scheduler passes
+        "schedule_jitter": 0.25,       # random start offset, as a fraction of the interval
+        "schedule_max_jitter": 900,    # ...but never more than this many seconds
+        "max_runs_per_queue": 4,       # active runs allowed per RQ queue (0 = unlimited)
+        "stale_run_hours": 24,         # active runs older than this no longer block their scanner
+        # worker metrics (needs prometheus_client and PROMETHEUS_MULTIPROC_DIR;
+        # served by manage.py autodiscovery_metrics)
+        "prometheus_metrics": False,
+        # SNMP response cache shared by re-runs: "redis" (RQ's), "memory" or None
+        "snmp_cache": "redis",
+        "snmp_cache_size": 10000,      # entries of the "memory" cache (LRU)
+        "snmp_cache_ttl": {},          # seconds per OID class, e.g. {"system": 3600, "config": 300, "status": 30}
+        # PTR answers (and NXDOMAINs) shared by later runs: "redis" (RQ's) or "memory" (per process)
+        "dns_cache": "redis",
+        # range scan findings: "rows" (one ScanFinding each) or "columnar" (one artifact per run)
+        "findings_store": "rows",
+        "findings_codec": "auto",      # "packed", "parquet" (needs pyarrow) or "auto"
+    }
 
 
 config = AutoDiscoveryConfig
@@ -1,9 +1,9 @@
 from django.contrib import admin
-from .models import Scanner, ScanRun, ScanFinding
+from .models import Scanner, ScanRun, ScanFinding, ScanRunLogLine, ScanShard, DeviceFingerprint
 
 @admin.register(Scanner)
 class ScannerAdmin(admin.ModelAdmin):
-    list_display = ("name", "type", "created")
+    list_display = ("name", "type", "interval", "next_run", "created")
 
 @admin.register(ScanRun)
 class ScanRunAdmin(admin.ModelAdmin):
@@ -12,3 +12,15 @@ class ScanRunAdmin(admin.ModelAdmin):
 @admin.register(ScanFinding)
 class ScanFindingAdmin(admin.ModelAdmin):
     list_display = ("run", "summary")
+
+@admin.register(ScanShard)
+class ScanShardAdmin(admin.ModelAdmin):
+    list_display = ("run", "cidr", "status", "started", "finished")
+
+@admin.register(ScanRunLogLine)
+class ScanRunLogLineAdmin(admin.ModelAdmin):
+    list_display = ("run", "created", "message")
+
+@admin.register(DeviceFingerprint)
+class DeviceFingerprintAdmin(admin.ModelAdmin):
+    list_display = ("host", "updated")
@@ -0,0 +1,71 @@
+# netbox_autodiscovery/api/serializers.py
+from rest_framework import serializers
+from netbox.api.serializers import BaseModelSerializer
+from ..models import Scanner, ScanRun, ScanFinding
+
+# write-only keys of Scanner.params: accepted on write, never returned
+SECRET_PARAMS = ("community", "password")
+
+
+class ScannerListSerializer(serializers.ListSerializer):
+    """Creates a list of scanners POSTed at once with a single bulk_create."""
+
+    def validate(self, attrs):
+        names = [item["name"] for item in attrs]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise serializers.ValidationError(f"Duplicate scanner names: {', '.join(duplicates)}")
+        return attrs
+
+    def create(self, validated_data):
+        return Scanner.objects.bulk_create(Scanner(**item) for item in validated_data)
+
+
+class ScannerSerializer(BaseModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name="plugins-api:netbox_autodiscovery-api:scanner-detail")
+
+    class Meta:
+        model = Scanner
+        fields = ("id", "url", "display", "name", "type", "params", "interval", "next_run", "created")
+        brief_fields = ("id", "url", "display", "name", "type")
+        list_serializer_class = ScannerListSerializer
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if isinstance(data.get("params"), dict):
+            data["params"] = {key: val for key, val in data["params"].items() if key not in SECRET_PARAMS}
+        return data
+
+    def update(self, instance, validated_data):
+        # clients never see the secrets, so params written back without them keep the stored ones
+        params = validated_data.get("params")
+        if isinstance(params, dict) and isinstance(instance.params, dict):
+            for key in SECRET_PARAMS:
+                if key not in params and key in instance.params:
+                    params[key] = instance.params[key]
+        return super().update(instance, validated_data)
+
+
+class ScanRunSerializer(BaseModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name="plugins-api:netbox_autodiscovery-api:scanrun-detail")
+    scanner = ScannerSerializer(nested=True, read_only=True)
+
+    class Meta:
+        model = ScanRun
+        fields = ("id", "url", "display", "scanner", "status", "started", "finished", "stats")
+        brief_fields = ("id", "url", "display", "status")
+
+
+class ScanFindingSerializer(BaseModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name="plugins-api:netbox_autodiscovery-api:scanfinding-detail")
+    run = ScanRunSerializer(nested=True, read_only=True)
+
+    class Meta:
+        model = ScanFinding
+        fields = ("id", "url", "display", "run", "summary", "details")
+        brief_fields = ("id", "url", "display", "summary")
+
+
+class ScannerRunRequestSerializer(serializers.Serializer):
+    """Body of POST scanners/run/: the scanners to start a run for."""
+    scanners = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
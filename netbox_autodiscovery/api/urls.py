@@ -0,0 +1,12 @@
+# netbox_autodiscovery/api/urls.py
+from netbox.api.routers import NetBoxRouter
+from . import views
+
+app_name = "netbox_autodiscovery"
+
+router = NetBoxRouter()
+router.register("scanners", views.ScannerViewSet)
+router.register("runs", views.ScanRunViewSet)
+router.register("findings", views.ScanFindingViewSet)
+
+urlpatterns = router.urls
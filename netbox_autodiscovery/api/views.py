@@ -0,0 +1,74 @@
+# netbox_autodiscovery/api/views.py
+from django.db import transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from netbox.api.authentication import TokenWritePermission
+from netbox.api.viewsets import NetBoxModelViewSet, NetBoxReadOnlyModelViewSet
+from ..models import Scanner, ScanRun, ScanFinding
+from ..findings_store import export_response
+from ..tasks import enqueue_runs
+from . import serializers
+
+
+class ScannerViewSet(NetBoxModelViewSet):
+    """
+    Scanners. POST a list to create many at once (one INSERT); POST
+    scanners/run/ with {"scanners": [1, 2, ...]} to start a run of each.
+    """
+    queryset = Scanner.objects.all()
+    serializer_class = serializers.ScannerSerializer
+    filterset_fields = ("type", "name")
+
+    @action(detail=False, methods=["post"], url_path="run", permission_classes=[IsAuthenticated, TokenWritePermission])
+    def run(self, request):
+        if not request.user.has_perm("netbox_autodiscovery.add_scanrun"):
+            raise PermissionDenied("Starting runs requires the add permission on scan runs")
+        body = serializers.ScannerRunRequestSerializer(data=request.data)
+        body.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(body.validated_data["scanners"]))
+
+        scanners = {s.pk: s for s in Scanner.objects.restrict(request.user, "view").filter(pk__in=ids)}
+        missing = [pk for pk in ids if pk not in scanners]
+        if missing:
+            return Response(
+                {"scanners": [f"Unknown scanner(s): {', '.join(map(str, missing))}"]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            runs = ScanRun.objects.bulk_create(ScanRun(scanner=scanners[pk]) for pk in ids)
+            # workers must not pick up a job before its run row is visible
+            transaction.on_commit(lambda: enqueue_runs(runs))
+        data = serializers.ScanRunSerializer(runs, many=True, context={"request": request}).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class ScanRunViewSet(NetBoxModelViewSet):
+    """
+    Scan runs: read and delete; runs are started through scanners/run/.
+    runs/<id>/export/?output=csv|jsonl|raw streams all findings of a run.
+    """
+    queryset = ScanRun.objects.select_related("scanner").defer("log", "alive_hosts", "findings_blob")
+    serializer_class = serializers.ScanRunSerializer
+    filterset_fields = ("scanner", "status")
+    http_method_names = ["get", "delete", "head", "options"]
+
+    @action(detail=True, methods=["get"], url_path="export")
+    def export(self, request, pk=None):
+        run = self.get_object()
+        try:
+            # a plain Django response: the rows are streamed, not rendered by DRF
+            return export_response(run.pk, request.query_params.get("output") or "csv")
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ScanFindingViewSet(NetBoxReadOnlyModelViewSet):
+    queryset = ScanFinding.objects.select_related("run__scanner").defer(
+        "run__log", "run__alive_hosts", "run__findings_blob"
+    )
+    serializer_class = serializers.ScanFindingSerializer
+    filterset_fields = ("run", "summary")
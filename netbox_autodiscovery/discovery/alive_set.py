@@ -0,0 +1,90 @@
+# netbox_autodiscovery/discovery/alive_set.py
+import ipaddress
+
+
+class AliveBitmap:
+    """
+    Alive hosts of one IPv4 prefix, one bit per address (bit 0 is the MSB
+    of the first byte and stands for the network address). A /16 costs
+    8 KiB, a /8 2 MiB, independent of how many hosts answered.
+    """
+
+    def __init__(self, prefix, data: bytes | None = None):
+        self.network = ipaddress.ip_network(prefix, strict=False)
+        self.base = int(self.network.network_address)
+        self.size = self.network.num_addresses
+        nbytes = (self.size + 7) // 8
+        self.data = bytearray(data) if data else bytearray(nbytes)
+        if len(self.data) != nbytes:
+            raise ValueError(f"Bitmap of {len(self.data)} bytes does not match {self.network}")
+
+    def add(self, ip: str):
+        n = int(ipaddress.IPv4Address(ip)) - self.base
+        self.data[n >> 3] |= 0x80 >> (n & 7)
+
+    def __len__(self) -> int:
+        return bin(int.from_bytes(self.data, "big")).count("1")
+
+    def __iter__(self):
+        return _iter_bits(self.data, self.base)
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.data)
+
+    def window(self, network) -> int:
+        """The bits covering `network` (contained in this prefix) as an int."""
+        offset = int(network.network_address) - self.base
+        shift = len(self.data) * 8 - offset - network.num_addresses
+        return (int.from_bytes(self.data, "big") >> shift) & ((1 << network.num_addresses) - 1)
+
+    def merge(self, other: "AliveBitmap"):
+        """OR in the bitmap of a sub-prefix, e.g. one shard of this run."""
+        if not other.network.subnet_of(self.network):
+            raise ValueError(f"{other.network} is not inside {self.network}")
+        offset = other.base - self.base
+        if offset % 8 == 0 and other.size % 8 == 0:
+            start = offset // 8
+            for i, b in enumerate(other.data):
+                self.data[start + i] |= b
+            return
+        bits = int.from_bytes(self.data, "big")
+        bits |= other.window(other.network) << (len(self.data) * 8 - offset - other.size)
+        self.data = bytearray(bits.to_bytes(len(self.data), "big"))
+
+
+def _iter_bits(data: bytes, base: int):
+    """Yield the address of every set bit as a dotted string."""
+    for i, b in enumerate(data):
+        if not b:
+            continue
+        for bit in range(8):
+            if b & (0x80 >> bit):
+                yield str(ipaddress.IPv4Address(base + i * 8 + bit))
+
+
+def _window_bytes(bits: int, size: int) -> bytes:
+    """Left-align a `size`-bit window so bit 0 is the MSB of the first byte."""
+    pad = -size % 8
+    return (bits << pad).to_bytes((size + pad) // 8, "big")
+
+
+def diff_alive(previous: AliveBitmap, current: AliveBitmap) -> tuple[list[str], list[str]]:
+    """
+    Return (appeared, disappeared) addresses between two runs.
+    Only the overlap of both prefixes is compared, so editing the scanner's
+    CIDR does not report the added or dropped part of the range.
+    """
+    if current.network.subnet_of(previous.network):
+        overlap = current.network
+    elif previous.network.subnet_of(current.network):
+        overlap = previous.network
+    else:
+        return [], []
+
+    before = previous.window(overlap)
+    after = current.window(overlap)
+    base = int(overlap.network_address)
+    size = overlap.num_addresses
+    appeared = list(_iter_bits(_window_bytes(after & ~before, size), base))
+    disappeared = list(_iter_bits(_window_bytes(before & ~after, size), base))
+    return appeared, disappeared
@@ -0,0 +1,106 @@
+# netbox_autodiscovery/discovery/arp_sweep.py
+import fcntl
+import ipaddress
+import socket
+import struct
+from .packet_sweep import PacketSweeper, ProbeUnavailable
+
+
+ETH_P_ARP = 0x0806
+ETH_P_IP = 0x0800
+ARP_REQUEST = 1
+ARP_REPLY = 2
+SIOCGIFADDR = 0x8915
+BROADCAST = b"\xff" * 6
+
+
+def attached_interface(network, route_table: str = "/proc/net/route") -> str:
+    """
+    Return the interface whose directly connected route (no gateway)
+    covers `network`, longest mask first. ARP only reaches such segments.
+    """
+    best, best_len = None, -1
+    try:
+        with open(route_table) as f:
+            next(f)
+            for line in f:
+                fields = line.split()
+                iface, dest, gateway, mask = fields[0], fields[1], fields[2], fields[7]
+                if int(gateway, 16) != 0:
+                    continue
+                # /proc/net/route prints addresses in host (little-endian) order
+                dest = socket.inet_ntoa(struct.pack("<I", int(dest, 16)))
+                mask_len = bin(int(mask, 16)).count("1")
+                route = ipaddress.ip_network(f"{dest}/{mask_len}", strict=False)
+                if network.subnet_of(route) and mask_len > best_len:
+                    best, best_len = iface, mask_len
+    except (OSError, StopIteration, ValueError, IndexError):
+        pass
+    if best is None:
+        raise ProbeUnavailable(f"{network} is not on a directly attached segment")
+    return best
+
+
+def _interface_addresses(sock, iface: str) -> tuple[bytes, bytes]:
+    """Return (mac, ipv4) of a local interface as raw bytes."""
+    with open(f"/sys/class/net/{iface}/address") as f:
+        mac = bytes.fromhex(f.read().strip().replace(":", ""))
+    ifreq = struct.pack("256s", iface.encode()[:15])
+    try:
+        ip = fcntl.ioctl(sock.fileno(), SIOCGIFADDR, ifreq)[20:24]
+    except OSError:
+        raise ProbeUnavailable(f"{iface} has no IPv4 address")
+    return mac, ip
+
+
+class ArpSweeper(PacketSweeper):
+    """
+    ARP who-has sweep of a directly attached segment over one AF_PACKET
+    socket. Hosts that drop ICMP and TCP still have to answer ARP, so this
+    is the most reliable probe on local subnets. Needs CAP_NET_RAW.
+    """
+
+    def __init__(self, network, rate: int = 2000, timeout: float = 1.0, retries: int = 1,
+                 max_inflight: int = 4096, scheduler=None):
+        network = ipaddress.ip_network(network, strict=False)
+        iface = attached_interface(network)
+        try:
+            sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ARP))
+        except (PermissionError, OSError, AttributeError):
+            raise ProbeUnavailable("AF_PACKET sockets are not permitted")
+        try:
+            sock.bind((iface, ETH_P_ARP))
+            self.mac, self.src_ip = _interface_addresses(sock, iface)
+        except (OSError, ProbeUnavailable):
+            sock.close()
+            raise
+        sock.setblocking(False)
+        super().__init__(sock, rate=rate, timeout=timeout, retries=retries, max_inflight=max_inflight,
+                         scheduler=scheduler)
+        self.iface = iface
+        self._header = (
+            BROADCAST + self.mac + struct.pack("!H", ETH_P_ARP)
+            + struct.pack("!HHBBH", 1, ETH_P_IP, 6, 4, ARP_REQUEST)
+            + self.mac + self.src_ip + b"\x00" * 6
+        )
+
+    def _transmit(self, ip: str, seq: int) -> int:
+        return self.sock.send(self._header + socket.inet_aton(ip))
+
+    def _read_replies(self, pending: dict) -> list:
+        alive = []
+        while True:
+            try:
+                frame = self.sock.recv(2048)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                break
+            if len(frame) < 42 or frame[12:14] != b"\x08\x06":
+                continue
+            if struct.unpack("!H", frame[20:22])[0] != ARP_REPLY:
+                continue
+            probe = pending.pop(socket.inet_ntoa(frame[28:32]), None)
+            if probe is not None:
+                alive.append((probe, None))
+        return alive
@@ -1,80 +1,567 @@
+import asyncio
+import ipaddress
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from django.db import transaction
 from django.utils import timezone
+from django.utils.text import slugify
 from dcim.models import Device, Interface, DeviceRole, DeviceType, Site, Manufacturer
 from ipam.models import VLAN
-from .snmp_helpers import snmp_walk, snmp_get
-from ..models import ScanFinding
+from .snmp_helpers import SnmpSession
+from .snmp_async import AsyncSnmpSession, SnmpEngine, close_engine
+from .reconcile import DeviceReconciler
+from .fingerprint import FINGERPRINT_OIDS, TABLES, plan_walks, table_hash
+from .drivers import DRIVERS, SYSTEM_OIDS, VendorProfile, detect, get_driver
+from .snmp_cache import SnmpCache, add_columns, by_column, get_cache
+from .congestion import AdaptiveScheduler
+from ..models import ScanFinding, DeviceFingerprint
+from ..runlog import RunLogger
+from ..metrics import PhaseStats
+from ..progress import RunProgress
 
 
+MAX_CIDR_TARGETS = 65536
+
+
+# ---------------------------
+# Targets
+# ---------------------------
+
+def expand_targets(params: dict) -> list[str]:
+    """
+    Resolve the Cisco targets of a scanner.
+    "hosts" may be a list; "hostname" may hold one host, a comma/space
+    separated list, or a CIDR whose usable addresses are all polled.
+    """
+    raw = params.get("hosts") or params.get("hostname") or []
+    if isinstance(raw, str):
+        raw = raw.replace(",", " ").split()
+
+    targets = []
+    for item in raw:
+        if "/" in item:
+            network = ipaddress.ip_network(item, strict=False)
+            if network.num_addresses > MAX_CIDR_TARGETS:
+                raise ValueError(f"CIDR {item} is too large for a Cisco scan")
+            targets.extend(str(ip) for ip in network.hosts())
+        else:
+            targets.append(item)
+    return list(dict.fromkeys(targets))
+
+
+# ---------------------------
+# SNMP collection
+# ---------------------------
+
+def _probe_oids(guess: VendorProfile | None) -> dict:
+    """Scalars of the system GET: the generic ones plus the expected profile's."""
+    return {**SYSTEM_OIDS, **FINGERPRINT_OIDS, **(guess.scalars if guess else {})}
+
+
+def _guess_driver(forced: VendorProfile | None, previous: dict | None) -> VendorProfile | None:
+    return forced or DRIVERS.get((previous or {}).get("driver"))
+
+
+def _pick_driver(forced, guess, probe: dict) -> tuple[VendorProfile, dict]:
+    """
+    Choose the profile for this device and return the scalars still missing
+    from the probe (only when the guessed profile turned out to be wrong).
+    """
+    profile = forced or detect(probe.get("sys_object_id"))
+    missing = {} if profile is guess else {k: oid for k, oid in profile.scalars.items() if k not in probe}
+    return profile, missing
+
+
+def _split_probe(host: str, profile: VendorProfile, probe: dict, previous: dict | None, plan: dict) -> dict:
+    """Build the snapshot skeleton from the system/fingerprint GET and plan the walks."""
+    walks = plan_walks(previous, probe, markers=profile.markers, **plan) & set(profile.tables)
+    return {
+        "host": host,
+        "driver": profile,
+        "system": {key: probe.get(key) for key in {**SYSTEM_OIDS, **profile.system}},
+        "probe": {key: probe.get(key) for key in {**FINGERPRINT_OIDS, **profile.fingerprint}},
+        "walks": walks,
+    }
+
+
+@contextmanager
+def _snmp_phase(session, phases: dict, phase: str):
+    """Record the SNMP time, PDUs and bytes of one collection phase into `phases`."""
+    pdus, traffic = session.counters()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        end_pdus, end_traffic = session.counters()
+        phases[phase] = {
+            "snmp_seconds": time.perf_counter() - started,
+            "pdus": end_pdus - pdus,
+            "bytes": end_traffic - traffic,
+        }
+
+
+def _cached_probe(cache: SnmpCache | None, session, oids: dict) -> tuple[dict, dict]:
+    """(cached scalars, scalars still to GET)"""
+    hits = cache.lookup(session, oids) if cache else {}
+    return hits, {key: oid for key, oid in oids.items() if key not in hits}
+
+
+def _cached_walk(cache: SnmpCache | None, session, profile: VendorProfile, probe: dict, walks) -> tuple:
+    """
+    (columns still to walk, cached columns, cache versions). A column's
+    version is the current value of its table's change markers.
+    """
+    columns = profile.columns(walks)
+    versions = {
+        col: "|".join(str(probe.get(m)) for m in profile.markers.get(col.split(".", 1)[0]) or ())
+        for col in columns
+    }
+    cells = cache.lookup(session, columns, versions) if cache else {}
+    return {col: oid for col, oid in columns.items() if col not in cells}, cells, versions
+
+
+def _finish_walk(cache, session, rows: dict, walked: dict, cells: dict, versions: dict, phases: dict):
+    """Cache the walked columns (unless the walk broke off) and merge the cached ones into `rows`."""
+    if cache:
+        if session.complete:
+            cache.store(session, walked, by_column(rows, walked), versions)
+        add_columns(rows, cells)
+        phases["walk"]["cache_hits"] = len(cells)
+
+
+def _complete_tables(session, walks, walked: dict) -> set:
+    """Tables of `walks` that are whole: served from the cache, or walked without breaking off."""
+    if not walked or session.complete:
+        return set(walks)
+    return set(walks) - {col.split(".", 1)[0] for col in walked}
+
+
+def _collect(session: SnmpSession, max_rep: int, previous: dict | None = None,
+             driver: VendorProfile | None = None, cache: SnmpCache | None = None, **plan) -> dict:
+    """
+    Fetch everything the writer needs from one device (blocking).
+    The first GET carries sysObjectID next to the scalars of the profile
+    used last time, so a second GET is only needed for a new or replaced
+    device. All tables to walk then share one GETBULK stream. Scalars and
+    columns found in `cache` are not requested again.
+    """
+    phases = {}
+    guess = _guess_driver(driver, previous)
+    with _snmp_phase(session, phases, "system"):
+        probe, missing = _cached_probe(cache, session, _probe_oids(guess))
+        fetched = session.get_many(missing)
+        profile, extra = _pick_driver(driver, guess, {**fetched, **probe})
+        probe.update(fetched)
+        if extra:
+            cached, extra = _cached_probe(cache, session, extra)
+            more = session.get_many(extra) if extra else {}
+            fetched.update(more)
+            probe.update(cached)
+            probe.update(more)
+    if cache:
+        cache.store(session, {**_probe_oids(guess), **profile.scalars}, fetched)
+    snap = _split_probe(session.host, profile, probe, previous, plan)
+    walks = snap["walks"]
+    walked, cells, versions = _cached_walk(cache, session, profile, probe, walks)
+    with _snmp_phase(session, phases, "walk"):
+        rows = session.bulk_table(
+            walked, max_repetitions=max_rep, binary=profile.binary_columns(walks)
+        ) if walked else {}
+    _finish_walk(cache, session, rows, walked, cells, versions, phases)
+    snap.update(profile.split(rows, walks))
+    snap["complete"] = _complete_tables(session, walks, walked)
+    snap["snmp"] = session.stats
+    snap["phases"] = phases
+    return snap
+
+
+async def _collect_async(session: AsyncSnmpSession, max_rep: int, previous: dict | None = None,
+                         driver: VendorProfile | None = None, cache: SnmpCache | None = None, **plan) -> dict:
+    phases = {}
+    guess = _guess_driver(driver, previous)
+    with _snmp_phase(session, phases, "system"):
+        probe, missing = _cached_probe(cache, session, _probe_oids(guess))
+        fetched = await session.get(missing)
+        # change markers are never cached, so a live device always answers something
+        if not any(fetched.values()):
+            raise TimeoutError("no SNMP response")
+        profile, extra = _pick_driver(driver, guess, {**fetched, **probe})
+        probe.update(fetched)
+        if extra:
+            cached, extra = _cached_probe(cache, session, extra)
+            more = await session.get(extra) if extra else {}
+            fetched.update(more)
+            probe.update(cached)
+            probe.update(more)
+    if cache:
+        cache.store(session, {**_probe_oids(guess), **profile.scalars}, fetched)
+    snap = _split_probe(session.host, profile, probe, previous, plan)
+    walks = snap["walks"]
+    walked, cells, versions = _cached_walk(cache, session, profile, probe, walks)
+    with _snmp_phase(session, phases, "walk"):
+        rows = await session.bulk_table(
+            walked, max_repetitions=max_rep, binary=profile.binary_columns(walks)
+        ) if walked else {}
+    _finish_walk(cache, session, rows, walked, cells, versions, phases)
+    snap.update(profile.split(rows, walks))
+    snap["complete"] = _complete_tables(session, walks, walked)
+    snap["snmp"] = session.stats
+    snap["phases"] = phases
+    return snap
+
+
+def _poll_fleet(targets, community, mp_model, max_rep, concurrency=100, device_timeout=30.0,
+                fingerprints=None, scheduler=None, snmp_timeout=1.0, snmp_retries=1, port=161, driver=None,
+                cache=None, **plan):
+    """
+    Poll all targets concurrently on an asyncio loop in a helper thread and
+    yield one snapshot per device as it completes. The caller is the single
+    writer that applies snapshots to the database.
+    `concurrency` caps devices in flight overall; an adaptive scheduler
+    also caps them per subnet and tunes each subnet's PDU timeout.
+    """
+    results = queue.Queue(maxsize=concurrency)
+    done = object()
+    fingerprints = fingerprints or {}
+    scheduler = scheduler or AdaptiveScheduler(adaptive=False, initial_timeout=snmp_timeout)
+
+    async def poll_all():
+        engine = SnmpEngine()
+        limit = asyncio.Semaphore(concurrency)
+        loop = asyncio.get_running_loop()
+        conditions = {}
+
+        async def poll_one(host):
+            ctl = scheduler.controller(host)
+            cond = conditions.setdefault(ctl, asyncio.Condition())
+            async with cond:
+                await cond.wait_for(ctl.has_room)
+                ctl.in_flight += 1
+            try:
+                async with limit:
+                    session = AsyncSnmpSession(
+                        engine, host, community, port=port, timeout=snmp_timeout, retries=snmp_retries,
+                        mp_model=mp_model, controller=ctl if scheduler.adaptive else None,
+                    )
+                    try:
+                        snap = await asyncio.wait_for(
+                            _collect_async(session, max_rep, fingerprints.get(host), driver, cache, **plan),
+                            device_timeout,
+                        )
+                    except Exception as e:
+                        snap = {"host": host, "error": str(e) or type(e).__name__}
+            finally:
+                async with cond:
+                    ctl.in_flight -= 1
+                    cond.notify_all()
+            # hand off without blocking the event loop when the writer lags
+            await loop.run_in_executor(None, results.put, snap)
+
+        try:
+            await asyncio.gather(*(poll_one(host) for host in targets))
+        finally:
+            close_engine(engine)
+
+    def runner():
+        try:
+            asyncio.run(poll_all())
+        finally:
+            results.put(done)
+
+    thread = threading.Thread(target=runner, name="cisco-fleet-poller", daemon=True)
+    thread.start()
+    while True:
+        snap = results.get()
+        if snap is done:
+            break
+        yield snap
+    thread.join()
+
+
+# ---------------------------
+# Database writer
+# ---------------------------
+
+class _Skip(Exception):
+    """Raised inside a step whose data is unchanged since the last run."""
+
+
+def _fake_device(hostname: str, run, log_step):
+    """Create a fake switch with two interfaces and two VLANs."""
+    manufacturer, _ = Manufacturer.objects.get_or_create(name="Cisco", defaults={"slug": "cisco"})
+    dtype, _ = DeviceType.objects.get_or_create(
+        model="Cisco 2960",
+        manufacturer=manufacturer,
+        defaults={"slug": "cisco-2960"}
+    )
+    site, _ = Site.objects.get_or_create(name="Default", defaults={"slug": "default"})
+
+    device, _ = Device.objects.get_or_create(
+        name=hostname,
+        defaults={"device_type": dtype, "status": "active", "site": site},
+    )
+
+    iface1, _ = Interface.objects.get_or_create(device=device, name="Gig0/1")
+    iface2, _ = Interface.objects.get_or_create(device=device, name="Gig0/2")
+
+    vlan10, _ = VLAN.objects.get_or_create(vid=10, defaults={"name": "Users"})
+    vlan20, _ = VLAN.objects.get_or_create(vid=20, defaults={"name": "Servers"})
+
+    iface1.mode = "access"
+    iface1.untagged_vlan = vlan10
+    iface1.save()
+
+    iface2.mode = "tagged"
+    iface2.tagged_vlans.set([vlan10, vlan20])
+    iface2.save()
+
+    # ✅ Record findings
+    from ..models import ScanFinding
+    ScanFinding.objects.create(
+        run=run,
+        summary="Fake Cisco device discovered",
+        details={"device": device.name}
+    )
+    ScanFinding.objects.create(
+        run=run,
+        summary="Interfaces discovered",
+        details={"interfaces": [iface1.name, iface2.name]}
+    )
+    ScanFinding.objects.create(
+        run=run,
+        summary="VLANs discovered",
+        details={"vlans": [vlan10.vid, vlan20.vid]}
+    )
+
+    log_step("✅ Fake Cisco scan complete. Created device, interfaces, VLANs, and assignments.")
+    return {"interfaces": 2, "vlans": 2, "assignments": 2}
+
+
+def _apply_device(snap: dict, run, log_step, previous: dict | None = None,
+                  phases: PhaseStats | None = None) -> dict:
+    """
+    Write one device snapshot into DCIM/IPAM. Returns per-device stats.
+    Tables that were not walked, or whose hash matches the stored
+    fingerprint, skip their reconciliation step. A table whose walk broke
+    off is applied, but its hash and change markers are not remembered, so
+    the next run walks it again. The time and queries of each step go to
+    `phases`.
+    Each step commits as one transaction: a step that fails is rolled back
+    as a whole, while a single bad row only loses itself (see savepoints).
+    """
+    hostname = snap["host"]
+    profile = snap["driver"]
+    stats = {"interfaces": 0, "vlans": 0, "assignments": 0, "failed_rows": 0, "skipped": []}
+    previous = previous or {}
+    hashes = dict(previous.get("hashes", {}))
+    phases = phases if phases is not None else PhaseStats()
+    complete = snap.get("complete", snap["walks"])
+
+    def unchanged(table: str) -> bool:
+        data = snap[table]
+        if table not in profile.tables:
+            stats["skipped"].append(table)
+            return True
+        if data is not None and table_hash(data) != hashes.get(table):
+            return False
+        stats["skipped"].append(table)
+        log_step(f"⏭ {table.capitalize()} unchanged since last run, skipped.")
+        return True
+
+    # Step 1: System info
+    with phases.track("system", key="db_seconds"):
+        try:
+            with transaction.atomic():
+                sysname = snap["system"].get("sysname")
+                sysdescr = snap["system"].get("sysdescr")
+                serial = snap["system"].get("serial")
+
+                log_step(f"System name: {sysname or hostname}")
+                log_step(f"Driver: {profile.name} (sysObjectID {snap['system'].get('sys_object_id') or 'unknown'})")
+                if sysdescr:
+                    log_step(f"System description: {sysdescr}")
+                if serial:
+                    log_step(f"Serial: {serial}")
+
+                manufacturer, _ = Manufacturer.objects.get_or_create(
+                    name=profile.manufacturer, defaults={"slug": slugify(profile.manufacturer)}
+                )
+                role, _ = DeviceRole.objects.get_or_create(name="Switch", defaults={"slug": "switch"})
+                dtype, _ = DeviceType.objects.get_or_create(
+                    model=profile.device_type,
+                    manufacturer=manufacturer,
+                    defaults={"slug": "generic-cisco" if profile.name == "cisco" else slugify(profile.device_type)}
+                )
+                site, _ = Site.objects.get_or_create(name="Default", defaults={"slug": "default"})
+
+                device, created = Device.objects.get_or_create(
+                    name=sysname or hostname,
+                    defaults={"role": role, "device_type": dtype, "status": "active", "site": site},
+                )
+                if created:
+                    ScanFinding.objects.create(
+                        run=run,
+                        summary=f"New {profile.manufacturer} device discovered",
+                        details={"hostname": device.name, "serial": device.serial}
+                    )
+                else:
+                    ScanFinding.objects.create(
+                        run=run,
+                        summary=f"{profile.manufacturer} device updated",
+                        details={"hostname": device.name, "serial": device.serial}
+                    )
+                changed = False
+                if sysdescr and f"Discovered: {sysdescr}" not in (device.comments or ""):
+                    device.comments = (device.comments or "") + f"\nDiscovered: {sysdescr}"
+                    changed = True
+                if serial and device.serial != serial:
+                    device.serial = serial
+                    changed = True
+                if changed:
+                    device.save()
+        except Exception as e:
+            log_step(f"❌ Failed system info discovery: {e}")
+            return stats  # cannot continue without a device
+
+    # Step 2: Interfaces
+    with phases.track("interfaces", key="db_seconds"):
+        # interfaces and VLANs of this device, loaded once for the whole run
+        state = DeviceReconciler(device)
+        if_names = previous.get("ifnames", {})
+        try:
+            with transaction.atomic():
+                if unchanged("interfaces"):
+                    if snap["interfaces"] is not None:
+                        if_names = {idx: row["name"] for idx, row in snap["interfaces"].items() if row.get("name")}
+                    state.index_interfaces(if_names)
+                else:
+                    log_step("Applying interfaces...")
+                    created, updated = state.sync_interfaces(snap["interfaces"])
+                    if_names = {idx: iface.name for idx, iface in state.by_index.items()}
+                    if "interfaces" in complete:
+                        hashes["interfaces"] = table_hash(snap["interfaces"])
+                    log_step(f"✅ Discovered {len(state.by_index)} interfaces ({created} new, {updated} changed).")
+                stats["interfaces"] = len(state.by_index)
+        except Exception as e:
+            log_step(f"❌ Failed interface discovery: {e}")
+
+    # Step 3: VLANs
+    with phases.track("vlans", key="db_seconds"):
+        try:
+            with transaction.atomic():
+                if unchanged("vlans"):
+                    raise _Skip
+                log_step("Applying VLANs...")
+                vlans, created, renamed = state.sync_vlans(profile.vlan_names(snap["vlans"]))
+                ScanFinding.objects.bulk_create([
+                    ScanFinding(run=run, summary="VLAN discovered", details={"vid": vlan.vid, "name": vlan.name})
+                    for vlan in vlans
+                ])
+                stats["vlans"] = len(vlans)
+                if "vlans" in complete:
+                    hashes["vlans"] = table_hash(snap["vlans"])
+                log_step(f"✅ Discovered {len(vlans)} VLANs ({created} new, {renamed} renamed).")
+        except _Skip:
+            pass
+        except Exception as e:
+            log_step(f"❌ Failed VLAN discovery: {e}")
+
+    # Step 4: VLAN assignments
+    with phases.track("assignments", key="db_seconds"):
+        try:
+            with transaction.atomic():
+                if unchanged("ports"):
+                    raise _Skip
+                log_step("Applying VLAN ↔ interface assignments...")
+                assignments = state.sync_assignments(*profile.assignments(snap["ports"]))
+                stats["assignments"] = assignments
+                if "ports" in complete:
+                    hashes["ports"] = table_hash(snap["ports"])
+                log_step(f"✅ Assigned VLANs on {assignments} interfaces.")
+        except _Skip:
+            pass
+        except Exception as e:
+            log_step(f"❌ Failed VLAN assignment discovery: {e}")
+
+    # rows the database rejected were skipped on their own, in a savepoint
+    for what, error in state.failed:
+        log_step(f"❌ Skipped {what}: {error}")
+    stats["failed_rows"] = len(state.failed)
+
+    # Remember what was seen, so the next run can skip unchanged tables
+    with phases.track("fingerprint", key="db_seconds"):
+        # markers of a table whose walk broke off are forgotten: the next run sees them move
+        broken = snap["walks"] - complete
+        stale = {m for table in broken for m in profile.markers.get(table) or ()}
+        values = {
+            **{key: (None if key in stale else val) for key, val in snap["probe"].items()},
+            "driver": profile.name,
+            "hashes": hashes,
+            "ifnames": if_names,
+            "full_at": time.time() if complete == set(profile.tables) else previous.get("full_at", 0),
+        }
+        DeviceFingerprint.objects.update_or_create(host=hostname, defaults={"values": values})
+
+    return stats
+
+
+# ---------------------------
+# Discovery core
+# ---------------------------
+
 def run_cisco_scan(params: dict, run, fake: bool = False):
     """
-    Discover a Cisco switch via SNMP.
+    Discover switches via SNMP.
     Params example:
-        {"hostname": "192.168.1.10", "community": "public"}
+        {"hostname": "192.168.1.10", "community": "public",
+         "snmp_version": "2c", "max_repetitions": 25, "snmp_port": 161}
+    The vendor profile (see drivers) is picked per device from sysObjectID;
+    "driver" (cisco, arista, juniper, qbridge, generic) forces one.
+    "hostname" may also be a comma-separated list or a CIDR (or pass a
+    "hosts" list); several targets are polled concurrently with asyncio,
+    bounded by "concurrency" (default 100) and "device_timeout" seconds
+    (default 30) per device. "snmp_timeout" (default 2s) and "snmp_retries"
+    (default 1) apply to every target; in a fleet each /24 gets an adaptive
+    device window and PDU timeout with snmp_timeout as the ceiling
+    ("adaptive": false restores fixed values).
+    Tables whose change markers (sysUpTime, ifTableLastChange, VTP revision)
+    did not move since the last run are not walked; "full_rescan_hours"
+    (default 24) bounds how long that can go on, "force_full" disables it.
+    Results are shared through the SNMP cache (see snmp_cache) between runs
+    within their TTL; "refresh" (or "force_full") polls everything afresh.
+    run.stats["phases"] breaks the run down into system and walk (SNMP time,
+    PDUs and bytes) and system, interfaces, vlans, assignments and
+    fingerprint (DB time and queries).
     """
 
-    hostname = params.get("hostname")
     community = params.get("community", "public")
-    if not hostname:
+    targets = expand_targets(params)
+    if not targets:
         raise ValueError("No hostname provided for Cisco scan")
 
+    run_log = RunLogger.for_run(run)
+    progress = RunProgress.for_run(run)
+    progress.set(total=len(targets), phase="polling")
+
     def log_step(msg: str):
         """Helper to append to log progressively"""
-        run.log = (run.log or "") + f"\n{msg}"
-        run.save(update_fields=["log"])
-
-    log_step(f"Connecting to {hostname} via SNMP community='{community}'")
+        run_log.write(msg)
 
     # ----------------------------------------------------------------------
     # Fake mode
     # ----------------------------------------------------------------------
     if fake:
-        manufacturer, _ = Manufacturer.objects.get_or_create(name="Cisco", defaults={"slug": "cisco"})
-        dtype, _ = DeviceType.objects.get_or_create(
-            model="Cisco 2960",
-            manufacturer=manufacturer,
-            defaults={"slug": "cisco-2960"}
-        )
-        site, _ = Site.objects.get_or_create(name="Default", defaults={"slug": "default"})
-
-        device, _ = Device.objects.get_or_create(
-            name=hostname,
-            defaults={"device_type": dtype, "status": "active", "site": site},
-        )
-
-        iface1, _ = Interface.objects.get_or_create(device=device, name="Gig0/1")
-        iface2, _ = Interface.objects.get_or_create(device=device, name="Gig0/2")
-
-        vlan10, _ = VLAN.objects.get_or_create(vid=10, defaults={"name": "Users"})
-        vlan20, _ = VLAN.objects.get_or_create(vid=20, defaults={"name": "Servers"})
-
-        iface1.mode = "access"
-        iface1.untagged_vlan = vlan10
-        iface1.save()
-
-        iface2.mode = "tagged"
-        iface2.tagged_vlans.set([vlan10, vlan20])
-        iface2.save()
-
-        # ✅ Record findings
-        from ..models import ScanFinding
-        ScanFinding.objects.create(
-            run=run,
-            summary="Fake Cisco device discovered",
-            details={"device": device.name}
-        )
-        ScanFinding.objects.create(
-            run=run,
-            summary="Interfaces discovered",
-            details={"interfaces": [iface1.name, iface2.name]}
-        )
-        ScanFinding.objects.create(
-            run=run,
-            summary="VLANs discovered",
-            details={"vlans": [vlan10.vid, vlan20.vid]}
-        )
-
-        log_step("✅ Fake Cisco scan complete. Created device, interfaces, VLANs, and assignments.")
-        run.stats = {"interfaces": 2, "vlans": 2, "assignments": 2}
+        stats = {"interfaces": 0, "vlans": 0, "assignments": 0}
+        for hostname in targets:
+            log_step(f"Connecting to {hostname} via SNMP community='{community}'")
+            for key, val in _fake_device(hostname, run, log_step).items():
+                stats[key] += val
+            progress.add(checked=1, alive=1)
+        run_log.flush()
+        progress.flush()
+        run.stats = stats
         run.finished = timezone.now()
         run.save()
         return run.stats
@@ -82,156 +569,89 @@ def run_cisco_scan(params: dict, run, fake: bool = False):
     # ----------------------------------------------------------------------
     # Real SNMP discovery
     # ----------------------------------------------------------------------
-    stats = {"interfaces": 0, "vlans": 0, "assignments": 0}
+    # GETBULK needs SNMPv2c; v1-only agents fall back to per-column walks
+    mp_model = 0 if str(params.get("snmp_version", "2c")) == "1" else 1
+    max_rep = int(params.get("max_repetitions") or 25)
+    port = int(params.get("snmp_port") or 161)
+    snmp_timeout = float(params.get("snmp_timeout") or 2)
+    snmp_retries = int(params.get("snmp_retries", 1))
+    driver = get_driver(params.get("driver"))
+    plan = {
+        "full_rescan_hours": float(params.get("full_rescan_hours") or 24),
+        "force": bool(params.get("force_full")),
+    }
+    cache = get_cache(refresh=plan["force"] or bool(params.get("refresh")))
+    phases = PhaseStats()
+    fingerprints = {
+        fp.host: fp.values for fp in DeviceFingerprint.objects.filter(host__in=targets)
+    }
 
-    # Step 1: System info
-    try:
-        sysname = snmp_get(hostname, community, "1.3.6.1.2.1.1.5.0")
-        sysdescr = snmp_get(hostname, community, "1.3.6.1.2.1.1.1.0")
-        serial = snmp_get(hostname, community, "1.3.6.1.4.1.9.3.6.3")
-
-        log_step(f"System name: {sysname or hostname}")
-        if sysdescr:
-            log_step(f"System description: {sysdescr}")
-        if serial:
-            log_step(f"Serial: {serial}")
-
-        manufacturer, _ = Manufacturer.objects.get_or_create(name="Cisco", defaults={"slug": "cisco"})
-        role, _ = DeviceRole.objects.get_or_create(name="Switch", defaults={"slug": "switch"})
-        dtype, _ = DeviceType.objects.get_or_create(
-            model="Generic Cisco Switch",
-            manufacturer=manufacturer,
-            defaults={"slug": "generic-cisco"}
+    if len(targets) == 1:
+        hostname = targets[0]
+        log_step(f"Connecting to {hostname} via SNMP community='{community}'")
+        # one device: nothing to adapt across, snmp_timeout is its PDU timeout as is
+        session = SnmpSession(hostname, community, port=port, timeout=snmp_timeout, retries=snmp_retries,
+                              mp_model=mp_model)
+        previous = fingerprints.get(hostname)
+        snap = _collect(session, max_rep, previous, driver, cache, **plan)
+        phases.merge(snap["phases"])
+        progress.set(phase="writing")
+        stats = _apply_device(snap, run, log_step, previous, phases=phases)
+        progress.add(checked=1, alive=1)
+        stats["snmp"] = session.stats
+        log_step(f"SNMP timing: {session.timing_summary()}")
+    else:
+        concurrency = int(params.get("concurrency") or 100)
+        device_timeout = float(params.get("device_timeout") or 30)
+        scheduler = AdaptiveScheduler.from_params(
+            params, timeout=snmp_timeout, max_window=int(params.get("subnet_max_window") or concurrency)
         )
-        site, _ = Site.objects.get_or_create(name="Default", defaults={"slug": "default"})
-
-        device, created = Device.objects.get_or_create(
-            name=sysname or hostname,
-            defaults={"role": role, "device_type": dtype, "status": "active", "site": site},
-        )
-        if created:
-            ScanFinding.objects.create(
-                run=run,
-                summary="New Cisco device discovered",
-                details={"hostname": device.name, "serial": device.serial}
-            )
-        else:
-            ScanFinding.objects.create(
-                run=run,
-                summary="Cisco device updated",
-                details={"hostname": device.name, "serial": device.serial}
-            )
-        if sysdescr:
-            device.comments = (device.comments or "") + f"\nDiscovered: {sysdescr}"
-        if serial:
-            device.serial = serial
-        device.save()
-    except Exception as e:
-        log_step(f"❌ Failed system info discovery: {e}")
-        return stats  # cannot continue without a device
+        log_step(f"Polling {len(targets)} devices via SNMP community='{community}' "
+                 f"(concurrency={concurrency}, timeout={device_timeout}s)")
+        stats = {"devices": 0, "failed": 0, "interfaces": 0, "vlans": 0, "assignments": 0, "failed_rows": 0}
+        stats["unchanged"] = 0
+        stats["drivers"] = {}
+        for snap in _poll_fleet(targets, community, mp_model, max_rep, concurrency, device_timeout,
+                                fingerprints, scheduler=scheduler, snmp_timeout=snmp_timeout,
+                                snmp_retries=snmp_retries, port=port, driver=driver,
+                                cache=cache, **plan):
+            host = snap["host"]
 
-    # Step 2: Interfaces
-    try:
-        log_step("Walking SNMP for interfaces...")
-        if_names = snmp_walk(hostname, community, "1.3.6.1.2.1.31.1.1.1.1")
-        if_types = snmp_walk(hostname, community, "1.3.6.1.2.1.2.2.1.3")
-        if_admin = snmp_walk(hostname, community, "1.3.6.1.2.1.2.2.1.7")
-        if_oper = snmp_walk(hostname, community, "1.3.6.1.2.1.2.2.1.8")
-
-        for idx, if_name in if_names.items():
-            iface, _ = Interface.objects.get_or_create(device=device, name=if_name)
-            iface.type = "1000base-t" if if_types.get(idx) == "6" else "other"
-            iface.enabled = if_admin.get(idx) == "1"
-            iface.save()
-        stats["interfaces"] = len(if_names)
-        log_step(f"✅ Discovered {len(if_names)} interfaces.")
-    except Exception as e:
-        log_step(f"❌ Failed interface discovery: {e}")
-
-    # Step 3: VLANs
-    vlan_map = {}
-    try:
-        log_step("Walking SNMP for VLANs...")
-        vlan_ids = snmp_walk(hostname, community, "1.3.6.1.4.1.9.9.46.1.3.1.1.1")
-        vlan_names = snmp_walk(hostname, community, "1.3.6.1.4.1.9.9.46.1.3.1.1.4")
-
-        for idx, vid in vlan_ids.items():
-            try:
-                vid_int = int(vid)
-            except Exception:
-                continue
-            name = vlan_names.get(idx, f"VLAN{vid_int}")
-            vlan, _ = VLAN.objects.get_or_create(vid=vid_int, defaults={"name": name})
-            ScanFinding.objects.create(
-                run=run,
-                summary="VLAN discovered",
-                details={"vid": vlan.vid, "name": vlan.name}
-            )
-
-            if vlan.name != name:
-                vlan.name = name
-                vlan.save()
-            vlan_map[idx] = vlan
-        stats["vlans"] = len(vlan_map)
-        log_step(f"✅ Discovered {len(vlan_map)} VLANs.")
-    except Exception as e:
-        log_step(f"❌ Failed VLAN discovery: {e}")
+            def device_log(msg, host=host):
+                log_step(f"[{host}] {msg}")
 
-    # Step 4: VLAN assignments
-    try:
-        log_step("Walking SNMP for VLAN ↔ interface assignments...")
-        access_vlans = snmp_walk(hostname, community, "1.3.6.1.4.1.9.9.68.1.2.2.1.2")
-        trunk_vlans = snmp_walk(hostname, community, "1.3.6.1.4.1.9.9.46.1.6.1.1.4")
-
-        assignments = 0
-        for idx, vlan_id in access_vlans.items():
-            if_name = if_names.get(idx)
-            if not if_name:
+            progress.add(checked=1)
+            if "error" in snap:
+                stats["failed"] += 1
+                progress.add(failed=1)
+                device_log(f"❌ SNMP polling failed: {snap['error']}")
                 continue
+            phases.merge(snap["phases"])
             try:
-                vlan = VLAN.objects.get(vid=int(vlan_id))
-            except VLAN.DoesNotExist:
-                continue
-            iface = Interface.objects.filter(device=device, name=if_name).first()
-            if iface:
-                iface.mode = "access"
-                iface.untagged_vlan = vlan
-                iface.save()
-                assignments += 1
-
-        for idx, vlan_mask in trunk_vlans.items():
-            if_name = if_names.get(idx)
-            if not if_name:
+                device_stats = _apply_device(snap, run, device_log, fingerprints.get(host), phases=phases)
+            except Exception as e:
+                stats["failed"] += 1
+                progress.add(failed=1)
+                device_log(f"❌ Failed to save device: {e}")
                 continue
-            iface = Interface.objects.filter(device=device, name=if_name).first()
-            if not iface:
-                continue
-
-            iface.mode = "tagged"
-            enabled_vlans = []
-            try:
-                mask = int(vlan_mask)
-                for vid in range(1, 4095):
-                    if mask & (1 << (vid % 32)):
-                        try:
-                            vlan = VLAN.objects.get(vid=vid)
-                            enabled_vlans.append(vlan)
-                        except VLAN.DoesNotExist:
-                            continue
-            except Exception:
-                pass
-
-            if enabled_vlans:
-                iface.tagged_vlans.set(enabled_vlans)
-                iface.save()
-                assignments += 1
-
-        stats["assignments"] = assignments
-        log_step(f"✅ Assigned VLANs on {assignments} interfaces.")
-    except Exception as e:
-        log_step(f"❌ Failed VLAN assignment discovery: {e}")
+            stats["devices"] += 1
+            progress.add(alive=1)
+            name = snap["driver"].name
+            stats["drivers"][name] = stats["drivers"].get(name, 0) + 1
+            for key in ("interfaces", "vlans", "assignments", "failed_rows"):
+                stats[key] += device_stats[key]
+            if len(device_stats["skipped"]) == len(TABLES):
+                stats["unchanged"] += 1
+        log_step(f"✅ Polled {stats['devices']} devices, {stats['failed']} failed.")
+        if scheduler.adaptive:
+            stats["congestion"] = scheduler.summary()
 
     # Finalize
+    progress.flush()
+    if cache:
+        stats["snmp_cache"] = {"hits": cache.hits, "misses": cache.misses}
+    stats["phases"] = phases.as_dict()
+    run_log.flush()
     run.stats = stats
     run.finished = timezone.now()
     run.save()
@@ -0,0 +1,137 @@
+# netbox_autodiscovery/discovery/congestion.py
+import ipaddress
+import time
+
+
+class SubnetController:
+    """
+    AIMD in-flight window and RTT estimate for one target subnet.
+
+    The window starts at the ceiling, since most subnets are healthy and
+    an idle or dead one gives no signal to grow on. It is halved on loss,
+    at most once per smoothed RTT, then grows back by one per window's
+    worth of replies. The timeout follows RFC 6298
+    (srtt + 4 * rttvar), clamped to [min_timeout, max_timeout].
+    """
+
+    def __init__(self, initial_window: int = 256, min_window: int = 1, max_window: int = 256,
+                 initial_timeout: float = 1.0, min_timeout: float = 0.25, max_timeout: float = 3.0):
+        self.min_window = max(1, int(min_window))
+        self.max_window = max(self.min_window, int(max_window))
+        self.window = float(min(max(int(initial_window), self.min_window), self.max_window))
+        self.ssthresh = float(self.max_window)
+        self.initial_timeout = float(initial_timeout)
+        self.min_timeout = float(min_timeout)
+        self.max_timeout = max(self.min_timeout, float(max_timeout))
+        self.srtt = None
+        self.rttvar = None
+        self.in_flight = 0
+        self.replies = 0
+        self.losses = 0
+        self._last_cut = 0.0
+
+    def has_room(self) -> bool:
+        return self.in_flight < int(self.window)
+
+    def timeout(self) -> float:
+        if self.srtt is None:
+            return min(max(self.initial_timeout, self.min_timeout), self.max_timeout)
+        return min(max(self.srtt + 4 * self.rttvar, self.min_timeout), self.max_timeout)
+
+    def on_reply(self, rtt: float | None, lost: bool = False):
+        """
+        Record an answered request. rtt is None when it cannot be attributed
+        to one transmission; lost means an earlier transmission went unanswered.
+        """
+        self.replies += 1
+        if rtt is not None:
+            if self.srtt is None:
+                self.srtt, self.rttvar = rtt, rtt / 2
+            else:
+                self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+                self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        if lost:
+            self.on_loss()
+        elif self.window < self.ssthresh:
+            self.window = min(self.window + 1, self.max_window)
+        else:
+            self.window = min(self.window + 1 / self.window, self.max_window)
+
+    def on_loss(self):
+        self.losses += 1
+        now = time.monotonic()
+        # one cut per round trip: a burst of drops is a single congestion event
+        if now - self._last_cut < (self.srtt or self.initial_timeout):
+            return
+        self._last_cut = now
+        self.ssthresh = max(float(self.min_window), self.window / 2)
+        self.window = self.ssthresh
+
+
+class FixedController(SubnetController):
+    """Fixed timeout and no per-subnet window, for adaptive=False."""
+
+    def has_room(self) -> bool:
+        return True
+
+    def timeout(self) -> float:
+        return self.initial_timeout
+
+    def on_reply(self, rtt: float | None, lost: bool = False):
+        self.replies += 1
+        self.losses += bool(lost)
+
+
+class AdaptiveScheduler:
+    """
+    Hands out one SubnetController per /`prefix` of the targets, so a
+    congested WAN site slows down on its own while LAN subnets run at the
+    global ceilings (rate, max in-flight) of the engine using it.
+    """
+
+    def __init__(self, adaptive: bool = True, prefix: int = 24, **limits):
+        self.adaptive = adaptive
+        self.shift = 32 - int(prefix)
+        self.limits = limits
+        self.controllers = {}
+        self._fixed = FixedController(**limits)
+
+    @classmethod
+    def from_params(cls, params: dict, timeout: float, max_window: int) -> "AdaptiveScheduler":
+        """
+        Build a scheduler from scanner params. The configured timeout and
+        window are the ceilings; adaptive=False keeps them fixed.
+        """
+        return cls(
+            adaptive=params.get("adaptive", True) not in (False, "false", "0", 0),
+            prefix=int(params.get("adaptive_prefix") or 24),
+            initial_window=min(int(params.get("subnet_window") or max_window), max_window),
+            max_window=max_window,
+            initial_timeout=timeout,
+            min_timeout=min(float(params.get("min_timeout") or 0.25), timeout),
+            max_timeout=timeout,
+        )
+
+    def controller(self, host: str) -> SubnetController:
+        if not self.adaptive:
+            return self._fixed
+        try:
+            key = int(ipaddress.IPv4Address(host)) >> self.shift
+        except ValueError:
+            key = host  # hostnames get a controller of their own
+        ctl = self.controllers.get(key)
+        if ctl is None:
+            ctl = self.controllers[key] = SubnetController(**self.limits)
+        return ctl
+
+    def summary(self) -> dict:
+        controllers = list(self.controllers.values()) or [self._fixed]
+        replies = sum(c.replies for c in controllers)
+        losses = sum(c.losses for c in controllers)
+        rtts = [c.srtt for c in controllers if c.srtt is not None]
+        return {
+            "subnets": len(self.controllers),
+            "avg_window": round(sum(c.window for c in controllers) / len(controllers), 1),
+            "avg_rtt_ms": round(sum(rtts) / len(rtts) * 1000, 2) if rtts else None,
+            "loss_pct": round(losses / replies * 100, 2) if replies else 0.0,
+        }
@@ -0,0 +1,414 @@
+# netbox_autodiscovery/discovery/dns_resolver.py
+import os
+import queue
+import random
+import select
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+DNS_PORT = 53
+TYPE_PTR = 12
+TYPE_SOA = 6
+RCODE_NXDOMAIN = 3
+
+NEGATIVE_TTL = 300
+MIN_TTL = 30
+MAX_TTL = 86400
+
+
+# ---------------------------
+# Cache
+# ---------------------------
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire after their own TTL."""
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return (found, value)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def get_many(self, keys) -> dict:
+        """{key: value} of the keys that were found."""
+        found = {}
+        for key in keys:
+            hit, value = self.get(key)
+            if hit:
+                found[key] = value
+        return found
+
+    def set(self, key, value, ttl: float):
+        ttl = min(max(ttl, MIN_TTL), MAX_TTL)
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class RedisTTLCache:
+    """
+    PTR answers and NXDOMAINs in the RQ Redis, in front of a process-local
+    TTLCache. RQ forks a work horse per job, so only this level outlives a
+    run. An NXDOMAIN is stored as an empty value. Redis errors count as
+    misses: the cache never fails a scan.
+    """
+
+    prefix = "autodiscovery:ptr:"
+
+    def __init__(self, connection, local: TTLCache):
+        self.connection = connection
+        self.local = local
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return (found, value)."""
+        found = self.get_many([key])
+        return key in found, found.get(key)
+
+    def get_many(self, keys) -> dict:
+        """{key: value} of the keys that were found; one MGET for all local misses."""
+        found, missing = {}, []
+        for key in keys:
+            hit, value = self.local.get(key)
+            if hit:
+                found[key] = value
+            else:
+                missing.append(key)
+        if missing:
+            try:
+                raws = self.connection.mget([self.prefix + key for key in missing])
+            except Exception:
+                raws = []
+            for key, raw in zip(missing, raws):
+                if raw is not None:
+                    found[key] = raw.decode() or None
+                    self.local.set(key, found[key], MIN_TTL)
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set(self, key, value, ttl: float):
+        ttl = min(max(ttl, MIN_TTL), MAX_TTL)
+        self.local.set(key, value, ttl)
+        try:
+            self.connection.set(self.prefix + key, value or "", ex=int(ttl))
+        except Exception:
+            pass
+
+
+# PTR answers and NXDOMAINs of this worker process. RQ forks a work horse
+# per job, so on its own it only helps within a run; see get_ptr_cache.
+ptr_cache = TTLCache()
+_redis_cache = None
+
+
+def get_ptr_cache():
+    """
+    The cache configured by the `dns_cache` plugin setting: "redis" (the
+    default queue's connection, shared by all runs and workers) or
+    "memory" (this process only).
+    """
+    global _redis_cache
+    from netbox.plugins import get_plugin_config
+
+    if get_plugin_config("netbox_autodiscovery", "dns_cache") != "redis":
+        return ptr_cache
+    if _redis_cache is None:
+        from django_rq import get_connection
+        _redis_cache = RedisTTLCache(get_connection("default"), ptr_cache)
+    return _redis_cache
+
+
+# ---------------------------
+# Wire format
+# ---------------------------
+
+def _ptr_name(ip: str) -> str:
+    return ".".join(reversed(ip.split("."))) + ".in-addr.arpa"
+
+
+def build_ptr_query(qid: int, ip: str) -> bytes:
+    header = struct.pack("!HHHHHH", qid, 0x0100, 1, 0, 0, 0)  # RD set, one question
+    qname = b"".join(bytes([len(label)]) + label.encode() for label in _ptr_name(ip).split("."))
+    return header + qname + b"\x00" + struct.pack("!HH", TYPE_PTR, 1)
+
+
+def _read_name(msg: bytes, offset: int) -> tuple[str, int]:
+    labels = []
+    end = None
+    for _ in range(128):  # bound pointer chains
+        length = msg[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | msg[offset + 1]
+            continue
+        if length == 0:
+            offset += 1
+            break
+        labels.append(msg[offset + 1:offset + 1 + length].decode("ascii", "replace"))
+        offset += 1 + length
+    return ".".join(labels), end if end is not None else offset
+
+
+def parse_ptr_response(msg: bytes):
+    """
+    Parse a PTR response. Returns (qid, hostname or None, ttl, definitive);
+    definitive is False for server failures that should be retried.
+    """
+    qid, flags, qdcount, ancount, nscount, _ = struct.unpack("!HHHHHH", msg[:12])
+    rcode = flags & 0x0F
+    offset = 12
+    for _ in range(qdcount):
+        _, offset = _read_name(msg, offset)
+        offset += 4
+
+    for _ in range(ancount):
+        _, offset = _read_name(msg, offset)
+        rtype, _, ttl, rdlength = struct.unpack("!HHIH", msg[offset:offset + 10])
+        offset += 10
+        if rtype == TYPE_PTR:
+            hostname, _ = _read_name(msg, offset)
+            return qid, hostname.rstrip(".") or None, ttl, True
+        offset += rdlength
+
+    if rcode not in (0, RCODE_NXDOMAIN):
+        return qid, None, 0, False
+
+    # negative answer: cache for the SOA minimum (RFC 2308)
+    ttl = NEGATIVE_TTL
+    for _ in range(nscount):
+        _, offset = _read_name(msg, offset)
+        rtype, _, rr_ttl, rdlength = struct.unpack("!HHIH", msg[offset:offset + 10])
+        offset += 10
+        if rtype == TYPE_SOA and rdlength >= 4:
+            minimum = struct.unpack("!I", msg[offset + rdlength - 4:offset + rdlength])[0]
+            ttl = min(rr_ttl, minimum)
+        offset += rdlength
+    return qid, None, ttl, True
+
+
+def system_nameservers(path: str = "/etc/resolv.conf") -> list[str]:
+    servers = []
+    try:
+        with open(path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver" and ":" not in parts[1]:
+                    servers.append(parts[1])
+    except OSError:
+        pass
+    return servers
+
+
+# ---------------------------
+# Resolvers
+# ---------------------------
+
+def _server_address(server) -> tuple[str, int]:
+    """("10.0.0.53", 53) for a "host" or "host:port" nameserver entry, resolving host names."""
+    host, _, port = str(server).partition(":")
+    port = int(port or DNS_PORT)
+    try:
+        infos = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_DGRAM)
+    except socket.gaierror as e:
+        raise ValueError(f"Cannot resolve DNS server {host}: {e}")
+    return infos[0][4][:2]
+
+
+class PtrResolver:
+    """
+    Long-lived PTR resolver: one UDP socket and one background thread send
+    queries straight to the configured servers and match answers by query
+    id. resolve() returns a Future, so lookups overlap with the caller's work;
+    the cache is read on the background thread too, once per batch of new
+    requests. A query that times out is retried on the next server.
+    `lookup_timeout` bounds how long a Future can stay pending. `queries` and
+    `bytes` (sent and received) only ever grow; callers take deltas.
+    """
+
+    def __init__(self, servers, timeout: float = 2.0, retries: int = 1, cache=ptr_cache):
+        # "10.0.0.53", "127.0.0.1:5353" or "ns1.example.net"; replies are matched
+        # by source address, so names are resolved to addresses once, here
+        self.servers = [_server_address(s) for s in servers]
+        self.timeout = timeout
+        self.retries = retries
+        self.lookup_timeout = timeout * (retries + len(self.servers))
+        self.cache = cache
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self._requests = queue.SimpleQueue()
+        self._inflight = {}   # qid -> [ip, attempt, deadline]
+        self._waiters = {}    # ip -> [Future, ...]
+        self.queries = 0
+        self.bytes = 0
+        thread = threading.Thread(target=self._loop, name="ptr-resolver", daemon=True)
+        thread.start()
+
+    def resolve(self, ip: str) -> Future:
+        fut = Future()
+        self._requests.put((ip, fut))
+        os.write(self._wake_w, b"\x00")
+        return fut
+
+    def _send(self, ip: str, attempt: int):
+        qid = random.randrange(0x10000)
+        while qid in self._inflight:
+            qid = random.randrange(0x10000)
+        server = self.servers[attempt % len(self.servers)]
+        try:
+            self.bytes += self.sock.sendto(build_ptr_query(qid, ip), server)
+            self.queries += 1
+        except OSError:
+            pass
+        self._inflight[qid] = [ip, attempt, time.monotonic() + self.timeout]
+
+    def _finish(self, ip: str, hostname):
+        for fut in self._waiters.pop(ip, []):
+            fut.set_result(hostname)
+
+    def _loop(self):
+        while True:
+            # new requests, de-duplicated per address; cached ones are answered
+            # straight away, the rest are sent
+            new = []
+            while True:
+                try:
+                    ip, fut = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if ip not in self._waiters:
+                    self._waiters[ip] = []
+                    new.append(ip)
+                self._waiters[ip].append(fut)
+            if new:
+                cached = self.cache.get_many(new)
+                for ip in new:
+                    if ip in cached:
+                        self._finish(ip, cached[ip])
+                    else:
+                        self._send(ip, 0)
+
+            wait = None
+            if self._inflight:
+                wait = max(0.0, min(d for _, _, d in self._inflight.values()) - time.monotonic())
+            readable, _, _ = select.select([self.sock, self._wake_r], [], [], wait)
+            if self._wake_r in readable:
+                try:
+                    os.read(self._wake_r, 4096)
+                except BlockingIOError:
+                    pass
+
+            if self.sock in readable:
+                while True:
+                    try:
+                        msg, addr = self.sock.recvfrom(4096)
+                    except (BlockingIOError, InterruptedError, OSError):
+                        break
+                    self.bytes += len(msg)
+                    try:
+                        qid, hostname, ttl, definitive = parse_ptr_response(msg)
+                    except Exception:
+                        continue
+                    entry = self._inflight.get(qid)
+                    if entry is None or addr[:2] not in self.servers:
+                        continue
+                    del self._inflight[qid]
+                    if definitive:
+                        self.cache.set(entry[0], hostname, ttl)
+                        self._finish(entry[0], hostname)
+                    else:
+                        self._retry_or_fail(entry)
+
+            now = time.monotonic()
+            for qid in [q for q, (_, _, d) in self._inflight.items() if d <= now]:
+                self._retry_or_fail(self._inflight.pop(qid))
+
+    def _retry_or_fail(self, entry):
+        ip, attempt, _ = entry
+        if attempt < self.retries + len(self.servers) - 1:
+            self._send(ip, attempt + 1)
+        else:
+            self._finish(ip, None)
+
+
+class SystemResolver:
+    """Fallback when no nameserver is known: gethostbyaddr on a persistent pool."""
+
+    def __init__(self, workers: int = 16, timeout: float = 2.0, cache=ptr_cache):
+        self.cache = cache
+        # gethostbyaddr has no timeout of its own; callers stop waiting after this
+        self.lookup_timeout = timeout * 2
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ptr-system")
+        self.queries = 0
+        self.bytes = 0  # not visible through gethostbyaddr
+
+    def _lookup(self, ip: str):
+        found, hostname = self.cache.get(ip)
+        if found:
+            return hostname
+        self.queries += 1
+        try:
+            hostname = socket.gethostbyaddr(ip)[0]
+        except (socket.herror, socket.gaierror):
+            hostname = None
+        except Exception:
+            return None
+        self.cache.set(ip, hostname, NEGATIVE_TTL)
+        return hostname
+
+    def resolve(self, ip: str) -> Future:
+        # the cache is read on the pool as well, never on the caller's thread
+        return self.pool.submit(self._lookup, ip)
+
+
+_resolvers = {}
+_resolvers_lock = threading.Lock()
+
+
+def get_resolver(servers=None, timeout: float = 2.0):
+    """
+    Return the process-wide resolver for these servers, creating it once.
+    servers: list or comma-separated string of "host" or "host:port";
+    defaults to /etc/resolv.conf.
+    """
+    if isinstance(servers, str):
+        servers = servers.replace(",", " ").split()
+    servers = tuple(servers or system_nameservers())
+    key = (servers, timeout)
+    with _resolvers_lock:
+        resolver = _resolvers.get(key)
+        if resolver is None:
+            cache = get_ptr_cache()
+            resolver = (
+                PtrResolver(servers, timeout=timeout, cache=cache) if servers
+                else SystemResolver(timeout=timeout, cache=cache)
+            )
+            _resolvers[key] = resolver
+        return resolver
@@ -0,0 +1,303 @@
+# netbox_autodiscovery/discovery/drivers.py
+from collections import defaultdict
+from .fingerprint import TABLE_MARKERS, TABLES
+from .snmp_helpers import oid_tuple
+from .vlan_bitmap import TRUNK_BITMAP_OFFSETS, decode_trunk_table, decode_vlan_bitmap
+
+
+# Fetched from every device, whatever its vendor
+SYSTEM_OIDS = {
+    "sysname": "1.3.6.1.2.1.1.5.0",         # sysName
+    "sysdescr": "1.3.6.1.2.1.1.1.0",        # sysDescr
+    "sys_object_id": "1.3.6.1.2.1.1.2.0",   # sysObjectID
+}
+
+IF_COLUMNS = {
+    "name": "1.3.6.1.2.1.31.1.1.1.1",   # ifName
+    "type": "1.3.6.1.2.1.2.2.1.3",      # ifType
+    "admin": "1.3.6.1.2.1.2.2.1.7",     # ifAdminStatus
+    "oper": "1.3.6.1.2.1.2.2.1.8",      # ifOperStatus
+}
+
+
+# ---------------------------
+# sysObjectID prefix trie
+# ---------------------------
+
+class OidTrie:
+    """Maps OID prefixes to values; lookups return the longest matching prefix."""
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, prefix: str, value):
+        node = self.root
+        for arc in oid_tuple(prefix):
+            node = node.setdefault(arc, {})
+        node[None] = value
+
+    def longest(self, oid: str | None):
+        if not oid:
+            return None
+        try:
+            arcs = oid_tuple(oid)
+        except ValueError:
+            return None
+        node, found = self.root, self.root.get(None)
+        for arc in arcs:
+            node = node.get(arc)
+            if node is None:
+                break
+            found = node.get(None, found)
+        return found
+
+
+# ---------------------------
+# Vendor profiles
+# ---------------------------
+
+class VendorProfile:
+    """
+    Declarative description of what to fetch from one kind of device.
+
+    `tables` lists the columns of each walked table ({table: {column: oid}});
+    the scanner walks the columns of all tables it needs in one GETBULK
+    stream, so a profile never costs more round trips than its longest
+    table. `system` and `fingerprint` are extra scalars fetched with the
+    system GET, `markers` says which fingerprint values invalidate which
+    table (see fingerprint.plan_walks) and `binary` names the columns kept
+    as raw OCTET STRING bytes. Subclasses turn the walked rows into VLAN
+    names and port assignments.
+    """
+
+    name = "generic"
+    manufacturer = "Generic"
+    device_type = "Generic Switch"
+    sys_object_ids = ()
+    system = {}
+    fingerprint = {}
+    markers = TABLE_MARKERS
+    tables = {"interfaces": IF_COLUMNS}
+    binary = ()
+
+    @property
+    def scalars(self) -> dict:
+        return {**self.system, **self.fingerprint}
+
+    def columns(self, walks) -> dict:
+        """Columns of the tables in `walks`, namespaced as "table.column"."""
+        return {
+            f"{table}.{col}": oid
+            for table, cols in self.tables.items() if table in walks
+            for col, oid in cols.items()
+        }
+
+    def binary_columns(self, walks) -> set:
+        return {f"{table}.{col}" for table, col in self.binary if table in walks}
+
+    def split(self, rows: dict, walks) -> dict:
+        """
+        Split the rows of a combined walk back into one table per name:
+        {"interfaces": {idx: {col: val}}, ...}. Tables that were not
+        walked, or that the profile does not have, are None.
+        """
+        tables = {table: ({} if table in walks and table in self.tables else None) for table in TABLES}
+        for idx, row in rows.items():
+            for key, val in row.items():
+                table, col = key.split(".", 1)
+                tables[table].setdefault(idx, {})[col] = val
+        return tables
+
+    def vlan_names(self, vlans: dict) -> dict[int, str]:
+        """{vid: name} from the walked VLAN table."""
+        return {}
+
+    def assignments(self, ports: dict) -> tuple[dict, dict]:
+        """({ifIndex: access vid}, {ifIndex: {trunk vid, ...}}) from the walked port table."""
+        return {}, {}
+
+
+class CiscoProfile(VendorProfile):
+    """IOS/IOS-XE/NX-OS switches: CISCO-VTP-MIB and CISCO-VLAN-MEMBERSHIP-MIB."""
+
+    name = "cisco"
+    manufacturer = "Cisco"
+    device_type = "Generic Cisco Switch"
+    sys_object_ids = ("1.3.6.1.4.1.9",)
+    system = {
+        "serial": "1.3.6.1.4.1.9.3.6.3",                        # chassisId (OLD-CISCO-CHASSIS-MIB)
+    }
+    fingerprint = {
+        "vtp_revision": "1.3.6.1.4.1.9.9.46.1.2.1.1.4.1",       # managementDomainConfigRevNumber
+        "vtp_last_change": "1.3.6.1.4.1.9.9.46.1.2.1.1.6.1",    # managementDomainLastChange
+    }
+    markers = {
+        "interfaces": ("if_last_change",),
+        "vlans": ("vtp_revision", "vtp_last_change"),
+        "ports": ("if_last_change", "vtp_revision", "vtp_last_change"),
+    }
+    tables = {
+        "interfaces": IF_COLUMNS,
+        # vtpVlanTable rows are indexed by <managementDomain>.<vlanId>
+        "vlans": {
+            "state": "1.3.6.1.4.1.9.9.46.1.3.1.1.2",            # vtpVlanState
+            "name": "1.3.6.1.4.1.9.9.46.1.3.1.1.4",             # vtpVlanName
+        },
+        "ports": {
+            "access": "1.3.6.1.4.1.9.9.68.1.2.2.1.2",           # vmVlan
+            "trunk_status": "1.3.6.1.4.1.9.9.46.1.6.1.1.14",    # vlanTrunkPortDynamicStatus
+            "trunk": "1.3.6.1.4.1.9.9.46.1.6.1.1.4",            # vlanTrunkPortVlansEnabled
+            "trunk2k": "1.3.6.1.4.1.9.9.46.1.6.1.1.17",         # vlanTrunkPortVlansEnabled2k
+            "trunk3k": "1.3.6.1.4.1.9.9.46.1.6.1.1.18",         # vlanTrunkPortVlansEnabled3k
+            "trunk4k": "1.3.6.1.4.1.9.9.46.1.6.1.1.19",         # vlanTrunkPortVlansEnabled4k
+        },
+    }
+    binary = tuple(("ports", col) for col in TRUNK_BITMAP_OFFSETS)
+
+    def vlan_names(self, vlans: dict) -> dict[int, str]:
+        names = {}
+        for suffix, row in vlans.items():
+            try:
+                vid = int(suffix.split(".")[-1])
+            except ValueError:
+                continue
+            names[vid] = row.get("name") or f"VLAN{vid}"
+        return names
+
+    def assignments(self, ports: dict) -> tuple[dict, dict]:
+        access = {}
+        for idx, row in ports.items():
+            try:
+                access[idx] = int(row["access"])
+            except (KeyError, ValueError):
+                continue
+        trunks = {
+            idx: vids for idx, vids in decode_trunk_table(ports).items()
+            # vlanTrunkPortDynamicStatus: 1 = trunking, 2 = notTrunking
+            if ports[idx].get("trunk_status", "1") == "1"
+        }
+        return access, trunks
+
+
+class QBridgeProfile(VendorProfile):
+    """
+    Standard Q-BRIDGE-MIB (RFC 4363) switches. The VLAN table is indexed by
+    VLAN id and its PortLists have one bit per bridge port; dot1qPvid is
+    indexed by bridge port and dot1dBasePortIfIndex maps those to ifIndex.
+    No scalar marks VLAN changes, so VLANs and ports are walked every run.
+    """
+
+    name = "qbridge"
+    manufacturer = "Generic"
+    device_type = "Generic Q-BRIDGE Switch"
+    system = {
+        "serial": "1.3.6.1.2.1.47.1.1.1.1.11.1",    # entPhysicalSerialNum of the chassis
+    }
+    tables = {
+        "interfaces": IF_COLUMNS,
+        "vlans": {
+            "name": "1.3.6.1.2.1.17.7.1.4.3.1.1",           # dot1qVlanStaticName
+        },
+        "ports": {
+            "ifindex": "1.3.6.1.2.1.17.1.4.1.2",            # dot1dBasePortIfIndex
+            "pvid": "1.3.6.1.2.1.17.7.1.4.5.1.1",           # dot1qPvid
+            "egress": "1.3.6.1.2.1.17.7.1.4.3.1.2",         # dot1qVlanStaticEgressPorts
+            "untagged": "1.3.6.1.2.1.17.7.1.4.3.1.4",       # dot1qVlanStaticUntaggedPorts
+        },
+    }
+    binary = (("ports", "egress"), ("ports", "untagged"))
+
+    def vlan_names(self, vlans: dict) -> dict[int, str]:
+        names = {}
+        for suffix, row in vlans.items():
+            try:
+                vid = int(suffix)
+            except ValueError:
+                continue
+            names[vid] = row.get("name") or f"VLAN{vid}"
+        return names
+
+    def assignments(self, ports: dict) -> tuple[dict, dict]:
+        # rows carry bridge port columns (ifindex, pvid) and VLAN columns
+        # (egress, untagged) side by side: the index means port or vid
+        if_index = {idx: row["ifindex"] for idx, row in ports.items() if row.get("ifindex")}
+        egress, tagged = defaultdict(set), set()
+        for suffix, row in ports.items():
+            if not isinstance(row.get("egress"), (bytes, bytearray)):
+                continue
+            try:
+                vid = int(suffix)
+            except ValueError:
+                continue
+            # PortList: the most significant bit of the first octet is bridge port 1
+            untagged = decode_vlan_bitmap(row.get("untagged") or b"", 1)
+            for port in decode_vlan_bitmap(row["egress"], 1):
+                ifidx = if_index.get(str(port))
+                if ifidx is None:
+                    continue
+                egress[ifidx].add(vid)
+                if port not in untagged:
+                    tagged.add(ifidx)
+
+        trunks = {ifidx: vids for ifidx, vids in egress.items() if ifidx in tagged}
+        access = {}
+        for port, ifidx in if_index.items():
+            try:
+                access[ifidx] = int(ports[port]["pvid"])
+            except (KeyError, ValueError):
+                continue
+        return access, trunks
+
+
+class AristaProfile(QBridgeProfile):
+    name = "arista"
+    manufacturer = "Arista"
+    device_type = "Generic Arista Switch"
+    sys_object_ids = ("1.3.6.1.4.1.30065",)
+
+
+class JuniperProfile(QBridgeProfile):
+    """Junos ELS switches, whose Q-BRIDGE tables are indexed by VLAN id."""
+
+    name = "juniper"
+    manufacturer = "Juniper"
+    device_type = "Generic Juniper Switch"
+    sys_object_ids = ("1.3.6.1.4.1.2636",)
+    system = {
+        "serial": "1.3.6.1.4.1.2636.3.1.3.0",       # jnxBoxSerialNo
+    }
+
+
+# ---------------------------
+# Registry
+# ---------------------------
+
+DRIVERS = {}
+DEFAULT_DRIVER = "qbridge"
+_by_object_id = OidTrie()
+
+
+def register(profile: VendorProfile):
+    DRIVERS[profile.name] = profile
+    for prefix in profile.sys_object_ids:
+        _by_object_id.insert(prefix, profile)
+    return profile
+
+
+def get_driver(name: str | None) -> VendorProfile | None:
+    """The registered profile called `name`; raises ValueError for unknown names."""
+    if not name or name == "auto":
+        return None
+    try:
+        return DRIVERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown driver {name}; choose from auto, {', '.join(DRIVERS)}")
+
+
+def detect(sys_object_id: str | None) -> VendorProfile:
+    """Pick the profile registered for the longest prefix of sysObjectID."""
+    return _by_object_id.longest(sys_object_id) or DRIVERS[DEFAULT_DRIVER]
+
+
+for _profile in (VendorProfile(), QBridgeProfile(), CiscoProfile(), AristaProfile(), JuniperProfile()):
+    register(_profile)
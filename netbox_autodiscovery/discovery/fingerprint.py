@@ -0,0 +1,58 @@
+# netbox_autodiscovery/discovery/fingerprint.py
+import hashlib
+import time
+
+
+# Cheap scalars fetched with the system info GET on every run; vendor
+# profiles add their own markers (see drivers.VendorProfile.fingerprint)
+FINGERPRINT_OIDS = {
+    "uptime": "1.3.6.1.2.1.1.3.0",                          # sysUpTime
+    "if_last_change": "1.3.6.1.2.1.31.1.5.0",               # ifTableLastChange
+}
+
+TABLES = ("interfaces", "vlans", "ports")
+
+# Which change markers invalidate which walked tables; None means the table
+# has no marker and is walked on every run
+TABLE_MARKERS = {
+    "interfaces": ("if_last_change",),
+    "vlans": None,
+    "ports": None,
+}
+
+
+def table_hash(table: dict) -> str:
+    """Stable digest of a walked table, to detect unchanged data cheaply."""
+    return hashlib.sha1(repr(sorted(table.items())).encode()).hexdigest()
+
+
+def _ticks(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def plan_walks(previous: dict | None, probe: dict, full_rescan_hours: float = 24, force: bool = False,
+               markers: dict = TABLE_MARKERS) -> set:
+    """
+    Decide which tables have to be walked again.
+
+    Everything is walked on the first run, when forced, after a reboot
+    (sysUpTime went backwards) and once every `full_rescan_hours`, because
+    some changes (e.g. admin status, access VLAN) move none of the markers.
+    Otherwise only tables whose change markers moved are walked.
+    `markers` is the vendor profile's {table: marker keys}.
+    """
+    if force or not previous:
+        return set(TABLES)
+    if time.time() - previous.get("full_at", 0) > full_rescan_hours * 3600:
+        return set(TABLES)
+    uptime, last_uptime = _ticks(probe.get("uptime")), _ticks(previous.get("uptime"))
+    if uptime is None or last_uptime is None or uptime < last_uptime:
+        return set(TABLES)
+
+    return {
+        table for table, keys in markers.items()
+        if keys is None or any(probe.get(m) != previous.get(m) for m in keys)
+    }
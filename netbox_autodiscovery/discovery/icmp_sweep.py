@@ -0,0 +1,99 @@
+# netbox_autodiscovery/discovery/icmp_sweep.py
+import os
+import socket
+import struct
+import time
+from .packet_sweep import PacketSweeper, ProbeUnavailable
+
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+
+class IcmpNotPermitted(ProbeUnavailable):
+    """Raised when neither a raw nor an unprivileged ICMP socket can be opened."""
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _echo_packet(ident: int, seq: int) -> bytes:
+    payload = struct.pack("!d", time.monotonic()) + b"netbox-autodiscovery"
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    csum = _checksum(header + payload)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, csum, ident, seq) + payload
+
+
+def open_icmp_socket() -> tuple[socket.socket, bool]:
+    """
+    Open an ICMP socket for the sweeper.
+    Tries a raw socket first (needs CAP_NET_RAW), then the unprivileged
+    datagram socket (Linux, net.ipv4.ping_group_range).
+    Returns (sock, is_raw).
+    """
+    for sock_type, is_raw in ((socket.SOCK_RAW, True), (socket.SOCK_DGRAM, False)):
+        try:
+            sock = socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP)
+        except (PermissionError, OSError):
+            continue
+        sock.setblocking(False)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        except OSError:
+            pass
+        return sock, is_raw
+    raise IcmpNotPermitted("raw and datagram ICMP sockets are not permitted")
+
+
+class IcmpSweeper(PacketSweeper):
+    """
+    Single-socket ICMP echo sweeper.
+
+    Echo replies are matched back to hosts by source address +
+    identifier/sequence; pacing, windowing and retries come from
+    PacketSweeper.
+    """
+
+    def __init__(self, rate: int = 2000, timeout: float = 1.0, retries: int = 1,
+                 max_inflight: int = 4096, scheduler=None):
+        sock, self.is_raw = open_icmp_socket()
+        super().__init__(sock, rate=rate, timeout=timeout, retries=retries, max_inflight=max_inflight,
+                         scheduler=scheduler)
+        self.ident = os.getpid() & 0xFFFF
+
+    def _transmit(self, ip: str, seq: int) -> int:
+        return self.sock.sendto(_echo_packet(self.ident, seq), (ip, 0))
+
+    def _read_replies(self, pending: dict) -> list:
+        alive = []
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                break
+            if self.is_raw:
+                if len(data) < 20:
+                    continue
+                data = data[(data[0] & 0x0F) * 4:]
+            if len(data) < 8:
+                continue
+            icmp_type, _, _, ident, seq = struct.unpack("!BBHHH", data[:8])
+            if icmp_type != ICMP_ECHO_REPLY:
+                continue
+            # the kernel rewrites the identifier on unprivileged sockets
+            if self.is_raw and ident != self.ident:
+                continue
+            probe = pending.get(addr[0])
+            if probe is None or seq not in probe.seqs:
+                continue
+            del pending[addr[0]]
+            alive.append((probe, seq))
+        return alive
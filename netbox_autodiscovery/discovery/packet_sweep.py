@@ -0,0 +1,211 @@
+# netbox_autodiscovery/discovery/packet_sweep.py
+import errno
+import heapq
+import itertools
+import select
+import time
+from collections import deque
+from typing import Iterable, Iterator
+from .congestion import AdaptiveScheduler, SubnetController
+
+
+class ProbeUnavailable(Exception):
+    """Raised when a probe cannot run in this worker (permissions, topology)."""
+
+
+class _Probe:
+    __slots__ = ("ip", "ctl", "seqs", "last_seq", "attempts", "deadline")
+
+    def __init__(self, ip: str, ctl: SubnetController):
+        self.ip = ip
+        self.ctl = ctl
+        self.seqs = {}  # seq -> send time
+        self.last_seq = None
+        self.attempts = 0
+        self.deadline = 0.0
+
+
+class PacketSweeper:
+    """
+    Rate-paced, single-socket sweep loop shared by the packet probes.
+
+    Requests are paced by a token bucket (`rate` packets/s), at most
+    `max_inflight` hosts are outstanding at once, and subclasses match
+    replies back to hosts in `_read_replies`. A host that does not answer
+    in time is re-probed up to `retries` times.
+
+    Within those ceilings an AdaptiveScheduler gives every target subnet
+    its own in-flight window and timeout, learned from the RTTs and drops
+    seen there. Hosts of a subnet whose window is full are parked while
+    the sweep moves on to the next subnets of the range.
+
+    `packets` and `bytes_sent` count what went out on the socket.
+    """
+
+    def __init__(self, sock, rate: int = 2000, timeout: float = 1.0, retries: int = 1,
+                 max_inflight: int = 4096, scheduler: AdaptiveScheduler | None = None):
+        self.sock = sock
+        self.rate = max(1, int(rate))
+        self.timeout = float(timeout)
+        self.retries = max(0, int(retries))
+        self.max_inflight = max(1, int(max_inflight))
+        self.scheduler = scheduler or AdaptiveScheduler(adaptive=False, initial_timeout=self.timeout)
+        self._seq = 0
+        self.packets = 0
+        self.bytes_sent = 0
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _next_seq(self) -> int:
+        self._seq = (self._seq + 1) & 0xFFFF
+        return self._seq
+
+    def _transmit(self, ip: str, seq: int) -> int:
+        """Send one request and return the bytes sent; raise OSError like socket.sendto."""
+        raise NotImplementedError
+
+    def _read_replies(self, pending: dict) -> list[tuple[_Probe, int | None]]:
+        """
+        Drain the socket, removing answered hosts from `pending`.
+        Returns (probe, seq) pairs; seq is None when replies carry none.
+        """
+        raise NotImplementedError
+
+    def _send(self, probe: _Probe, now: float) -> bool:
+        seq = self._next_seq()
+        try:
+            self.bytes_sent += self._transmit(probe.ip, seq) or 0
+            self.packets += 1
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK, errno.ENOBUFS):
+                return False
+            # unreachable / invalid destination: count it as a spent attempt
+        probe.seqs[seq] = now
+        probe.last_seq = seq
+        probe.attempts += 1
+        probe.deadline = now + probe.ctl.timeout()
+        return True
+
+    @staticmethod
+    def _answered(probe: _Probe, seq: int | None, now: float):
+        """Feed one reply to the probe's subnet controller."""
+        ctl = probe.ctl
+        ctl.in_flight -= 1
+        if seq is None:
+            # without a sequence number only a first attempt has a clean RTT
+            ctl.on_reply(now - probe.seqs[probe.last_seq] if probe.attempts == 1 else None)
+            return
+        # the latest transmission answered after earlier ones went unanswered:
+        # those were dropped on the way. An older seq answering means the
+        # timeout was too short, which the RTT sample corrects.
+        lost = probe.attempts > 1 and seq == probe.last_seq
+        ctl.on_reply(now - probe.seqs[seq], lost=lost)
+
+    def sweep(self, hosts: Iterable[str]) -> Iterator[tuple[str, bool]]:
+        """Probe hosts lazily, yielding (ip, alive) as soon as each is decided."""
+        hosts = iter(hosts)
+        pending: dict[str, _Probe] = {}
+        retry_queue: deque = deque()
+        deadlines: list = []  # heap of (deadline, n, probe)
+        order = itertools.count()
+        parked: dict = {}     # controller -> deque of hosts waiting for window room
+        parked_count = 0
+        exhausted = False
+        tokens = 0.0
+        last = time.monotonic()
+
+        def next_fresh():
+            nonlocal exhausted, parked_count
+            for ctl, waiting in parked.items():
+                if ctl.has_room():
+                    ip = waiting.popleft()
+                    if not waiting:
+                        del parked[ctl]
+                    parked_count -= 1
+                    return ip, ctl
+            while not exhausted and parked_count < self.max_inflight:
+                ip = next(hosts, None)
+                if ip is None:
+                    exhausted = True
+                    break
+                if ip in pending:
+                    continue
+                ctl = self.scheduler.controller(ip)
+                if ctl.has_room():
+                    return ip, ctl
+                parked.setdefault(ctl, deque()).append(ip)
+                parked_count += 1
+            return None, None
+
+        while True:
+            now = time.monotonic()
+            tokens = min(float(self.rate), tokens + (now - last) * self.rate)
+            last = now
+
+            # 1. send: retries first, then fresh hosts
+            fresh_blocked = False
+            while tokens >= 1:
+                if retry_queue:
+                    probe = retry_queue[0]
+                elif len(pending) < self.max_inflight:
+                    ip, ctl = next_fresh()
+                    if ip is None:
+                        fresh_blocked = True
+                        break
+                    probe = _Probe(ip, ctl)
+                    pending[ip] = probe
+                    ctl.in_flight += 1
+                    retry_queue.append(probe)
+                else:
+                    break
+                if not self._send(probe, now):
+                    break
+                retry_queue.popleft()
+                heapq.heappush(deadlines, (probe.deadline, next(order), probe))
+                tokens -= 1
+
+            if exhausted and not pending and not parked:
+                return
+
+            # 2. wait for replies until the next send slot or deadline
+            wait = self.timeout
+            if deadlines:
+                wait = min(wait, max(0.0, deadlines[0][0] - now))
+            if retry_queue or (not fresh_blocked and len(pending) < self.max_inflight):
+                wait = min(wait, max(0.0, (1 - tokens) / self.rate))
+            readable, _, _ = select.select([self.sock], [], [], wait)
+            decided = []
+            if readable:
+                now = time.monotonic()
+                for probe, seq in self._read_replies(pending):
+                    self._answered(probe, seq, now)
+                    decided.append((probe.ip, True))
+
+            # 3. expire probes whose deadline passed. The consumer may have
+            # held this generator between yields (DNS, DB writes), so replies
+            # that queued up meanwhile are read first: they are not losses.
+            now = time.monotonic()
+            if deadlines and deadlines[0][0] <= now:
+                for probe, seq in self._read_replies(pending):
+                    self._answered(probe, seq, now)
+                    decided.append((probe.ip, True))
+            while deadlines and deadlines[0][0] <= now:
+                deadline, _, probe = heapq.heappop(deadlines)
+                if pending.get(probe.ip) is not probe or probe.deadline != deadline:
+                    continue
+                if probe.attempts <= self.retries:
+                    retry_queue.append(probe)
+                else:
+                    del pending[probe.ip]
+                    probe.ctl.in_flight -= 1
+                    decided.append((probe.ip, False))
+
+            # nothing is yielded between the drain and the expiry above
+            yield from decided
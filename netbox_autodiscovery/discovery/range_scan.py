@@ -1,13 +1,30 @@
 import subprocess
 import ipaddress
-import socket
 import random
+import itertools
+import queue
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from django.db import transaction
 from ipam.models import IPAddress
 from ..models import ScanRun
 from ..models import ScanFinding
+from ..runlog import RunLogger
+from ..metrics import PhaseStats
+from ..progress import RunProgress
+from ..findings_store import PREVIEW_SIZE, FindingsWriter, artifact_summary, findings_writer
+from .packet_sweep import ProbeUnavailable
+from .congestion import AdaptiveScheduler
+from .icmp_sweep import IcmpSweeper, IcmpNotPermitted
+from .tcp_sweep import TcpConnectSweeper, DEFAULT_PORTS
+from .arp_sweep import ArpSweeper
+from .dns_resolver import get_resolver
+from .alive_set import AliveBitmap, diff_alive
+from .savepoints import isolated_write
 
+DEFAULT_SHARD_PREFIX = 20   # 4096 addresses per shard
+MAX_SHARDS = 256
 
 # ---------------------------
 # Helpers
@@ -26,25 +43,388 @@ def _ping_host(ip: str) -> bool:
         return False
 
 
-def _reverse_dns(ip: str) -> str | None:
-    """Try reverse DNS lookup."""
+def _write_batch(run: ScanRun, batch: list[tuple[str, str | None]],
+                 fake: bool = False) -> tuple[int, int, int, list]:
+    """
+    Upsert a batch of (ip, hostname) pairs as /32 IPAddress objects in a
+    fixed number of queries: one prefetch, one bulk_create, one bulk_update,
+    committed as one transaction. A row the database rejects is retried
+    alone in a savepoint and skipped, without losing the rest of the batch.
+    Findings are not written per host; see record_alive_diff.
+    Returns (created, existing, resolved, [(ip, error), ...] of skipped rows).
+    """
+    if not batch:
+        return 0, 0, 0, []
+
+    addrs = [f"{ip}/32" for ip, _ in batch]
+    known = {str(obj.address.ip): obj for obj in IPAddress.objects.filter(address__in=addrs)}
+
+    to_create, to_update = [], []
+    resolved = 0
+    for ip, hostname in batch:
+        dns_name = hostname.lower()[:255] if hostname else None
+        if dns_name:
+            resolved += 1
+        ip_obj = known.get(ip)
+        if ip_obj is None:
+            to_create.append(IPAddress(
+                address=f"{ip}/32",
+                description=f"Discovered{' (FAKE)' if fake else ''} by AutoDiscovery",
+                dns_name=dns_name or "",
+            ))
+        elif dns_name and ip_obj.dns_name != dns_name:
+            ip_obj.dns_name = dns_name
+            to_update.append(ip_obj)
+
+    with transaction.atomic():
+        failed = isolated_write(lambda objs: IPAddress.objects.bulk_create(objs, batch_size=len(objs)), to_create)
+        created = len(to_create) - len(failed)
+        failed += isolated_write(
+            lambda objs: IPAddress.objects.bulk_update(objs, ["dns_name"], batch_size=len(objs)), to_update
+        )
+    skipped = [(str(obj.address).split("/")[0], error) for obj, error in failed]
+    return created, len(batch) - len(to_create), resolved, skipped
+
+
+def record_alive_diff(run: ScanRun, alive: AliveBitmap, fake: bool = False,
+                      findings: FindingsWriter | None = None) -> dict:
+    """
+    Store the run's alive bitmap and record findings only for the hosts
+    that appeared or disappeared since the previous successful run of the
+    same scanner. With a `findings` writer (columnar store), the diff is
+    added to it and the artifact saved on the run, and a single ScanFinding
+    points to it. Returns the diff counters for run.stats.
+    """
+    run.alive_prefix = str(alive.network)
+    run.alive_hosts = alive.to_bytes()
+    previous = (
+        ScanRun.objects.filter(scanner_id=run.scanner_id, pk__lt=run.pk,
+                               status=ScanRun.RunStatus.SUCCESS, alive_hosts__isnull=False)
+        .only("pk", "alive_prefix", "alive_hosts")
+        .order_by("-pk")
+        .first()
+    )
+    suffix = " (fake)" if fake else ""
+    if previous is None:
+        appeared, disappeared = [], []
+        diff = {"previous_run": None}
+    else:
+        appeared, disappeared = diff_alive(AliveBitmap(previous.alive_prefix, bytes(previous.alive_hosts)), alive)
+        diff = {"previous_run": previous.pk, "appeared": len(appeared), "disappeared": len(disappeared)}
+
+    if findings is not None:
+        for ip in appeared:
+            findings.add(ip, None, f"Host appeared{suffix}")
+        for ip in disappeared:
+            findings.add(ip, None, f"Host disappeared{suffix}")
+        run.findings_blob = findings.finish()
+        # the run page shows the start of the diff from here, without reading the artifact
+        preview = {"appeared": appeared[:PREVIEW_SIZE], "disappeared": disappeared[:PREVIEW_SIZE]}
+        ScanFinding.objects.create(
+            run=run, summary=artifact_summary(findings.codec, fake),
+            details={"cidr": run.alive_prefix, "alive": len(alive), **findings.as_stats(), "preview": preview},
+        )
+        return {**diff, "findings": findings.as_stats()}
+
+    if previous is None:
+        ScanFinding.objects.create(
+            run=run, summary=f"Baseline alive set recorded{suffix}",
+            details={"cidr": run.alive_prefix, "alive": len(alive)},
+        )
+        return diff
+
+    findings = [ScanFinding(run=run, summary=f"Host appeared{suffix}", details={"ip": ip}) for ip in appeared]
+    findings += [ScanFinding(run=run, summary=f"Host disappeared{suffix}", details={"ip": ip}) for ip in disappeared]
+    # all or nothing: a partial diff would be mistaken for the real one
+    with transaction.atomic():
+        ScanFinding.objects.bulk_create(findings, batch_size=1000)
+    return diff
+
+
+class _PingFallback:
+    """One `ping` subprocess per host, for workers without ICMP socket access."""
+
+    def __init__(self, window: int = 4096):
+        self.window = window
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def sweep(self, hosts):
+        hosts = iter(hosts)
+        with ThreadPoolExecutor(max_workers=64) as ex:
+            in_flight = {}
+            for ip in itertools.islice(hosts, self.window):
+                in_flight[ex.submit(_ping_host, ip)] = ip
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    ip = in_flight.pop(fut)
+                    try:
+                        alive = fut.result()
+                    except Exception:
+                        alive = False
+                    yield ip, alive
+                    nxt = next(hosts, None)
+                    if nxt is not None:
+                        in_flight[ex.submit(_ping_host, nxt)] = nxt
+
+
+# ---------------------------
+# Probes
+# ---------------------------
+
+def _scheduler(params: dict) -> AdaptiveScheduler:
+    """Per-subnet AIMD scheduler; ping_timeout and subnet_max_window are its ceilings."""
+    return AdaptiveScheduler.from_params(
+        params,
+        timeout=float(params.get("ping_timeout") or 1),
+        max_window=int(params.get("subnet_max_window") or 256),
+    )
+
+
+def _open_icmp(params: dict, network):
     try:
-        return socket.gethostbyaddr(ip)[0]
-    except Exception:
-        return None
+        return IcmpSweeper(
+            rate=int(params.get("ping_rate") or 2000),
+            timeout=float(params.get("ping_timeout") or 1),
+            retries=int(params.get("ping_retries", 1)),
+            max_inflight=int(params.get("ping_window") or 4096),
+            scheduler=_scheduler(params),
+        )
+    except IcmpNotPermitted:
+        return _PingFallback(window=int(params.get("ping_window") or 4096))
+
+
+def _open_tcp(params: dict, network):
+    ports = params.get("probe_ports") or DEFAULT_PORTS
+    if isinstance(ports, str):
+        ports = ports.replace(",", " ").split()
+    return TcpConnectSweeper(
+        ports=ports,
+        rate=int(params.get("ping_rate") or 2000),
+        timeout=float(params.get("ping_timeout") or 1),
+        max_sockets=int(params.get("tcp_sockets") or 512),
+    )
+
+
+def _open_arp(params: dict, network):
+    return ArpSweeper(
+        network,
+        rate=int(params.get("ping_rate") or 2000),
+        timeout=float(params.get("ping_timeout") or 1),
+        retries=int(params.get("ping_retries", 1)),
+        max_inflight=int(params.get("ping_window") or 4096),
+        scheduler=_scheduler(params),
+    )
+
+
+# probe name -> factory(params, network) returning a sweeper with .sweep(hosts)
+PROBES = {
+    "icmp": _open_icmp,
+    "tcp": _open_tcp,
+    "arp": _open_arp,
+}
+
+
+def _probe_names(params: dict) -> list[str]:
+    names = params.get("probes") or ["icmp"]
+    if isinstance(names, str):
+        names = names.replace(",", " ").split()
+    unknown = [n for n in names if n not in PROBES]
+    if unknown:
+        raise ValueError(f"Unknown probe(s) {', '.join(unknown)}; choose from {', '.join(PROBES)}")
+    return list(dict.fromkeys(names))
+
+
+def _probe_sweep(hosts, params: dict, network, log=None, counts: dict | None = None,
+                 congestion: dict | None = None, phases: PhaseStats | None = None):
+    """
+    Yield (ip, alive) for every host using the probes named in params["probes"]
+    (default: icmp). A probe that cannot run here is skipped with a log line.
+    With several probes, hosts are taken in blocks of `ping_window` and every
+    probe sweeps the block at the same time in its own thread, so a block
+    costs as long as the slowest probe rather than the sum of all of them.
+    `counts` receives the number of hosts each probe found alive,
+    `congestion` the RTT/window/loss summary of each adaptive probe and
+    `phases` the packets and bytes they sent, under "sweep".
+    The probes are opened (and unavailable ones logged) right away, in the
+    calling thread; the returned generator only touches the sockets.
+    """
+    counts = counts if counts is not None else {}
+    congestion = congestion if congestion is not None else {}
+    sweepers = {}
+    for name in _probe_names(params):
+        try:
+            sweepers[name] = PROBES[name](params, network)
+        except ProbeUnavailable as e:
+            if log is not None:
+                log.write(f"⏭ {name} probe unavailable: {e}")
+    if not sweepers:
+        sweepers["icmp"] = _open_icmp(params, network)
+    return _sweep_with(sweepers, hosts, params, counts, congestion, phases)
+
+
+def _sweep_with(sweepers: dict, hosts, params: dict, counts: dict, congestion: dict,
+                phases: PhaseStats | None):
+    try:
+        if len(sweepers) == 1:
+            (name, sweeper), = sweepers.items()
+            for ip, alive in sweeper.sweep(hosts):
+                if alive:
+                    counts[name] = counts.get(name, 0) + 1
+                yield ip, alive
+            return
+
+        def alive_in(name, block):
+            return name, {ip for ip, alive in sweepers[name].sweep(block) if alive}
+
+        hosts = iter(hosts)
+        window = int(params.get("ping_window") or 4096)
+        with ThreadPoolExecutor(max_workers=len(sweepers)) as ex:
+            while True:
+                block = list(itertools.islice(hosts, window))
+                if not block:
+                    break
+                answered = set()
+                for name, found in ex.map(lambda n: alive_in(n, block), sweepers):
+                    counts[name] = counts.get(name, 0) + len(found)
+                    answered |= found
+                for ip in block:
+                    yield ip, ip in answered
+    finally:
+        for name, sweeper in sweepers.items():
+            scheduler = getattr(sweeper, "scheduler", None)
+            if scheduler is not None and scheduler.adaptive:
+                congestion[name] = scheduler.summary()
+            if phases is not None:
+                phases.add("sweep", packets=getattr(sweeper, "packets", 0),
+                           bytes=getattr(sweeper, "bytes_sent", 0))
+            sweeper.close()
+
+
+_SWEEP_DONE = object()
+
+
+def _in_background(results, maxsize: int = 65536):
+    """
+    Run a sweep generator in its own thread and yield its results from a
+    bounded queue. Probe deadlines are then kept by the sweep thread, so
+    the time the consumer spends on DNS and DB writes cannot make hosts
+    that answered in the meantime look dead. The queue only fills up (and
+    the sweep waits) when the consumer falls `maxsize` results behind.
+    """
+    out = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in results:
+                while not stop.is_set():
+                    try:
+                        out.put(item, timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    break
+        except Exception as e:
+            out.put((_SWEEP_DONE, e))
+            return
+        finally:
+            results.close()
+        out.put((_SWEEP_DONE, None))
+
+    thread = threading.Thread(target=produce, name="autodiscovery-sweep", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = out.get()
+            if item[0] is _SWEEP_DONE:
+                if item[1] is not None:
+                    raise item[1]
+                return
+            yield item
+    finally:
+        stop.set()
+        # unblock a producer waiting on a full queue, then let it close the sockets
+        while thread.is_alive():
+            try:
+                out.get_nowait()
+            except queue.Empty:
+                thread.join(0.1)
+
+
+def _host_range(network, shard=None) -> tuple[int, int]:
+    """
+    Return (first usable host as int, number of usable hosts) without enumerating.
+    With a shard sub-prefix, only the part of the range inside it is returned,
+    so the shards of one network cover exactly its usable hosts.
+    """
+    first = int(network.network_address)
+    count = network.num_addresses
+    if network.prefixlen < network.max_prefixlen - 1:
+        first += 1
+        count -= 2
+    if shard is not None:
+        shard = ipaddress.ip_network(shard, strict=False)
+        start = max(first, int(shard.network_address))
+        end = min(first + count, int(shard.network_address) + shard.num_addresses)
+        first, count = start, max(0, end - start)
+    return first, count
+
+
+def _iter_hosts(first: int, count: int):
+    """Lazily yield host addresses of an IPv4 range as strings."""
+    for n in range(first, first + count):
+        yield str(ipaddress.IPv4Address(n))
+
+
+def plan_shards(params: dict) -> list[str]:
+    """
+    Split the scanner's CIDR into sub-prefixes of at most 2^(32 - shard_prefix)
+    addresses, one per RQ job. Returns a single shard when the range is small.
+    - params: {"cidr": "10.0.0.0/16", "shard_prefix": 20, "max_shards": 256}
+    """
+    network = ipaddress.ip_network(params["cidr"], strict=False)
+    if network.version != 4:
+        return [str(network)]
+    new_prefix = max(int(params.get("shard_prefix") or DEFAULT_SHARD_PREFIX), network.prefixlen)
+    max_shards = int(params.get("max_shards") or MAX_SHARDS)
+    while new_prefix > network.prefixlen and 2 ** (new_prefix - network.prefixlen) > max_shards:
+        new_prefix -= 1
+    return [str(sub) for sub in network.subnets(new_prefix=new_prefix)]
 
 
 # ---------------------------
 # Discovery core
 # ---------------------------
 
-def run_network_scan(params: dict, run: ScanRun, fake: bool = False, batch_size: int = 50):
+def run_network_scan(params: dict, run: ScanRun, fake: bool = False, batch_size: int = 50,
+                     shard: str | None = None, alive_set: AliveBitmap | None = None,
+                     findings: FindingsWriter | None = None):
     """
     Discover alive hosts in CIDR and save into NetBox IPAM.
-    - params: {"cidr": "192.168.1.0/24"}
+    - params: {"cidr": "192.168.1.0/24", "ping_rate": 2000, "ping_timeout": 1, "ping_retries": 1,
+               "ping_window": 4096, "dns_servers": "10.0.0.53,10.0.1.53", "dns_timeout": 2,
+               "probes": "icmp,tcp,arp", "probe_ports": "22,80,443", "tcp_sockets": 512,
+               "adaptive": True, "subnet_max_window": 256, "min_timeout": 0.25}
     - run: ScanRun instance (to update logs progressively)
     - fake: if True, simulate random results
-    - batch_size: how many IPs per DB commit
+    - batch_size: how many alive IPs per DB write batch
+    - shard: only sweep this sub-prefix of the CIDR; log lines still go to
+      `run`, but run.stats and the diff are left to the merge job
+    - alive_set: bitmap to collect alive hosts into; a shard's caller stores it
+    - findings: columnar writer to add every alive host to; created from the
+      params for unsharded runs, passed (and stored) by a shard's caller
+    The returned stats carry "phases": time and traffic of the sweep, time
+    spent waiting on DNS and its queries, and time and SQL queries of the writes.
     """
 
     cidr = params.get("cidr")
@@ -52,115 +432,114 @@ def run_network_scan(params: dict, run: ScanRun, fake: bool = False, batch_size:
         raise ValueError("No cidr provided in scanner params")
 
     network = ipaddress.ip_network(cidr, strict=False)
-    hosts = [str(ip) for ip in network.hosts()]
-    discovered = []
+    if network.version != 4:
+        raise ValueError(f"IPv6 prefixes cannot be swept host by host: {cidr}")
+    first, total = _host_range(network, shard)
+    log = RunLogger.for_run(run)
+    progress = RunProgress.for_run(run)
+    # every shard reports the whole network's total; its counters add up
+    progress.set(total=_host_range(network)[1], phase="sweep")
+    tag = f"[{shard}] " if shard else ""
+    if alive_set is None:
+        alive_set = AliveBitmap(shard or network)
+    if findings is None and shard is None:
+        findings = findings_writer(params)
     created = 0
     existing = 0
     resolved = 0
+    failed = 0
 
     # Fake mode → choose some random IPs from range
-# Fake mode → choose some random IPs from range
     if fake:
-        alive_hosts = random.sample(hosts, min(5, len(hosts)))
-        for ip in alive_hosts:
-            discovered.append(ip)
-            addr = f"{ip}/32"
-            ip_obj, was_created = IPAddress.objects.get_or_create(address=addr)
-            if was_created:
-                ip_obj.description = "Discovered (FAKE) by AutoDiscovery"
-                created += 1
-                ScanFinding.objects.create(
-                    run=run,
-                    summary="New IP discovered (fake)",
-                    details={"ip": ip}
-                )
-            else:
-                existing += 1
-                ScanFinding.objects.create(
-                    run=run,
-                    summary="Existing IP seen (fake)",
-                    details={"ip": ip}
-                )
-
-            # fake hostname
-            hostname = f"host-{ip.replace('.', '-')}.local"
-            try:
-                ip_obj.dns_name = hostname
-            except Exception:
-                ip_obj.description += f" Resolved hostname: {hostname}"
-            resolved += 1
-            ip_obj.save()
+        picks = random.sample(range(total), min(5, total))
+        alive_hosts = [str(ipaddress.IPv4Address(first + n)) for n in picks]
+        fake_batch = [(ip, f"host-{ip.replace('.', '-')}.local") for ip in alive_hosts]
+        created, existing, resolved, _ = _write_batch(run, fake_batch, fake=True)
+        for ip, hostname in fake_batch:
+            alive_set.add(ip)
+            if findings is not None:
+                findings.add(ip, hostname, "Host alive (fake)")
+        progress.add(checked=total, alive=len(alive_hosts))
+        progress.flush()
 
-        run.log = "Fake scan complete."
-        run.stats = {"cidr": cidr, "alive": len(discovered), "created": created, "resolved": resolved}
-        run.save()
-        return run.stats
+        log.write(f"{tag}Fake scan complete.")
+        log.flush()
+        stats = {"cidr": shard or cidr, "alive": len(alive_hosts), "created": created, "resolved": resolved}
+        if shard is None:
+            stats.update(record_alive_diff(run, alive_set, fake=True, findings=findings))
+            run.stats = stats
+            run.save()
+        return stats
 
-    # Real scan with batching
+    # Real scan with batching; reverse DNS runs alongside the sweep
+    resolver = get_resolver(params.get("dns_servers"), timeout=float(params.get("dns_timeout") or 2))
+    ptr_cache = resolver.cache
+    hits, misses = ptr_cache.hits, ptr_cache.misses
+    dns_queries, dns_bytes = resolver.queries, resolver.bytes
+    phases = PhaseStats()
     batch = []
-    with ThreadPoolExecutor(max_workers=64) as ex:
-        futures = {ex.submit(_ping_host, ip): ip for ip in hosts}
-        total = len(futures)
-        checked = 0
-
-        for fut in as_completed(futures):
-            checked += 1
-            ip = futures[fut]
-            try:
-                if fut.result():
-                    batch.append(ip)
-            except Exception:
-                pass
-
-            # process batch
-            if len(batch) >= batch_size or checked == total:
-                # Reverse DNS in parallel
-                with ThreadPoolExecutor(max_workers=16) as dns_ex:
-                    dns_futures = {dns_ex.submit(_reverse_dns, ip): ip for ip in batch}
-                    for df in as_completed(dns_futures):
-                        ip = dns_futures[df]
+    checked = 0
+    alive = 0
+    probe_counts, congestion = {}, {}
+    sweep = _in_background(_probe_sweep(_iter_hosts(first, total), params, network, log=log,
+                                        counts=probe_counts, congestion=congestion, phases=phases))
+    next_report = 0
+    for ip, is_alive in phases.timed(sweep, "sweep"):
+        checked += 1
+        progress.add(checked=1, alive=int(is_alive))
+        if is_alive:
+            alive_set.add(ip)
+            batch.append((ip, resolver.resolve(ip)))
+
+        # process batch
+        if len(batch) >= batch_size or checked == total:
+            # PTR lookups were started as hosts came in; most are done by now
+            # a stalled resolver costs the batch its hostnames, never the scan
+            resolved_batch = []
+            deadline = time.monotonic() + resolver.lookup_timeout
+            with phases.track("dns"):
+                for ip, fut in batch:
+                    try:
+                        hostname = fut.result(timeout=max(0.0, deadline - time.monotonic()))
+                    except Exception:  # TimeoutError included
                         hostname = None
-                        try:
-                            hostname = df.result()
-                        except Exception:
-                            pass
-
-                        addr = f"{ip}/32"
-                        ip_obj, was_created = IPAddress.objects.get_or_create(address=addr)
-                        if was_created:
-                            ip_obj.description = "Discovered by AutoDiscovery"
-                            created += 1
-                            ScanFinding.objects.create(
-                                run=run,
-                                summary="New IP discovered",
-                                details={"ip": str(ip)}
-                            )
-                        else:
-                            existing += 1
-                            ScanFinding.objects.create(
-                                run=run,
-                                summary="Existing IP seen",
-                                details={"ip": str(ip)}
-                            )
-
-                        if hostname:
-                            try:
-                                ip_obj.dns_name = hostname
-                            except Exception:
-                                ip_obj.description += f" Hostname={hostname}"
-                            resolved += 1
-
-                        ip_obj.save()
-                        discovered.append(ip)
-
-                # Update log progressively
-                run.log = f"Scanned {checked}/{total} hosts, found {len(discovered)} alive..."
-                run.save(update_fields=["log"])
-                batch = []
-                time.sleep(0.1)  # just to avoid log flooding
-
-    run.stats = {"cidr": cidr, "alive": len(discovered), "created": created,
-                 "existing": existing, "resolved": resolved}
-    run.log += f"\nDone. Alive={len(discovered)}, Created={created}, Resolved={resolved}"
-    run.save()
-    return run.stats
+                    resolved_batch.append((ip, hostname))
+
+            with phases.track("db"):
+                c, e, r, skipped = _write_batch(run, resolved_batch)
+                if findings is not None:
+                    for ip, hostname in resolved_batch:
+                        findings.add(ip, hostname, "Host alive")
+            created += c
+            existing += e
+            resolved += r
+            alive += len(resolved_batch)
+            failed += len(skipped)
+            for ip, error in skipped:
+                log.write(f"{tag}❌ Skipped {ip}: {error}")
+
+            # live counters go to RunProgress; the log only gets a line per 10%
+            if checked >= next_report:
+                log.write(f"{tag}Scanned {checked}/{total} hosts, found {alive} alive...")
+                next_report = checked + max(1, total // 10)
+            batch = []
+
+    stats = {"cidr": shard or cidr, "alive": alive, "created": created,
+             "existing": existing, "resolved": resolved, "failed_rows": failed,
+             "dns_cache_hits": ptr_cache.hits - hits, "dns_cache_misses": ptr_cache.misses - misses,
+             **{f"alive_{name}": n for name, n in probe_counts.items()}}
+    if congestion:
+        stats["congestion"] = congestion
+    if shard is None:
+        progress.set(phase="diff")
+        with phases.track("db"):
+            stats.update(record_alive_diff(run, alive_set, findings=findings))
+    phases.add("dns", queries=resolver.queries - dns_queries, bytes=resolver.bytes - dns_bytes)
+    stats["phases"] = phases.as_dict()
+    log.write(f"{tag}Done. Alive={alive}, Created={created}, Resolved={resolved}")
+    log.flush()
+    progress.flush()
+    if shard is None:
+        run.stats = stats
+        run.save()
+    return stats
@@ -0,0 +1,201 @@
+# netbox_autodiscovery/discovery/reconcile.py
+from dcim.models import Interface
+from ipam.models import VLAN
+from .savepoints import isolated_write
+
+
+def _assign(obj, **values) -> set:
+    """Set attributes on obj, returning the names of the fields that changed."""
+    changed = set()
+    for field, value in values.items():
+        if getattr(obj, field) != value:
+            setattr(obj, field, value)
+            changed.add(field)
+    return changed
+
+
+def _describe_interface(iface) -> str:
+    return f"interface {iface.name}"
+
+
+def _describe_vlan(vlan) -> str:
+    return f"VLAN {vlan.vid}"
+
+
+class DeviceReconciler:
+    """
+    Per-run in-memory model of one device's interfaces and the VLANs they use.
+
+    The device's interfaces and tagged-VLAN rows are loaded once; VLANs are
+    loaded on demand with a single vid__in query. Each sync_* method computes
+    the desired state from SNMP data and writes only what differs, with
+    bulk_create/bulk_update, so an unchanged switch costs no writes.
+
+    Every bulk write runs in a savepoint; rows the database rejects are
+    dropped one by one and collected in `failed` as (description, error).
+    """
+
+    def __init__(self, device):
+        self.device = device
+        self.interfaces = {iface.name: iface for iface in Interface.objects.filter(device=device)}
+        self.by_index = {}
+        self.vlans = {}
+        self.through = Interface.tagged_vlans.through
+        self.tagged = {}
+        self.failed = []
+        for row in self.through.objects.filter(interface__device=device).values_list("pk", "interface_id", "vlan_id"):
+            self.tagged.setdefault(row[1], {})[row[2]] = row[0]
+
+    def _write(self, write, objs: list, describe) -> set:
+        """Bulk write objs with savepoint isolation; returns the ids of the rows that failed."""
+        bad = set()
+        for obj, error in isolated_write(write, objs):
+            self.failed.append((describe(obj), error))
+            bad.add(id(obj))
+        return bad
+
+    # ---------------------------
+    # Interfaces
+    # ---------------------------
+
+    def index_interfaces(self, names: dict):
+        """Map ifIndex -> interface from a known {ifIndex: name}, without writing."""
+        for idx, name in names.items():
+            iface = self.interfaces.get(name)
+            if iface is not None:
+                self.by_index[idx] = iface
+
+    def sync_interfaces(self, if_table: dict) -> tuple[int, int]:
+        """
+        if_table: {ifIndex: {"name": ..., "type": ..., "admin": ...}}
+        Returns (created, updated).
+        """
+        to_create, to_update, fields = [], [], set()
+        for idx, row in if_table.items():
+            name = row.get("name")
+            if not name:
+                continue
+            values = {
+                "type": "1000base-t" if row.get("type") == "6" else "other",
+                "enabled": row.get("admin") == "1",
+            }
+            iface = self.interfaces.get(name)
+            if iface is None:
+                iface = Interface(device=self.device, name=name, **values)
+                self.interfaces[name] = iface
+                to_create.append(iface)
+            else:
+                changed = _assign(iface, **values)
+                if changed:
+                    to_update.append(iface)
+                    fields |= changed
+            self.by_index[idx] = iface
+
+        bad = self._write(Interface.objects.bulk_create, to_create, _describe_interface)
+        for iface in to_create:
+            if id(iface) in bad:
+                # never saved: forget it so no assignment points at it
+                del self.interfaces[iface.name]
+                self.by_index = {idx: i for idx, i in self.by_index.items() if i is not iface}
+        bad_updates = self._write(
+            lambda objs: Interface.objects.bulk_update(objs, sorted(fields)), to_update, _describe_interface
+        )
+        return len(to_create) - len(bad), len(to_update) - len(bad_updates)
+
+    # ---------------------------
+    # VLANs
+    # ---------------------------
+
+    def load_vlans(self, vids):
+        """Fetch the VLANs for vids not loaded yet, in one query."""
+        missing = set(vids) - set(self.vlans)
+        if not missing:
+            return
+        # a vid may exist in several VLAN groups: the oldest one wins
+        for vlan in VLAN.objects.filter(vid__in=missing).order_by("-pk"):
+            self.vlans[vlan.vid] = vlan
+
+    def sync_vlans(self, names: dict) -> tuple[list, int, int]:
+        """
+        names: {vid: name} as reported by the device.
+        Returns (vlans, created, renamed).
+        """
+        self.load_vlans(names)
+        to_create, to_update = [], []
+        for vid, name in names.items():
+            vlan = self.vlans.get(vid)
+            if vlan is None:
+                vlan = VLAN(vid=vid, name=name)
+                self.vlans[vid] = vlan
+                to_create.append(vlan)
+            elif _assign(vlan, name=name):
+                to_update.append(vlan)
+
+        bad = self._write(VLAN.objects.bulk_create, to_create, _describe_vlan)
+        for vlan in to_create:
+            if id(vlan) in bad:
+                del self.vlans[vlan.vid]
+        bad_updates = self._write(lambda objs: VLAN.objects.bulk_update(objs, ["name"]), to_update, _describe_vlan)
+        vlans = [self.vlans[vid] for vid in names if vid in self.vlans]
+        return vlans, len(to_create) - len(bad), len(to_update) - len(bad_updates)
+
+    # ---------------------------
+    # Assignments
+    # ---------------------------
+
+    def sync_assignments(self, access: dict, trunks: dict) -> int:
+        """
+        access: {ifIndex: vid}; trunks: {ifIndex: {vid, ...}}
+        Applies mode/untagged VLAN changes and the tagged VLAN through rows.
+        Returns the number of ports carrying an assignment.
+        """
+        self.load_vlans(set(access.values()).union(*trunks.values()))
+
+        to_update, fields = [], set()
+        desired_tagged = {}
+        assignments = 0
+
+        for idx, vid in access.items():
+            iface = self.by_index.get(idx)
+            vlan = self.vlans.get(vid)
+            if idx in trunks or iface is None or vlan is None:
+                continue
+            changed = _assign(iface, mode="access", untagged_vlan_id=vlan.pk)
+            if changed:
+                to_update.append(iface)
+                fields |= changed
+            # access ports carry no tagged VLANs
+            desired_tagged[iface.pk] = set()
+            assignments += 1
+
+        for idx, vids in trunks.items():
+            iface = self.by_index.get(idx)
+            enabled = {self.vlans[vid].pk for vid in vids if vid in self.vlans}
+            if iface is None or not enabled:
+                continue
+            changed = _assign(iface, mode="tagged")
+            if changed:
+                to_update.append(iface)
+                fields |= changed
+            desired_tagged[iface.pk] = enabled
+            assignments += 1
+
+        self._write(
+            lambda objs: Interface.objects.bulk_update(objs, sorted(fields)), to_update, _describe_interface
+        )
+
+        stale, missing = [], []
+        for iface_id, enabled in desired_tagged.items():
+            have = self.tagged.get(iface_id, {})
+            stale.extend(pk for vlan_id, pk in have.items() if vlan_id not in enabled)
+            missing.extend(
+                self.through(interface_id=iface_id, vlan_id=vlan_id)
+                for vlan_id in enabled if vlan_id not in have
+            )
+        if stale:
+            self.through.objects.filter(pk__in=stale).delete()
+        self._write(
+            self.through.objects.bulk_create, missing,
+            lambda row: f"tagged VLAN {row.vlan_id} on interface {row.interface_id}",
+        )
+        return assignments
@@ -0,0 +1,28 @@
+# netbox_autodiscovery/discovery/savepoints.py
+from django.db import DatabaseError, transaction
+
+
+def isolated_write(write, objs: list) -> list[tuple[object, Exception]]:
+    """
+    Run write(objs) (a bulk_create/bulk_update of one batch) in a savepoint.
+    If the batch fails, retry it row by row, each in its own savepoint, so a
+    bad row only loses itself instead of the batch or the surrounding
+    transaction. Returns the (obj, error) pairs that could not be written.
+    """
+    if not objs:
+        return []
+    try:
+        with transaction.atomic():
+            write(objs)
+        return []
+    except DatabaseError:
+        pass
+
+    failed = []
+    for obj in objs:
+        try:
+            with transaction.atomic():
+                write([obj])
+        except DatabaseError as e:
+            failed.append((obj, e))
+    return failed
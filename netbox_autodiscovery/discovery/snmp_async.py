@@ -0,0 +1,125 @@
+# netbox_autodiscovery/discovery/snmp_async.py
+import math
+import time
+from pysnmp.hlapi.asyncio import (
+    getCmd,
+    bulkCmd,
+    nextCmd,
+    CommunityData,
+    UdpTransportTarget,
+    ContextData,
+    ObjectType,
+    ObjectIdentity,
+    SnmpEngine,
+)
+from pysnmp.proto.errind import RequestTimedOut
+from .snmp_helpers import MISSING, absorb_rows, oid_tuple, traffic_counter
+
+
+def close_engine(engine: SnmpEngine):
+    dispatcher = getattr(engine, "transportDispatcher", None)
+    if dispatcher is not None:
+        try:
+            dispatcher.closeDispatcher()
+        except Exception:
+            pass
+
+
+class AsyncSnmpSession:
+    """
+    asyncio counterpart of SnmpSession for polling many targets concurrently.
+    The engine is owned by the caller and shared by every session on the
+    same event loop.
+
+    With a congestion controller (see congestion.SubnetController) the
+    session retransmits itself instead of leaving it to pysnmp, so each
+    attempt uses the subnet's current timeout and every RTT and recovered
+    loss is reported back.
+    """
+
+    def __init__(self, engine, host, community, port=161, timeout=1, retries=1, mp_model=1, controller=None):
+        self.host = host
+        self.port = port
+        self.community = community
+        self.mp_model = mp_model
+        self.retries = retries
+        self.controller = controller
+        self.engine = engine
+        self.auth = CommunityData(community, mpModel=mp_model)
+        self.transport = UdpTransportTarget((host, port), timeout=timeout, retries=retries)
+        self.context = ContextData()
+        self.stats = {}
+        self.complete = True
+        self.traffic = traffic_counter(engine)
+
+    def counters(self) -> tuple[int, int]:
+        """(PDUs, bytes sent and received) so far, as SnmpSession.counters."""
+        return sum(c["pdus"] for c in self.stats.values()), self.traffic.bytes_for(self.transport)
+
+    def _record(self, op: str, started: float, pdus: int = 1):
+        counter = self.stats.setdefault(op, {"calls": 0, "pdus": 0, "seconds": 0.0})
+        counter["calls"] += 1
+        counter["pdus"] += pdus
+        counter["seconds"] += time.perf_counter() - started
+
+    async def _request(self, cmd, *args):
+        if self.controller is None:
+            return await cmd(self.engine, self.auth, self.transport, self.context, *args, lookupMib=False)
+        for attempt in range(self.retries + 1):
+            # timeout/retries are part of pysnmp's target cache key: keep the values coarse
+            self.transport.timeout = math.ceil(self.controller.timeout() * 10) / 10
+            self.transport.retries = 0
+            started = time.perf_counter()
+            result = await cmd(self.engine, self.auth, self.transport, self.context, *args, lookupMib=False)
+            if not isinstance(result[0], RequestTimedOut):
+                self.controller.on_reply(time.perf_counter() - started, lost=attempt > 0)
+                return result
+        return result
+
+    async def get(self, oids: dict) -> dict:
+        """GET several scalars in one PDU. oids: {"sysname": "1.3.6.1.2.1.1.5.0", ...}"""
+        started = time.perf_counter()
+        errorIndication, errorStatus, errorIndex, varBinds = await self._request(
+            getCmd, *[ObjectType(ObjectIdentity(oid)) for oid in oids.values()]
+        )
+        self._record("get", started)
+        if errorIndication or errorStatus:
+            return {key: None for key in oids}
+        return {
+            key: None if isinstance(val, MISSING) else str(val)
+            for key, (_, val) in zip(oids, varBinds)
+        }
+
+    async def bulk_table(self, columns: dict, max_repetitions: int = 25, binary=()) -> dict:
+        """
+        Same contract as SnmpSession.bulk_table: several columns walked in
+        one GETBULK stream (GETNEXT for SNMPv1), rows keyed by OID suffix.
+        """
+        self.complete = True
+        started = time.perf_counter()
+        prefixes = {col: oid_tuple(oid) for col, oid in columns.items()}
+        cursor = dict(columns)
+        active = list(columns)
+        table = {}
+        pdus = 0
+
+        while active:
+            varBinds = [ObjectType(ObjectIdentity(cursor[col])) for col in active]
+            if self.mp_model == 0:
+                errorIndication, errorStatus, errorIndex, varBindTable = await self._request(
+                    nextCmd, *varBinds
+                )
+            else:
+                errorIndication, errorStatus, errorIndex, varBindTable = await self._request(
+                    bulkCmd, 0, max_repetitions, *varBinds
+                )
+            pdus += 1
+            if errorIndication or errorStatus:
+                self.complete = False
+                break
+            if not varBindTable:
+                break
+            active = absorb_rows(varBindTable, active, cursor, prefixes, binary, table)
+
+        self._record("bulk", started, pdus)
+        return table
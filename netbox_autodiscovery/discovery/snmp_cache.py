@@ -0,0 +1,198 @@
+# netbox_autodiscovery/discovery/snmp_cache.py
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from netbox.plugins import get_plugin_config
+from .drivers import OidTrie
+
+
+# TTL class of each OID prefix (longest prefix wins). Change markers map to
+# None and are never cached: they decide which tables have to be walked.
+OID_CLASSES = OidTrie()
+for _prefix, _cls in (
+    ("1", "config"),                            # anything else: VLAN and port tables
+    ("1.3.6.1.2.1.1", "system"),                # sysDescr, sysObjectID, sysName, ...
+    ("1.3.6.1.2.1.1.3", None),                  # sysUpTime
+    ("1.3.6.1.2.1.31.1.5", None),               # ifTableLastChange
+    ("1.3.6.1.4.1.9.9.46.1.2.1.1", None),       # VTP managementDomainTable (revision, last change)
+    ("1.3.6.1.2.1.47.1.1.1.1.11", "system"),    # entPhysicalSerialNum
+    ("1.3.6.1.4.1.9.3.6.3", "system"),          # chassisId
+    ("1.3.6.1.4.1.2636.3.1.3", "system"),       # jnxBoxSerialNo
+    ("1.3.6.1.2.1.2.2.1.7", "status"),          # ifAdminStatus
+    ("1.3.6.1.2.1.2.2.1.8", "status"),          # ifOperStatus
+):
+    OID_CLASSES.insert(_prefix, _cls)
+
+DEFAULT_TTLS = {"system": 3600, "config": 300, "status": 30}
+
+
+# ---------------------------
+# Backends
+# ---------------------------
+
+class MemoryBackend:
+    """Size-bounded LRU of {key: (expires, value)}, shared by the whole process."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys) -> dict:
+        now = time.monotonic()
+        hits = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry[0] < now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                hits[key] = entry[1]
+        return hits
+
+    def set_many(self, items: dict, ttls: dict):
+        now = time.monotonic()
+        with self._lock:
+            for key, value in items.items():
+                self._entries[key] = (now + ttls[key], value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisBackend:
+    """
+    Entries in the RQ Redis, so re-runs in other work horses share them.
+    Expiry is per key; the server's maxmemory policy bounds the size.
+    """
+
+    prefix = "autodiscovery:snmp:"
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def get_many(self, keys) -> dict:
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self.connection.mget([self.prefix + key for key in keys])
+        return {key: pickle.loads(raw) for key, raw in zip(keys, values) if raw is not None}
+
+    def set_many(self, items: dict, ttls: dict):
+        if not items:
+            return
+        pipe = self.connection.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(self.prefix + key, pickle.dumps(value), ex=max(1, int(ttls[key])))
+        pipe.execute()
+
+
+# ---------------------------
+# Cache
+# ---------------------------
+
+class SnmpCache:
+    """
+    GET and walk results keyed by (host:port, community, OID). A scalar is
+    cached as its value, a table column as {suffix: value}. `version`
+    carries the change markers of the column's table, so a column is only
+    reused while its markers did not move. With `refresh`, nothing is read
+    from the cache but fresh results are still stored. Backend errors count
+    as misses: the cache never fails a scan.
+    """
+
+    def __init__(self, backend, ttls: dict | None = None, refresh: bool = False):
+        self.backend = backend
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+
+    def ttl(self, oid: str) -> int:
+        cls = OID_CLASSES.longest(oid)
+        return int(self.ttls.get(cls) or 0) if cls else 0
+
+    def _key(self, session, oid: str, version: str = "") -> str:
+        # the community is a credential: keep it out of the keys
+        secret = hashlib.sha1(session.community.encode()).hexdigest()[:12]
+        return f"{session.host}:{session.port}:{secret}:{oid}:{version}"
+
+    def lookup(self, session, oids: dict, versions: dict | None = None) -> dict:
+        """Cached {name: value} of {name: oid} for the session's target; missing names are misses."""
+        versions = versions or {}
+        keys = {
+            name: self._key(session, oid, versions.get(name, ""))
+            for name, oid in oids.items() if self.ttl(oid)
+        }
+        found = {}
+        if keys and not self.refresh:
+            try:
+                found = self.backend.get_many(keys.values())
+            except Exception:
+                found = {}
+        hits = {name: found[key] for name, key in keys.items() if key in found}
+        self.hits += len(hits)
+        self.misses += len(keys) - len(hits)
+        return hits
+
+    def store(self, session, oids: dict, values: dict, versions: dict | None = None):
+        """Store {name: value} for the cacheable names of {name: oid}; None values are skipped."""
+        versions = versions or {}
+        items, ttls = {}, {}
+        for name, value in values.items():
+            ttl = self.ttl(oids[name])
+            if value is None or not ttl:
+                continue
+            key = self._key(session, oids[name], versions.get(name, ""))
+            items[key], ttls[key] = value, ttl
+        try:
+            self.backend.set_many(items, ttls)
+        except Exception:
+            pass
+
+
+def by_column(rows: dict, columns) -> dict:
+    """Pivot walked rows {suffix: {col: value}} into {col: {suffix: value}} for `columns`."""
+    cells = {col: {} for col in columns}
+    for idx, row in rows.items():
+        for col, value in row.items():
+            if col in cells:
+                cells[col][idx] = value
+    return cells
+
+
+def add_columns(rows: dict, cells: dict):
+    """Merge cached columns {col: {suffix: value}} into walked rows, in place."""
+    for col, values in cells.items():
+        for idx, value in values.items():
+            rows.setdefault(idx, {})[col] = value
+
+
+_memory = None
+_lock = threading.Lock()
+
+
+def get_cache(refresh: bool = False) -> SnmpCache | None:
+    """
+    The cache configured by the `snmp_cache` plugin setting: "redis" (the
+    default queue's connection), "memory" (process-wide LRU of
+    `snmp_cache_size` entries; RQ forks a work horse per job, so it only
+    outlives a run in non-forking workers) or None to disable it.
+    """
+    global _memory
+    kind = get_plugin_config("netbox_autodiscovery", "snmp_cache")
+    ttls = get_plugin_config("netbox_autodiscovery", "snmp_cache_ttl")
+    if kind == "redis":
+        from django_rq import get_connection
+        return SnmpCache(RedisBackend(get_connection("default")), ttls, refresh)
+    if kind == "memory":
+        with _lock:
+            if _memory is None:
+                _memory = MemoryBackend(int(get_plugin_config("netbox_autodiscovery", "snmp_cache_size")))
+        return SnmpCache(_memory, ttls, refresh)
+    return None
@@ -1,4 +1,7 @@
 # netbox_autodiscovery/discovery/snmp_helpers.py
+import threading
+import time
+from collections import OrderedDict, defaultdict
 from pysnmp.hlapi import (
     getCmd,
     CommunityData,
@@ -7,40 +10,272 @@ from pysnmp.hlapi import (
     ObjectType,
     ObjectIdentity,
     nextCmd,
+    bulkCmd,
     SnmpEngine,
 )
+from pysnmp.proto.rfc1905 import EndOfMibView, NoSuchInstance, NoSuchObject
 
 
-def snmp_get(host, community, oid, port=161):
-    iterator = getCmd(
-        SnmpEngine(),
-        CommunityData(community, mpModel=0),
-        UdpTransportTarget((host, port), timeout=1, retries=1),
-        ContextData(),
-        ObjectType(ObjectIdentity(oid)),
-    )
-    errorIndication, errorStatus, errorIndex, varBinds = next(iterator)
-    if errorIndication or errorStatus:
-        return None
-    for varBind in varBinds:
-        return str(varBind[1])
-    return None
+# ---------------------------
+# Engine pool
+# ---------------------------
 
+class EnginePool:
+    """
+    Small per-process LRU pool of SnmpEngine instances.
+    Engines are keyed by credentials, so every target polled with the same
+    community shares one engine (and its MIB/dispatcher setup).
+    """
 
-def snmp_walk(host, community, oid, port=161):
-    results = {}
-    for (errorIndication, errorStatus, errorIndex, varBinds) in nextCmd(
-        SnmpEngine(),
-        CommunityData(community, mpModel=0),
-        UdpTransportTarget((host, port), timeout=1, retries=1),
-        ContextData(),
-        ObjectType(ObjectIdentity(oid)),
-        lexicographicMode=False,
-    ):
+    def __init__(self, size: int = 8):
+        self.size = size
+        self._engines = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> SnmpEngine:
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is not None:
+                self._engines.move_to_end(key)
+                return engine
+            engine = SnmpEngine()
+            self._engines[key] = engine
+            while len(self._engines) > self.size:
+                _, evicted = self._engines.popitem(last=False)
+                _close_engine(evicted)
+            return engine
+
+    def clear(self):
+        with self._lock:
+            while self._engines:
+                _close_engine(self._engines.popitem()[1])
+
+
+def _close_engine(engine: SnmpEngine):
+    dispatcher = getattr(engine, "transportDispatcher", None)
+    if dispatcher is not None:
+        try:
+            dispatcher.closeDispatcher()
+        except Exception:
+            pass
+
+
+engine_pool = EnginePool()
+
+
+class TrafficCounter:
+    """SNMP message bytes per peer (ip, port), fed by an observer on one engine."""
+
+    def __init__(self):
+        self.peers = defaultdict(int)
+
+    def __call__(self, engine, execpoint, variables, ctx):
+        msg = variables.get("outgoingMessage") or variables.get("wholeMsg") or b""
+        self.peers[tuple(variables["transportAddress"])[:2]] += len(msg)
+
+    def bytes_for(self, transport) -> int:
+        return self.peers.get(tuple(transport.transportAddr)[:2], 0)
+
+
+def traffic_counter(engine: SnmpEngine) -> TrafficCounter:
+    """Return the engine's byte counter, registering it on first use."""
+    counter = getattr(engine, "_autodiscovery_traffic", None)
+    if counter is None:
+        counter = engine._autodiscovery_traffic = TrafficCounter()
+        engine.observer.registerObserver(counter, "rfc3412.sendPdu", "rfc3412.receiveMessage:response")
+    return counter
+
+
+# ---------------------------
+# Session
+# ---------------------------
+
+MISSING = (EndOfMibView, NoSuchObject, NoSuchInstance)
+
+
+def oid_tuple(oid: str) -> tuple:
+    return tuple(int(p) for p in oid.strip(".").split("."))
+
+
+def absorb_rows(varBindTable, active: list, cursor: dict, prefixes: dict, binary, table: dict) -> list:
+    """
+    Merge one GETBULK/GETNEXT response into `table` ({suffix: {col: value}})
+    and advance `cursor`. Returns the columns that still have rows to fetch:
+    a column leaves once it runs past its prefix or stops advancing.
+    """
+    before = dict(cursor)
+    finished = set()
+    for row in varBindTable:
+        for (name, val), col in zip(row, active):
+            if col in finished:
+                continue
+            oid = tuple(name)
+            prefix = prefixes[col]
+            if isinstance(val, MISSING) or oid[:len(prefix)] != prefix:
+                finished.add(col)
+                continue
+            idx = ".".join(str(p) for p in oid[len(prefix):])
+            table.setdefault(idx, {})[col] = val.asOctets() if col in binary else str(val)
+            cursor[col] = ".".join(str(p) for p in oid)
+    # a column that did not advance would loop forever
+    return [col for col in active if col not in finished and cursor[col] != before[col]]
+
+class SnmpSession:
+    """
+    Reusable SNMP session for one target.
+    Keeps the pooled engine, auth data and transport alive across all gets
+    and walks, and records per-call timing counters in `stats`.
+    Retransmissions are not included in the byte count.
+    """
+
+    def __init__(self, host, community, port=161, timeout=1, retries=1, mp_model=0):
+        self.host = host
+        self.port = port
+        self.community = community
+        self.mp_model = mp_model
+        self.engine = engine_pool.get((community, mp_model))
+        self.auth = CommunityData(community, mpModel=mp_model)
+        self.transport = UdpTransportTarget((host, port), timeout=timeout, retries=retries)
+        self.context = ContextData()
+        self.stats = {}
+        self.complete = True
+        self.traffic = traffic_counter(self.engine)
+
+    def counters(self) -> tuple[int, int]:
+        """(PDUs, bytes sent and received) so far; the byte count is per peer and engine."""
+        return sum(c["pdus"] for c in self.stats.values()), self.traffic.bytes_for(self.transport)
+
+    def _record(self, op: str, started: float, pdus: int = 1):
+        counter = self.stats.setdefault(op, {"calls": 0, "pdus": 0, "seconds": 0.0})
+        counter["calls"] += 1
+        counter["pdus"] += pdus
+        counter["seconds"] += time.perf_counter() - started
+
+    def get(self, oid):
+        started = time.perf_counter()
+        iterator = getCmd(
+            self.engine,
+            self.auth,
+            self.transport,
+            self.context,
+            ObjectType(ObjectIdentity(oid)),
+        )
+        errorIndication, errorStatus, errorIndex, varBinds = next(iterator)
+        self._record("get", started)
         if errorIndication or errorStatus:
-            break
+            return None
         for varBind in varBinds:
-            oid_str, val = varBind
-            idx = oid_str.prettyPrint().split(".")[-1]
-            results[idx] = str(val)
-    return results
+            if isinstance(varBind[1], (NoSuchObject, NoSuchInstance)):
+                return None
+            return str(varBind[1])
+        return None
+
+    def get_many(self, oids: dict) -> dict:
+        """GET several scalars in one PDU. oids: {"sysname": "1.3.6.1.2.1.1.5.0", ...}"""
+        started = time.perf_counter()
+        iterator = getCmd(
+            self.engine,
+            self.auth,
+            self.transport,
+            self.context,
+            *[ObjectType(ObjectIdentity(oid)) for oid in oids.values()],
+        )
+        errorIndication, errorStatus, errorIndex, varBinds = next(iterator)
+        self._record("get", started)
+        if errorIndication or errorStatus:
+            return {key: None for key in oids}
+        return {
+            key: None if isinstance(val, (NoSuchObject, NoSuchInstance)) else str(val)
+            for key, (_, val) in zip(oids, varBinds)
+        }
+
+    def walk(self, oid, binary=False):
+        started = time.perf_counter()
+        results = {}
+        pdus = 0
+        for (errorIndication, errorStatus, errorIndex, varBinds) in nextCmd(
+            self.engine,
+            self.auth,
+            self.transport,
+            self.context,
+            ObjectType(ObjectIdentity(oid)),
+            lexicographicMode=False,
+        ):
+            pdus += 1
+            if errorIndication or errorStatus:
+                self.complete = False
+                break
+            for varBind in varBinds:
+                oid_str, val = varBind
+                idx = oid_str.prettyPrint().split(".")[-1]
+                results[idx] = val.asOctets() if binary else str(val)
+        self._record("walk", started, pdus)
+        return results
+
+    def bulk_table(self, columns: dict, max_repetitions: int = 25, binary=()):
+        """
+        Fetch several table columns at once with GETBULK (SNMPv2c); the
+        columns may belong to different tables, each one is dropped from
+        the requests once it is exhausted.
+        columns: {"name": "1.3.6.1.2.1.31.1.1.1.1", "type": "1.3.6.1.2.1.2.2.1.3", ...}
+        Returns row-aligned results keyed by the OID suffix (the ifIndex for
+        interface tables): {"1": {"name": "Gi0/1", "type": "6"}, ...}
+        Columns listed in `binary` keep their raw OCTET STRING bytes.
+        SNMPv1 sessions fall back to one GETNEXT walk per column.
+        `complete` tells whether the last call ended without an SNMP error.
+        """
+        table = {}
+        self.complete = True
+        if self.mp_model == 0:
+            for col, oid in columns.items():
+                for idx, val in self.walk(oid, binary=col in binary).items():
+                    table.setdefault(idx, {})[col] = val
+            return table
+
+        started = time.perf_counter()
+        prefixes = {col: oid_tuple(oid) for col, oid in columns.items()}
+        cursor = dict(columns)
+        active = list(columns)
+        pdus = 0
+        while active:
+            # one PDU per request, so columns that ran out stop being asked for
+            varBindTable = []
+            for (errorIndication, errorStatus, errorIndex, varBinds) in bulkCmd(
+                self.engine,
+                self.auth,
+                self.transport,
+                self.context,
+                0,
+                max_repetitions,
+                *[ObjectType(ObjectIdentity(cursor[col])) for col in active],
+                maxCalls=1,
+            ):
+                if errorIndication or errorStatus:
+                    self.complete = False
+                    break
+                varBindTable.append(varBinds)
+            pdus += 1
+            if not varBindTable:
+                break
+            active = absorb_rows(varBindTable, active, cursor, prefixes, binary, table)
+        self._record("bulk", started, pdus)
+        return table
+
+    def timing_summary(self) -> str:
+        parts = []
+        for op, c in self.stats.items():
+            avg = c["seconds"] / c["calls"] * 1000 if c["calls"] else 0.0
+            parts.append(f"{op}: {c['calls']} calls, {c['pdus']} PDUs, {c['seconds']:.2f}s (avg {avg:.1f} ms)")
+        return "; ".join(parts)
+
+
+# ---------------------------
+# One-shot helpers
+# ---------------------------
+
+def snmp_get(host, community, oid, port=161):
+    return SnmpSession(host, community, port=port).get(oid)
+
+
+def snmp_walk(host, community, oid, port=161):
+    return SnmpSession(host, community, port=port).walk(oid)
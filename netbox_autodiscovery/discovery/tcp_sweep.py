@@ -0,0 +1,174 @@
+# netbox_autodiscovery/discovery/tcp_sweep.py
+import errno
+import selectors
+import socket
+import struct
+import time
+from collections import deque
+from typing import Iterable, Iterator
+
+
+DEFAULT_PORTS = (22, 80, 443, 445, 3389)
+
+# RST from the target means something is there, just not listening
+_ALIVE = (0, errno.ECONNREFUSED)
+_PENDING = (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY)
+# abort with RST on close so probed services do not keep half-open sessions
+_LINGER_RST = struct.pack("ii", 1, 0)
+
+
+class _Target:
+    __slots__ = ("ip", "socks")
+
+    def __init__(self, ip: str):
+        self.ip = ip
+        self.socks = set()
+
+
+class TcpConnectSweeper:
+    """
+    Non-blocking TCP connect sweep for hosts that drop ICMP.
+
+    Every host gets a connect() to each port in `ports`; a completed
+    handshake or a RST marks it alive, and its remaining sockets are
+    aborted. Hundreds of sockets are multiplexed in one selector loop,
+    SYNs are paced by a token bucket (`rate` connects/s) and at most
+    `max_sockets` are open at once. `packets` counts the connects started.
+    """
+
+    def __init__(self, ports: Iterable[int] = DEFAULT_PORTS, rate: int = 2000, timeout: float = 1.0,
+                 max_sockets: int = 512):
+        self.ports = tuple(int(p) for p in ports) or DEFAULT_PORTS
+        self.rate = max(1, int(rate))
+        self.timeout = float(timeout)
+        self.max_sockets = max(len(self.ports), int(max_sockets))
+        self.selector = selectors.DefaultSelector()
+        self.packets = 0
+
+    def close(self):
+        for key in list(self.selector.get_map().values()):
+            key.fileobj.close()
+        self.selector.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _connect(self, target: _Target, port: int, deadlines: deque, now: float) -> bool | None:
+        """Start one connect. Returns True if the host already answered, False on failure."""
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        except OSError:
+            return False
+        sock.setblocking(False)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RST)
+        err = sock.connect_ex((target.ip, port))
+        self.packets += 1
+        if err in _PENDING:
+            self.selector.register(sock, selectors.EVENT_WRITE, target)
+            target.socks.add(sock)
+            deadlines.append((now + self.timeout, sock, target))
+            return None
+        sock.close()
+        return err in _ALIVE
+
+    def _drop(self, sock, target: _Target):
+        self.selector.unregister(sock)
+        sock.close()
+        target.socks.discard(sock)
+
+    def _abort(self, target: _Target):
+        for sock in list(target.socks):
+            self._drop(sock, target)
+
+    def sweep(self, hosts: Iterable[str]) -> Iterator[tuple[str, bool]]:
+        """Probe hosts lazily, yielding (ip, alive) as soon as each is decided."""
+        hosts = iter(hosts)
+        active: dict[str, _Target] = {}
+        deadlines: deque = deque()  # (deadline, sock, target) in connect order
+        exhausted = False
+        burst = float(max(self.rate, len(self.ports)))
+        tokens = 0.0
+        last = time.monotonic()
+
+        while True:
+            now = time.monotonic()
+            tokens = min(burst, tokens + (now - last) * self.rate)
+            last = now
+
+            # 1. start connects to fresh hosts while tokens and sockets allow
+            open_socks = len(self.selector.get_map())
+            while (not exhausted and tokens >= len(self.ports)
+                   and open_socks + len(self.ports) <= self.max_sockets):
+                ip = next(hosts, None)
+                if ip is None:
+                    exhausted = True
+                    break
+                if ip in active:
+                    continue
+                target = _Target(ip)
+                alive = False
+                for port in self.ports:
+                    tokens -= 1
+                    if self._connect(target, port, deadlines, now):
+                        alive = True
+                        break
+                open_socks += len(target.socks)
+                if alive:
+                    self._abort(target)
+                    yield ip, True
+                elif not target.socks:
+                    yield ip, False
+                else:
+                    active[ip] = target
+
+            if exhausted and not active:
+                return
+
+            # 2. wait for handshakes until the next send slot or deadline
+            wait = self.timeout
+            if deadlines:
+                wait = min(wait, max(0.0, deadlines[0][0] - now))
+            if not exhausted:
+                wait = min(wait, max(0.0, (len(self.ports) - tokens) / self.rate))
+            decided = self._completed(self.selector.select(wait), active)
+
+            # 3. expire connects whose deadline passed. Handshakes that
+            # completed while the consumer held this generator are picked
+            # up first (zero-timeout select), so they are not timed out.
+            now = time.monotonic()
+            if deadlines and deadlines[0][0] <= now:
+                decided += self._completed(self.selector.select(0), active)
+            while deadlines and deadlines[0][0] <= now:
+                _, sock, target = deadlines.popleft()
+                if sock not in target.socks:
+                    continue
+                self._drop(sock, target)
+                if not target.socks and active.get(target.ip) is target:
+                    del active[target.ip]
+                    decided.append((target.ip, False))
+
+            # nothing is yielded between the zero-timeout select and the expiry
+            yield from decided
+
+    def _completed(self, events, active: dict) -> list[tuple[str, bool]]:
+        """(ip, alive) of the hosts decided by finished connects among `events`."""
+        decided = []
+        for key, _ in events:
+            sock, target = key.fileobj, key.data
+            if sock not in target.socks:
+                continue  # aborted earlier in this batch
+            err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            self._drop(sock, target)
+            if active.get(target.ip) is not target:
+                continue
+            if err in _ALIVE:
+                self._abort(target)
+                del active[target.ip]
+                decided.append((target.ip, True))
+            elif not target.socks:
+                del active[target.ip]
+                decided.append((target.ip, False))
+        return decided
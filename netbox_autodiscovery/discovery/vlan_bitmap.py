@@ -0,0 +1,45 @@
+# netbox_autodiscovery/discovery/vlan_bitmap.py
+
+# CISCO-VTP-MIB splits the trunk VLAN bitmap over four 128-byte columns,
+# each covering 1024 VLAN ids. The most significant bit of the first octet
+# is the lowest VLAN id of the column.
+TRUNK_BITMAP_OFFSETS = {
+    "trunk": 0,        # vlanTrunkPortVlansEnabled     (0-1023)
+    "trunk2k": 1024,   # vlanTrunkPortVlansEnabled2k   (1024-2047)
+    "trunk3k": 2048,   # vlanTrunkPortVlansEnabled3k   (2048-3071)
+    "trunk4k": 3072,   # vlanTrunkPortVlansEnabled4k   (3072-4095)
+}
+
+
+def decode_vlan_bitmap(octets: bytes, offset: int = 0) -> set[int]:
+    """Return the VLAN ids whose bits are set in an OCTET STRING bitmap."""
+    if not octets:
+        return set()
+    mask = int.from_bytes(octets, "big")
+    top = len(octets) * 8 - 1
+    vids = set()
+    while mask:
+        low = mask & -mask
+        vids.add(offset + top - (low.bit_length() - 1))
+        mask ^= low
+    return vids
+
+
+def decode_trunk_table(port_table: dict) -> dict[str, set[int]]:
+    """
+    Turn the trunk columns of a port table ({ifIndex: {"trunk": bytes, ...}})
+    into {ifIndex: {vid, ...}}, limited to the valid range 1-4094.
+    """
+    trunks = {}
+    for idx, row in port_table.items():
+        if not any(col in row for col in TRUNK_BITMAP_OFFSETS):
+            continue
+        vids = set()
+        for col, offset in TRUNK_BITMAP_OFFSETS.items():
+            octets = row.get(col)
+            if isinstance(octets, (bytes, bytearray)):
+                vids |= decode_vlan_bitmap(octets, offset)
+        vids.discard(0)
+        vids.discard(4095)
+        trunks[idx] = vids
+    return trunks
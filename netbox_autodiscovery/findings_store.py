@@ -0,0 +1,358 @@
+# netbox_autodiscovery/findings_store.py
+import csv
+import io
+import ipaddress
+import json
+import struct
+import sys
+import zlib
+from array import array
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from netbox.plugins import get_plugin_config
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional: only needed for the "parquet" codec
+    pyarrow = None
+
+PACKED_MAGIC = b"ADF2"
+PARQUET_MAGIC = b"PAR1"
+GROUP_SIZE = 65536
+PREVIEW_SIZE = 100
+EXPORT_FIELDS = ("ip", "hostname", "summary", "details")
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "packed": "application/octet-stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+# ---------------------------
+# Codecs
+# ---------------------------
+#
+# A run's findings are (ip, hostname, summary) rows, stored column by column
+# in row groups of up to GROUP_SIZE rows. Readers decode one group at a
+# time, so exporting a run never holds more than one group in memory.
+
+def _le(values: array) -> bytes:
+    """The array's bytes in little-endian order, whatever the platform."""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_le(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _dictionary(values: list[str]) -> tuple[array, list[str]]:
+    """Dictionary-encode strings: (codes, distinct values in order of first use)."""
+    index, codes = {}, array("I")
+    for value in values:
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(index)
+        codes.append(code)
+    return codes, list(index)
+
+
+def _pack_strings(values: list[str]) -> bytes:
+    """Strings as a uint32 length array followed by their concatenated UTF-8 bytes."""
+    encoded = [value.encode() for value in values]
+    return _le(array("I", (len(data) for data in encoded))) + b"".join(encoded)
+
+
+def _unpack_strings(payload: bytes, offset: int, count: int) -> tuple[list[str], int]:
+    """Read `count` strings written by _pack_strings; returns (strings, offset after them)."""
+    lengths = _from_le("I", payload[offset:offset + 4 * count])
+    offset += 4 * count
+    values = []
+    for length in lengths:
+        values.append(payload[offset:offset + length].decode())
+        offset += length
+    return values, offset
+
+
+class PackedSink:
+    """
+    The built-in codec: "ADF2", then per row group a 4-byte length and a
+    zlib stream holding the row and dictionary sizes, the IPv4 addresses
+    as uint32 deltas (sweeps emit them in order, so the deltas are small
+    and compress well) and the hostnames and summaries as codes into
+    per-group dictionaries. Dictionary strings are length-prefixed, so
+    any byte a PTR name may carry round-trips.
+    """
+
+    name = "packed"
+
+    def __init__(self):
+        self.out = bytearray(PACKED_MAGIC)
+
+    def write_group(self, ips: array, hostnames: list[str], summaries: list[str]):
+        deltas, previous = array("I"), 0
+        for ip in ips:
+            deltas.append((ip - previous) & 0xFFFFFFFF)
+            previous = ip
+        host_codes, host_dict = _dictionary(hostnames)
+        summary_codes, summary_dict = _dictionary(summaries)
+        payload = b"".join((
+            struct.pack("<III", len(ips), len(host_dict), len(summary_dict)),
+            _le(deltas), _le(host_codes), _le(summary_codes),
+            _pack_strings(host_dict), _pack_strings(summary_dict),
+        ))
+        block = zlib.compress(payload, 6)
+        self.out += struct.pack("<I", len(block)) + block
+
+    def close(self) -> bytes:
+        return bytes(self.out)
+
+
+def _read_packed(blob: bytes):
+    pos = len(PACKED_MAGIC)
+    while pos < len(blob):
+        (size,) = struct.unpack_from("<I", blob, pos)
+        payload = zlib.decompress(blob[pos + 4:pos + 4 + size])
+        pos += 4 + size
+        rows, host_count, summary_count = struct.unpack_from("<III", payload)
+        offset = 12
+        columns = []
+        for _ in range(3):
+            columns.append(_from_le("I", payload[offset:offset + 4 * rows]))
+            offset += 4 * rows
+        deltas, host_codes, summary_codes = columns
+        host_dict, offset = _unpack_strings(payload, offset, host_count)
+        summary_dict, offset = _unpack_strings(payload, offset, summary_count)
+        ip = 0
+        for delta, host, summary in zip(deltas, host_codes, summary_codes):
+            ip = (ip + delta) & 0xFFFFFFFF
+            yield ip, host_dict[host], summary_dict[summary]
+
+
+class ParquetSink:
+    """Parquet through pyarrow: one row group per group, delta-encoded IPs, dictionary-encoded strings, zstd."""
+
+    name = "parquet"
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+        self.writer = None
+
+    def _table(self, ips, hostnames, summaries):
+        return pyarrow.table({
+            "ip": pyarrow.array(ips, pyarrow.uint32()),
+            "hostname": pyarrow.array(hostnames, pyarrow.string()),
+            "summary": pyarrow.array(summaries, pyarrow.string()),
+        })
+
+    def write_group(self, ips: array, hostnames: list[str], summaries: list[str]):
+        table = self._table(ips, hostnames, summaries)
+        if self.writer is None:
+            self.writer = pyarrow.parquet.ParquetWriter(
+                self.buffer, table.schema, compression="zstd", use_dictionary=["hostname", "summary"],
+                column_encoding={"ip": "DELTA_BINARY_PACKED"},
+            )
+        self.writer.write_table(table)
+
+    def close(self) -> bytes:
+        if self.writer is None:
+            self.write_group(array("I"), [], [])
+        self.writer.close()
+        return self.buffer.getvalue()
+
+
+def _read_parquet(blob: bytes):
+    if pyarrow is None:
+        raise ValueError("These findings are stored as Parquet; install pyarrow to read them")
+    parquet = pyarrow.parquet.ParquetFile(io.BytesIO(blob))
+    for group in range(parquet.num_row_groups):
+        table = parquet.read_row_group(group)
+        yield from zip(*(table.column(name).to_pylist() for name in ("ip", "hostname", "summary")))
+
+
+SINKS = {"packed": PackedSink, "parquet": ParquetSink}
+
+
+def blob_format(blob: bytes) -> str:
+    """"packed" or "parquet", from the artifact's leading magic bytes."""
+    if blob[:4] == PACKED_MAGIC:
+        return "packed"
+    if blob[:4] == PARQUET_MAGIC:
+        return "parquet"
+    raise ValueError("Unknown findings artifact format")
+
+
+def iter_rows(blob: bytes):
+    """Yield (ip, hostname, summary) of an artifact, one row group decoded at a time."""
+    blob = bytes(blob)
+    reader = _read_packed if blob_format(blob) == "packed" else _read_parquet
+    for ip, hostname, summary in reader(blob):
+        yield str(ipaddress.IPv4Address(ip)), hostname or "", summary
+
+
+def artifact_summary(codec: str, fake: bool = False) -> str:
+    """Summary of the ScanFinding that points to a run's artifact."""
+    return f"Findings stored as {codec} artifact{' (fake)' if fake else ''}"
+
+
+# ---------------------------
+# Writer
+# ---------------------------
+
+class FindingsWriter:
+    """
+    Collects the findings of a run (or shard) into one columnar artifact,
+    stored in ScanRun.findings_blob instead of one ScanFinding row each.
+    Only the current row group is buffered as Python objects.
+    """
+
+    def __init__(self, codec: str = "packed", group_size: int = GROUP_SIZE):
+        if codec not in SINKS:
+            raise ValueError(f"Unknown findings codec {codec}; choose from auto, {', '.join(SINKS)}")
+        if codec == "parquet" and pyarrow is None:
+            raise ValueError("The parquet findings codec needs pyarrow")
+        self.codec = codec
+        self.group_size = group_size
+        self.sink = SINKS[codec]()
+        self.rows = 0
+        self.counts = {}
+        self.size = 0
+        self._ips, self._hostnames, self._summaries = array("I"), [], []
+
+    def add(self, ip: str, hostname: str | None, summary: str):
+        self._ips.append(int(ipaddress.IPv4Address(ip)))
+        self._hostnames.append(hostname or "")
+        self._summaries.append(summary)
+        self.rows += 1
+        self.counts[summary] = self.counts.get(summary, 0) + 1
+        if len(self._ips) >= self.group_size:
+            self._flush()
+
+    def extend(self, blob: bytes):
+        """Append the rows of another artifact, e.g. one shard of this run."""
+        for ip, hostname, summary in iter_rows(blob):
+            self.add(ip, hostname, summary)
+
+    def _flush(self):
+        if self._ips:
+            self.sink.write_group(self._ips, self._hostnames, self._summaries)
+            self._ips, self._hostnames, self._summaries = array("I"), [], []
+
+    def finish(self) -> bytes:
+        self._flush()
+        blob = self.sink.close()
+        self.size = len(blob)
+        return blob
+
+    def as_stats(self) -> dict:
+        """What run.stats["findings"] records about the finished artifact."""
+        return {"codec": self.codec, "rows": self.rows, "bytes": self.size, "counts": self.counts}
+
+
+def findings_writer(params: dict) -> FindingsWriter | None:
+    """
+    A writer when the scanner stores its findings as one artifact: the
+    scanner's "findings_store" param, else the plugin setting, is
+    "columnar". The codec comes from `findings_codec`: "packed", "parquet"
+    or "auto" (parquet when pyarrow is installed).
+    """
+    store = params.get("findings_store") or get_plugin_config("netbox_autodiscovery", "findings_store")
+    if store != "columnar":
+        return None
+    codec = params.get("findings_codec") or get_plugin_config("netbox_autodiscovery", "findings_codec")
+    if codec == "auto":
+        codec = "parquet" if pyarrow is not None else "packed"
+    return FindingsWriter(codec)
+
+
+# ---------------------------
+# Export
+# ---------------------------
+
+def iter_findings(run_id: int, chunk_size: int = 2000):
+    """
+    Yield {ip, hostname, summary, details} for every finding of a run:
+    the rows of its artifact, then its ScanFinding rows, streamed from a
+    server-side cursor.
+    """
+    from .models import ScanRun, ScanFinding
+
+    blob = ScanRun.objects.filter(pk=run_id).values_list("findings_blob", flat=True).first()
+    if blob is not None:
+        for ip, hostname, summary in iter_rows(blob):
+            yield {"ip": ip, "hostname": hostname, "summary": summary, "details": None}
+    rows = ScanFinding.objects.filter(run_id=run_id).order_by("pk").values_list("summary", "details")
+    for summary, details in rows.iterator(chunk_size=chunk_size):
+        details = details if isinstance(details, dict) else {}
+        yield {
+            "ip": details.get("ip", ""), "hostname": details.get("hostname", ""),
+            "summary": summary, "details": details or None,
+        }
+
+
+def _chunked(lines, size: int = 1000):
+    """Join lines into chunks, so a response is not written one row at a time."""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def export_csv(findings):
+    out = io.StringIO()
+    writer = csv.writer(out)
+
+    def line(values):
+        writer.writerow(values)
+        text = out.getvalue()
+        out.seek(0)
+        out.truncate()
+        return text
+
+    yield line(EXPORT_FIELDS)
+    yield from _chunked(
+        line((f["ip"], f["hostname"], f["summary"], json.dumps(f["details"]) if f["details"] else ""))
+        for f in findings
+    )
+
+
+def export_jsonl(findings):
+    yield from _chunked(json.dumps(f, separators=(",", ":")) + "\n" for f in findings)
+
+
+EXPORTERS = {"csv": export_csv, "jsonl": export_jsonl}
+
+
+def export_response(run_id: int, output: str = "csv"):
+    """
+    The findings of a run as a streamed CSV or JSONL download, or with
+    output="raw" the stored artifact as is (Parquet files open directly
+    in pandas, DuckDB, Spark, ...). Raises ValueError for other outputs.
+    """
+    if output == "raw":
+        from .models import ScanRun
+
+        blob = ScanRun.objects.filter(pk=run_id).values_list("findings_blob", flat=True).first()
+        if blob is None:
+            raise Http404("This run has no findings artifact")
+        fmt = blob_format(blob)
+        response = HttpResponse(bytes(blob), content_type=CONTENT_TYPES[fmt])
+        extension = "parquet" if fmt == "parquet" else "adf"
+    elif output in EXPORTERS:
+        response = StreamingHttpResponse(EXPORTERS[output](iter_findings(run_id)), content_type=CONTENT_TYPES[output])
+        extension = output
+    else:
+        raise ValueError(f"Unknown export output {output}; choose from {', '.join(EXPORTERS)}, raw")
+    response["Content-Disposition"] = f'attachment; filename="run-{run_id}-findings.{extension}"'
+    return response
@@ -5,18 +5,43 @@ from .models import Scanner
 
 class ScannerForm(NetBoxModelForm):
     cidr = forms.CharField(required=False, help_text="CIDR range (e.g. 192.168.1.0/24)")
-    hostname = forms.CharField(required=False, help_text="Cisco switch hostname or IP")
+    hostname = forms.CharField(
+        required=False,
+        help_text="Cisco switch hostname or IP, a comma-separated list, or a CIDR"
+    )
     username = forms.CharField(required=False)
     password = forms.CharField(required=False, widget=forms.PasswordInput)
     community = forms.CharField(
         required=False,
         help_text="SNMP community string"
     )
+    snmp_version = forms.ChoiceField(
+        required=False,
+        choices=(("2c", "v2c (GETBULK)"), ("1", "v1")),
+        initial="2c",
+        help_text="SNMP version; v2c fetches tables with GETBULK"
+    )
     fake_mode = forms.BooleanField(required=False, help_text="Use fake discovery mode (for testing)")
+    ping_rate = forms.IntegerField(required=False, min_value=1, help_text="ICMP echo requests per second (default 2000)")
+    ping_timeout = forms.FloatField(required=False, min_value=0.1, help_text="Seconds to wait for an echo reply (default 1)")
+    ping_retries = forms.IntegerField(required=False, min_value=0, help_text="Extra probes for silent hosts (default 1)")
+    probes = forms.MultipleChoiceField(
+        required=False,
+        choices=(("icmp", "ICMP echo"), ("tcp", "TCP connect"), ("arp", "ARP (attached subnets)")),
+        initial=["icmp"],
+        widget=forms.CheckboxSelectMultiple,
+        help_text="Liveness probes to run together; a host is alive if any of them answers"
+    )
+    probe_ports = forms.CharField(required=False, help_text="TCP probe ports, comma-separated (default 22,80,443,445,3389)")
+    dns_servers = forms.CharField(required=False, help_text="Comma-separated DNS servers for reverse lookups (default: resolv.conf)")
 
     class Meta:
         model = Scanner
-        fields = ("name", "type", "cidr", "hostname", "username", "password", "community","fake_mode")
+        fields = (
+            "name", "type", "interval", "cidr", "hostname", "username", "password", "community", "snmp_version",
+            "fake_mode",
+            "ping_rate", "ping_timeout", "ping_retries", "probes", "probe_ports", "dns_servers",
+        )
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -28,22 +53,35 @@ class ScannerForm(NetBoxModelForm):
             self.fields["username"].initial = self.instance.params.get("username")
             self.fields["password"].initial = self.instance.params.get("password")
             self.fields["community"].initial = self.instance.params.get("community")
+            self.fields["snmp_version"].initial = self.instance.params.get("snmp_version", "2c")
             self.fields["fake_mode"].initial = self.instance.params.get("fake_mode", False)
+            self.fields["ping_rate"].initial = self.instance.params.get("ping_rate")
+            self.fields["ping_timeout"].initial = self.instance.params.get("ping_timeout")
+            self.fields["ping_retries"].initial = self.instance.params.get("ping_retries")
+            self.fields["probes"].initial = self.instance.params.get("probes", ["icmp"])
+            self.fields["probe_ports"].initial = self.instance.params.get("probe_ports")
+            self.fields["dns_servers"].initial = self.instance.params.get("dns_servers")
 
     def save(self, commit=True):
         obj = super().save(commit=False)
+        if "interval" in self.changed_data:
+            obj.next_run = None  # the scheduler picks a fresh slot
 
         if obj.type == Scanner.ScannerType.RANGE:
             obj.params = {
                 "cidr": self.cleaned_data["cidr"],
                 "fake_mode": self.cleaned_data["fake_mode"],
-            }        
+            }
+            for key in ("ping_rate", "ping_timeout", "ping_retries", "probes", "probe_ports", "dns_servers"):
+                if self.cleaned_data.get(key) not in (None, "", []):
+                    obj.params[key] = self.cleaned_data[key]
         elif obj.type == Scanner.ScannerType.CISCO:
             obj.params = {
                 "hostname": self.cleaned_data["hostname"],
                 "username": self.cleaned_data["username"],
                 "password": self.cleaned_data["password"],
                 "community": self.cleaned_data["community"],
+                "snmp_version": self.cleaned_data["snmp_version"] or "2c",
                 "fake_mode": self.cleaned_data["fake_mode"],
 
             }
@@ -0,0 +1,27 @@
+# netbox_autodiscovery/management/commands/autodiscovery_metrics.py
+import time
+from django.core.management.base import BaseCommand, CommandError
+from netbox_autodiscovery.metrics import prometheus_client, prometheus_enabled
+
+
+class Command(BaseCommand):
+    help = "Serve the scan metrics written by the RQ workers to Prometheus"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=9105)
+        parser.add_argument("--addr", default="0.0.0.0")
+
+    def handle(self, *args, **options):
+        if not prometheus_enabled():
+            raise CommandError(
+                "Set prometheus_metrics in the plugin config, install prometheus_client and point "
+                "PROMETHEUS_MULTIPROC_DIR at a directory shared with the RQ workers."
+            )
+        from prometheus_client import multiprocess
+
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        prometheus_client.start_http_server(options["port"], addr=options["addr"], registry=registry)
+        self.stdout.write(f"✅ Serving scan metrics on {options['addr']}:{options['port']}/metrics")
+        while True:
+            time.sleep(3600)
@@ -0,0 +1,24 @@
+# netbox_autodiscovery/management/commands/autodiscovery_scheduler.py
+import time
+from django.core.management.base import BaseCommand
+from netbox.plugins import get_plugin_config
+from netbox_autodiscovery.scheduler import schedule_due
+
+
+class Command(BaseCommand):
+    help = "Start scheduled AutoDiscovery scanner runs (loops; use --once from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run a single scheduler pass and exit")
+
+    def handle(self, *args, **options):
+        tick = get_plugin_config("netbox_autodiscovery", "scheduler_tick")
+        while True:
+            started = time.monotonic()
+            try:
+                schedule_due(log=self.stdout.write)
+            except Exception as e:
+                self.stderr.write(f"❌ Scheduler pass failed: {e!r}")
+            if options["once"]:
+                return
+            time.sleep(max(0.0, tick - (time.monotonic() - started)))
@@ -0,0 +1,123 @@
+# netbox_autodiscovery/metrics.py
+import os
+import time
+from contextlib import contextmanager
+from django.db import connection
+from netbox.plugins import get_plugin_config
+
+try:
+    import prometheus_client
+except ImportError:  # optional: only needed for prometheus_metrics
+    prometheus_client = None
+
+
+class QueryCounter:
+    """connection.execute_wrapper hook counting the queries issued on this thread."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class PhaseStats:
+    """
+    Per-phase counters of one run, stored as run.stats["phases"]:
+    {"interfaces": {"snmp_seconds": 1.2, "pdus": 8, "bytes": 9120, "db_seconds": 0.4, "sql": 12}, ...}
+    A phase entered several times (once per device or batch) adds up, so
+    seconds summed over a concurrent fleet can exceed the run's wall time.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self._queries = QueryCounter()
+
+    def add(self, phase: str, **counters):
+        totals = self.phases.setdefault(phase, {})
+        for key, val in counters.items():
+            totals[key] = totals.get(key, 0) + val
+
+    def merge(self, phases: dict | None):
+        """Add the counters of another run's or shard's stats["phases"]."""
+        for phase, counters in (phases or {}).items():
+            self.add(phase, **counters)
+
+    @contextmanager
+    def track(self, phase: str, key: str = "seconds"):
+        """Time a block into `key` and count the SQL queries it issues on this thread."""
+        installed = self._queries in connection.execute_wrappers
+        before = self._queries.count
+        started = time.perf_counter()
+        try:
+            if installed:
+                yield
+            else:
+                with connection.execute_wrapper(self._queries):
+                    yield
+        finally:
+            self.add(phase, **{key: time.perf_counter() - started, "sql": self._queries.count - before})
+
+    def timed(self, iterable, phase: str):
+        """Yield from `iterable`, adding the time spent waiting on it to `phase`."""
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(phase, seconds=time.perf_counter() - started)
+                return
+            self.add(phase, seconds=time.perf_counter() - started)
+            yield item
+
+    def as_dict(self) -> dict:
+        return {
+            phase: {key: round(val, 3) if isinstance(val, float) else val for key, val in counters.items()}
+            for phase, counters in self.phases.items()
+        }
+
+
+# ---------------------------
+# Prometheus
+# ---------------------------
+
+_metrics = {}
+
+
+def prometheus_enabled() -> bool:
+    """
+    Worker metrics need prometheus_client and PROMETHEUS_MULTIPROC_DIR: RQ
+    runs every job in a forked work horse, so the values have to outlive
+    it on disk until `manage.py autodiscovery_metrics` serves them.
+    """
+    return (
+        prometheus_client is not None
+        and bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+        and bool(get_plugin_config("netbox_autodiscovery", "prometheus_metrics"))
+    )
+
+
+def _metric(kind, name: str, doc: str, labels=("scanner_type", "phase")):
+    metric = _metrics.get(name)
+    if metric is None:
+        metric = _metrics[name] = kind(name, doc, labels)
+    return metric
+
+
+def publish(scanner_type: str, status: str, stats: dict | None, seconds: float | None = None):
+    """Export a finished run's phase counters; a no-op unless prometheus_enabled()."""
+    if not prometheus_enabled():
+        return
+    Counter = prometheus_client.Counter
+    _metric(Counter, "autodiscovery_runs_total", "Finished scan runs", ("scanner_type", "status")).labels(
+        scanner_type, status
+    ).inc()
+    if seconds is not None:
+        _metric(prometheus_client.Histogram, "autodiscovery_run_seconds", "Scan run wall time",
+                ("scanner_type",)).labels(scanner_type).observe(seconds)
+    for phase, counters in ((stats or {}).get("phases") or {}).items():
+        for key, val in counters.items():
+            name = f"autodiscovery_phase_{key}_total"
+            _metric(Counter, name, f"Scan phase {key.replace('_', ' ')}").labels(scanner_type, phase).inc(val)
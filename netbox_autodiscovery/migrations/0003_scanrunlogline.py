@@ -0,0 +1,27 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_autodiscovery', '0002_devicefingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanRunLogLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('message', models.TextField()),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='log_lines', to='netbox_autodiscovery.scanrun')),
+            ],
+            options={
+                'ordering': ('pk',),
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_autodiscovery', '0003_scanrunlogline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanrun',
+            name='stats',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ScanShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('cidr', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('success', 'Success'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('stats', models.JSONField(blank=True, null=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='netbox_autodiscovery.scanrun')),
+            ],
+            options={
+                'ordering': ('run', 'index'),
+                'unique_together': {('run', 'index')},
+            },
+        ),
+    ]
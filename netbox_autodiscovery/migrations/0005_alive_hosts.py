@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_autodiscovery', '0004_scanshard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanrun',
+            name='alive_hosts',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scanrun',
+            name='alive_prefix',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='scanshard',
+            name='alive_hosts',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_autodiscovery', '0005_alive_hosts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanner',
+            name='interval',
+            field=models.PositiveIntegerField(blank=True, help_text='Minutes between scheduled runs; empty disables scheduling', null=True),
+        ),
+        migrations.AddField(
+            model_name='scanner',
+            name='next_run',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_autodiscovery', '0006_scanner_schedule'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='scanfinding',
+            options={'ordering': ('pk',)},
+        ),
+        migrations.AddIndex(
+            model_name='scanfinding',
+            index=models.Index(fields=['run', 'summary'], name='autodiscovery_finding_summary'),
+        ),
+    ]
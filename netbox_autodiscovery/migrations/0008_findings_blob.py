@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_autodiscovery', '0007_finding_summary_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanrun',
+            name='findings_blob',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scanshard',
+            name='findings_blob',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
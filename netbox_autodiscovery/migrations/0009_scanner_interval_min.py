@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:41
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_autodiscovery', '0008_findings_blob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scanner',
+            name='interval',
+            field=models.PositiveIntegerField(blank=True, help_text='Minutes between scheduled runs; empty disables scheduling', null=True, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from netbox.models import RestrictedQuerySet 
 from django.urls import reverse
@@ -12,6 +14,11 @@ class Scanner(models.Model):
     type = models.CharField(max_length=20, choices=ScannerType.choices)
     params = models.JSONField(blank=True, null=True)
     created = models.DateTimeField(auto_now_add=True)
+    interval = models.PositiveIntegerField(
+        blank=True, null=True, validators=[MinValueValidator(1)],
+        help_text=_("Minutes between scheduled runs; empty disables scheduling"),
+    )
+    next_run = models.DateTimeField(blank=True, null=True, editable=False)
 
     # NetBox permissions-aware queryset
     objects = RestrictedQuerySet.as_manager()
@@ -22,6 +29,11 @@ class Scanner(models.Model):
     
     def get_absolute_url(self):
         return reverse("plugins:netbox_autodiscovery:scanner", args=[self.pk])
+
+    @property
+    def queue_name(self) -> str:
+        """RQ queue this scanner's jobs go to: params["queue"], else "default"."""
+        return (self.params or {}).get("queue") or "default"
     
 
 class ScanRun(models.Model):
@@ -36,6 +48,12 @@ class ScanRun(models.Model):
     started = models.DateTimeField(auto_now_add=True)
     finished = models.DateTimeField(blank=True, null=True)
     log = models.TextField(blank=True)
+    stats = models.JSONField(blank=True, null=True)
+    # alive hosts of a range scan, one bit per address of alive_prefix
+    alive_prefix = models.CharField(max_length=64, blank=True)
+    alive_hosts = models.BinaryField(blank=True, null=True)
+    # findings stored as one columnar artifact (findings_store.py) instead of ScanFinding rows
+    findings_blob = models.BinaryField(blank=True, null=True)
     objects = RestrictedQuerySet.as_manager()
 
     def __str__(self):
@@ -45,6 +63,42 @@ class ScanRun(models.Model):
         return reverse("plugins:netbox_autodiscovery:scanrun", args=[self.pk])
 
 
+class ScanShard(models.Model):
+    """One sub-prefix of a sharded range scan, swept by its own RQ job."""
+    run = models.ForeignKey(ScanRun, on_delete=models.CASCADE, related_name="shards")
+    index = models.PositiveIntegerField()
+    cidr = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=ScanRun.RunStatus.choices, default=ScanRun.RunStatus.PENDING)
+    started = models.DateTimeField(blank=True, null=True)
+    finished = models.DateTimeField(blank=True, null=True)
+    stats = models.JSONField(blank=True, null=True)
+    alive_hosts = models.BinaryField(blank=True, null=True)
+    findings_blob = models.BinaryField(blank=True, null=True)
+
+    objects = RestrictedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ("run", "index")
+        unique_together = ("run", "index")
+
+    def __str__(self):
+        return f"Shard {self.cidr} of run {self.run_id} [{self.status}]"
+
+
+class ScanRunLogLine(models.Model):
+    run = models.ForeignKey(ScanRun, on_delete=models.CASCADE, related_name="log_lines")
+    created = models.DateTimeField(default=timezone.now)
+    message = models.TextField()
+
+    objects = RestrictedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ("pk",)
+
+    def __str__(self):
+        return self.message
+
+
 class ScanFinding(models.Model):
     run = models.ForeignKey(ScanRun, on_delete=models.CASCADE, related_name="findings")
     summary = models.CharField(max_length=255)
@@ -52,6 +106,24 @@ class ScanFinding(models.Model):
 
     objects = RestrictedQuerySet.as_manager()
 
+    class Meta:
+        ordering = ("pk",)
+        indexes = [
+            # per-summary filters and counts of one run, without touching the details
+            models.Index(fields=("run", "summary"), name="autodiscovery_finding_summary"),
+        ]
+
     def __str__(self):
         return f"Finding for run {self.run_id}: {self.summary}"
 
+
+class DeviceFingerprint(models.Model):
+    """Last observed change markers of a polled device, used to skip unchanged tables."""
+    host = models.CharField(max_length=255, unique=True)
+    values = models.JSONField(default=dict)
+    updated = models.DateTimeField(auto_now=True)
+
+    objects = RestrictedQuerySet.as_manager()
+
+    def __str__(self):
+        return f"Fingerprint of {self.host}"
@@ -0,0 +1,92 @@
+# netbox_autodiscovery/progress.py
+import time
+from django_rq import get_connection
+
+PROGRESS_TTL = 24 * 3600
+KEY = "autodiscovery:progress:{}"
+FINISHED = ("success", "failed")
+
+
+class RunProgress:
+    """
+    Live counters of one run in a Redis hash (checked, total, alive, failed,
+    phase, status), served by the progress views without touching the
+    database. Counters are added with HINCRBY, so the shards of a run add up
+    in the same hash. Updates are batched and sent at most every `interval`
+    seconds; Redis errors are ignored, progress never fails a scan.
+    """
+
+    def __init__(self, run_id: int, interval: float = 0.5, connection=None):
+        self.key = KEY.format(run_id)
+        self.interval = interval
+        self._connection = connection
+        self._counts = {}
+        self._fields = {}
+        self._last_flush = 0.0
+
+    @classmethod
+    def for_run(cls, run) -> "RunProgress":
+        """Return the progress attached to this run instance, creating it once."""
+        progress = getattr(run, "_run_progress", None)
+        if progress is None:
+            progress = run._run_progress = cls(run.pk)
+        return progress
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = get_connection("default")
+        return self._connection
+
+    def add(self, **counters):
+        for key, val in counters.items():
+            self._counts[key] = self._counts.get(key, 0) + val
+        self._maybe_flush()
+
+    def set(self, **fields):
+        self._fields.update(fields)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        counts, fields = self._counts, self._fields
+        self._counts, self._fields = {}, {}
+        try:
+            pipe = self.connection.pipeline(transaction=False)
+            for key, val in counts.items():
+                pipe.hincrby(self.key, key, val)
+            pipe.hset(self.key, mapping={**{k: str(v) for k, v in fields.items()}, "updated": str(time.time())})
+            pipe.expire(self.key, PROGRESS_TTL)
+            pipe.execute()
+        except Exception:
+            pass
+
+
+def _decode(raw: dict) -> dict:
+    progress = {}
+    for key, val in raw.items():
+        key, val = key.decode(), val.decode()
+        try:
+            progress[key] = int(val)
+        except ValueError:
+            try:
+                progress[key] = float(val)
+            except ValueError:
+                progress[key] = val
+    return progress
+
+
+def read_progress(run_ids, connection=None) -> dict:
+    """{run_id: counters} for the given runs, in one round trip; unknown runs map to {}."""
+    run_ids = list(run_ids)
+    if not run_ids:
+        return {}
+    connection = connection or get_connection("default")
+    pipe = connection.pipeline(transaction=False)
+    for run_id in run_ids:
+        pipe.hgetall(KEY.format(run_id))
+    return {run_id: _decode(raw) for run_id, raw in zip(run_ids, pipe.execute())}
@@ -0,0 +1,44 @@
+# netbox_autodiscovery/runlog.py
+import time
+from django.db import connection
+from django.utils import timezone
+from .models import ScanRunLogLine
+
+
+class RunLogger:
+    """
+    Append-only, buffered log of a ScanRun.
+    Lines are kept in memory and written as ScanRunLogLine rows with one
+    bulk_create once `max_lines` are pending or `interval` seconds passed,
+    instead of rewriting ScanRun.log on every step. Those automatic flushes
+    wait until no transaction is open, so a rolled back scan phase cannot
+    take its log lines with it.
+    """
+
+    def __init__(self, run, max_lines: int = 200, interval: float = 2.0):
+        self.run = run
+        self.max_lines = max_lines
+        self.interval = interval
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    @classmethod
+    def for_run(cls, run) -> "RunLogger":
+        """Return the logger attached to this run instance, creating it once."""
+        logger = getattr(run, "_run_logger", None)
+        if logger is None:
+            logger = run._run_logger = cls(run)
+        return logger
+
+    def write(self, msg: str):
+        self._pending.append(ScanRunLogLine(run=self.run, created=timezone.now(), message=msg))
+        if connection.in_atomic_block:
+            return
+        if len(self._pending) >= self.max_lines or time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            ScanRunLogLine.objects.bulk_create(self._pending)
+            self._pending = []
+        self._last_flush = time.monotonic()
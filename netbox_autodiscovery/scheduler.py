@@ -0,0 +1,98 @@
+# netbox_autodiscovery/scheduler.py
+import logging
+import math
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db import transaction
+from django.utils import timezone
+from django_rq import get_queue
+from netbox.plugins import get_plugin_config
+from .models import Scanner, ScanRun
+from .tasks import run_scanner
+
+ACTIVE = (ScanRun.RunStatus.PENDING, ScanRun.RunStatus.RUNNING)
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name: str):
+    return get_plugin_config("netbox_autodiscovery", name)
+
+
+def jitter(scanner: Scanner) -> float:
+    """
+    Random but stable start offset of a scanner within its interval, so
+    scanners sharing an interval spread out instead of all firing on the
+    same tick: up to `schedule_jitter` of the interval, capped at
+    `schedule_max_jitter` seconds. Seeded by the pk, so it does not drift.
+    """
+    spread = min(scanner.interval * 60 * _setting("schedule_jitter"), _setting("schedule_max_jitter"))
+    return random.Random(scanner.pk).uniform(0, spread)
+
+
+def next_slot(scanner: Scanner, now: datetime) -> datetime:
+    """First start time after `now`: a multiple of the interval plus the scanner's jitter."""
+    interval = scanner.interval * 60
+    offset = jitter(scanner)
+    # the epsilon keeps a `now` sitting exactly on a slot from yielding that slot again
+    slot = (math.floor((now.timestamp() - offset) / interval + 1e-6) + 1) * interval + offset
+    return datetime.fromtimestamp(slot, tz=dt_timezone.utc)
+
+
+def _active_runs(now) -> tuple[set, Counter]:
+    """
+    Return (scanner ids with an active run, active runs per queue).
+    Runs older than `stale_run_hours` are assumed dead (worker killed)
+    and no longer block their scanner.
+    """
+    stale = now - timedelta(hours=_setting("stale_run_hours"))
+    busy, per_queue = set(), Counter()
+    for run in ScanRun.objects.filter(status__in=ACTIVE, started__gte=stale).select_related("scanner"):
+        busy.add(run.scanner_id)
+        per_queue[run.scanner.queue_name] += 1
+    return busy, per_queue
+
+
+def schedule_due(now=None, log=logger.info) -> int:
+    """
+    One scheduler tick: start every scanner whose next_run has passed,
+    unless its previous run is still active or its queue is at the
+    `max_runs_per_queue` cap. Returns the number of runs started. Progress
+    lines go to `log`, this module's logger unless the caller passes one.
+    """
+    now = now or timezone.now()
+    cap = _setting("max_runs_per_queue")
+    # interval 0 (saved before the validator existed) counts as unscheduled
+    scheduled = Scanner.objects.filter(interval__gt=0)
+
+    # newly scheduled scanners get a jittered first slot instead of starting at once
+    for scanner in scheduled.filter(next_run__isnull=True):
+        scanner.next_run = next_slot(scanner, now)
+        scanner.save(update_fields=["next_run"])
+
+    busy, per_queue = _active_runs(now)
+    started = 0
+    due = scheduled.filter(next_run__lte=now).order_by("next_run")
+    for scanner in due:
+        queue = scanner.queue_name
+        if scanner.pk in busy:
+            # skip this slot rather than stacking runs behind a slow one
+            scanner.next_run = next_slot(scanner, now)
+            scanner.save(update_fields=["next_run"])
+            log(f"⏭ {scanner.name}: previous run still active, next run at {scanner.next_run:%Y-%m-%d %H:%M:%S}")
+            continue
+        if cap and per_queue[queue] >= cap:
+            # stays due; picked up on a later tick once the queue drains
+            continue
+
+        with transaction.atomic():
+            run = ScanRun.objects.create(scanner=scanner)
+            scanner.next_run = next_slot(scanner, now)
+            scanner.save(update_fields=["next_run"])
+            transaction.on_commit(lambda run_id=run.pk, queue=queue: get_queue(queue).enqueue(run_scanner, run_id))
+        busy.add(scanner.pk)
+        per_queue[queue] += 1
+        started += 1
+        log(f"✅ {scanner.name}: started run {run.pk} on queue '{queue}'")
+    return started
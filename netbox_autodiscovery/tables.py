@@ -10,8 +10,8 @@ class ScannerTable(NetBoxTable):
 
     class Meta(NetBoxTable.Meta):
         model = Scanner
-        fields = ("pk", "name", "type", "created")
-        default_columns = ("name", "type", "created")
+        fields = ("pk", "name", "type", "interval", "next_run", "created")
+        default_columns = ("name", "type", "interval", "next_run", "created")
 
 
 class ScanRunTable(NetBoxTable):
@@ -36,11 +36,20 @@ class ScanRunTable(NetBoxTable):
     
 class ScanFindingTable(tables.Table): 
     summary = tables.Column()
-    details = tables.Column()
+    # accessor="pk": resolving record.details would load the deferred JSON per row
+    details = tables.Column(accessor="pk", empty_values=(), orderable=False, verbose_name="Details")
 
     class Meta:
         model = ScanFinding
-        fields = ("summary", "details", "created")
-        default_columns = ("summary", "details", "created")
+        fields = ("summary", "details")
+        default_columns = ("summary", "details")
+
+    def render_details(self, record):
+        # details are deferred and fetched per row on demand (htmx), never with the page
+        url = reverse("plugins:netbox_autodiscovery:scanfinding_details", args=[record.pk])
+        return format_html(
+            '<button type="button" class="btn btn-sm btn-outline-secondary" hx-get="{}" '
+            'hx-target="this" hx-swap="outerHTML">Show</button>', url
+        )
 
 
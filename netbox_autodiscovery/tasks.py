@@ -1,33 +1,185 @@
 # netbox_autodiscovery/tasks.py
+from collections import defaultdict
+from django.db import transaction
 from django.utils import timezone
-from .models import ScanRun, Scanner
-from .discovery.range_scan import run_network_scan
+from django_rq import get_queue
+from .models import ScanRun, Scanner, ScanShard
+from .discovery.range_scan import run_network_scan, plan_shards, record_alive_diff
+from .discovery.alive_set import AliveBitmap
 from .discovery.cisco_scan import run_cisco_scan
+from .runlog import RunLogger
+from .metrics import PhaseStats, publish
+from .progress import RunProgress
+from .findings_store import findings_writer
 
 def run_scanner(run_id):
     run = ScanRun.objects.get(pk=run_id)
     run.status = ScanRun.RunStatus.RUNNING
     run.started = timezone.now()
     run.save()
+    sharded = False
+    progress = RunProgress.for_run(run)
+    progress.set(status=run.status, phase="starting")
+    progress.flush()
 
     try:
         scanner = run.scanner
         if scanner.type == Scanner.ScannerType.RANGE:
             fake = scanner.params.get("fake_mode", False)
-            stats = run_network_scan(scanner.params or {}, run, fake=fake)
-            run.stats = stats
-            run.status = ScanRun.RunStatus.SUCCESS
+            shards = [] if fake else plan_shards(scanner.params or {})
+            if len(shards) > 1:
+                _enqueue_shards(run, shards)
+                sharded = True
+            else:
+                stats = run_network_scan(scanner.params or {}, run, fake=fake)
+                run.stats = stats
+                run.status = ScanRun.RunStatus.SUCCESS
         elif scanner.type == Scanner.ScannerType.CISCO:
             fake = scanner.params.get("fake_mode", False)
             stats = run_cisco_scan(scanner.params or {}, run, fake=fake)
             run.stats = stats
             run.status = ScanRun.RunStatus.SUCCESS
         else:
-            run.log = f"Unsupported scanner type: {scanner.type}"
+            RunLogger.for_run(run).write(f"Unsupported scanner type: {scanner.type}")
             run.status = ScanRun.RunStatus.FAILED
     except Exception as e:
         run.status = ScanRun.RunStatus.FAILED
-        run.log = (run.log or "") + f"\nError: {e!r}"
+        RunLogger.for_run(run).write(f"Error: {e!r}")
+    finally:
+        RunLogger.for_run(run).flush()
+        # a sharded run stays RUNNING and is finished by merge_shards
+        if not sharded:
+            run.finished = timezone.now()
+            run.save()
+            progress.set(status=run.status, phase="done")
+            progress.flush()
+            publish(run.scanner.type, run.status, run.stats, (run.finished - run.started).total_seconds())
+
+
+def enqueue_runs(runs):
+    """
+    Enqueue run_scanner for many runs: the jobs of each RQ queue go out in
+    one Redis pipeline instead of one round trip per job.
+    """
+    by_queue = defaultdict(list)
+    for run in runs:
+        by_queue[run.scanner.queue_name].append(run.pk)
+    for name, run_ids in by_queue.items():
+        queue = get_queue(name)
+        with queue.connection.pipeline() as pipe:
+            queue.enqueue_many([queue.prepare_data(run_scanner, (run_id,)) for run_id in run_ids], pipeline=pipe)
+            pipe.execute()
+
+
+# ---------------------------
+# Sharded range scans
+# ---------------------------
+
+def _enqueue_shards(run, shards):
+    """Create one ScanShard per sub-prefix and enqueue a job for each."""
+    rows = ScanShard.objects.bulk_create(
+        ScanShard(run=run, index=n, cidr=cidr) for n, cidr in enumerate(shards)
+    )
+    RunLogger.for_run(run).write(f"Split {run.scanner.params['cidr']} into {len(rows)} shards")
+    RunProgress.for_run(run).set(shards=len(rows), phase="shards")
+    RunProgress.for_run(run).flush()
+    RunLogger.for_run(run).flush()
+    # the run must not be written again once shard jobs can finish it
+    run.save()
+    queue = get_queue(run.scanner.queue_name)
+    for shard in rows:
+        queue.enqueue(run_shard, shard.pk)
+
+
+def run_shard(shard_id):
+    shard = ScanShard.objects.select_related("run__scanner").get(pk=shard_id)
+    run = shard.run
+    shard.status = ScanRun.RunStatus.RUNNING
+    shard.started = timezone.now()
+    shard.save()
+
+    try:
+        params = run.scanner.params or {}
+        alive_set = AliveBitmap(shard.cidr)
+        findings = findings_writer(params)
+        shard.stats = run_network_scan(params, run, shard=shard.cidr, alive_set=alive_set, findings=findings)
+        shard.alive_hosts = alive_set.to_bytes()
+        if findings is not None:
+            shard.findings_blob = findings.finish()
+        shard.status = ScanRun.RunStatus.SUCCESS
+    except Exception as e:
+        shard.status = ScanRun.RunStatus.FAILED
+        RunLogger.for_run(run).write(f"[{shard.cidr}] Error: {e!r}")
     finally:
-        run.finished = timezone.now()
-        run.save()
+        RunLogger.for_run(run).flush()
+        RunProgress.for_run(run).add(shards_done=1)
+        RunProgress.for_run(run).flush()
+        shard.finished = timezone.now()
+        _finish_shard(shard)
+
+
+def _finish_shard(shard):
+    """
+    Save the shard's final state under a lock on the parent run, so exactly
+    one shard (the last to finish) sees no pending siblings and enqueues
+    the merge job.
+    """
+    with transaction.atomic():
+        ScanRun.objects.select_for_update().filter(pk=shard.run_id).first()
+        shard.save()
+        pending = ScanShard.objects.filter(
+            run_id=shard.run_id,
+            status__in=(ScanRun.RunStatus.PENDING, ScanRun.RunStatus.RUNNING),
+        ).exists()
+        if not pending:
+            queue = get_queue(shard.run.scanner.queue_name)
+            transaction.on_commit(lambda: queue.enqueue(merge_shards, shard.run_id))
+
+
+def merge_shards(run_id):
+    """
+    Aggregate the shard stats, alive bitmaps and findings artifacts (in
+    shard order) into the parent run and finish it.
+    """
+    run = ScanRun.objects.get(pk=run_id)
+    shards = list(run.shards.all())
+    cidr = run.scanner.params.get("cidr")
+    stats = {"cidr": cidr, "shards": len(shards), "failed_shards": 0}
+    alive_set = AliveBitmap(cidr)
+    findings = findings_writer(run.scanner.params or {})
+    phases = PhaseStats()
+    for shard in shards:
+        if shard.status != ScanRun.RunStatus.SUCCESS:
+            stats["failed_shards"] += 1
+            continue
+        for key, val in (shard.stats or {}).items():
+            if isinstance(val, (int, float)) and not isinstance(val, bool):
+                stats[key] = stats.get(key, 0) + val
+        phases.merge((shard.stats or {}).get("phases"))
+        if shard.alive_hosts is not None:
+            alive_set.merge(AliveBitmap(shard.cidr, bytes(shard.alive_hosts)))
+        if findings is not None and shard.findings_blob is not None:
+            findings.extend(shard.findings_blob)
+
+    # a failed shard would show all its hosts as disappeared
+    if not stats["failed_shards"]:
+        with phases.track("db"):
+            stats.update(record_alive_diff(run, alive_set, findings=findings))
+        run.shards.update(alive_hosts=None, findings_blob=None)
+    stats["phases"] = phases.as_dict()
+
+    run.stats = stats
+    run.status = ScanRun.RunStatus.FAILED if stats["failed_shards"] else ScanRun.RunStatus.SUCCESS
+    run.finished = timezone.now()
+    log = RunLogger.for_run(run)
+    log.write(
+        f"Merged {len(shards)} shards in {run.finished - run.started}. "
+        f"Alive={stats.get('alive', 0)}, Created={stats.get('created', 0)}, "
+        f"Resolved={stats.get('resolved', 0)}, Failed shards={stats['failed_shards']}"
+    )
+    log.flush()
+    run.save()
+    progress = RunProgress.for_run(run)
+    progress.set(status=run.status, phase="done")
+    progress.flush()
+    publish(run.scanner.type, run.status, run.stats, (run.finished - run.started).total_seconds())
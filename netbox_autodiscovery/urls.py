@@ -22,6 +22,12 @@ urlpatterns = [
     path("runs/<int:pk>/edit/", views.ScanRunEditView.as_view(), name="scanrun_edit"),
     path("runs/<int:pk>/delete/", views.ScanRunDeleteView.as_view(), name="scanrun_delete"),
     path("runs/<int:pk>/changelog/", views.ScanRunChangeLogView.as_view(), name="scanrun_changelog"),
+    path("runs/progress/", views.ScanRunProgressView.as_view(), name="scanrun_progress_many"),
+    path("runs/<int:pk>/progress/", views.ScanRunProgressView.as_view(), name="scanrun_progress"),
+    path("runs/<int:pk>/progress/stream/", views.ScanRunProgressStreamView.as_view(), name="scanrun_progress_stream"),
+    path("runs/<int:pk>/findings/", views.ScanRunFindingSummaryView.as_view(), name="scanrun_findings"),
+    path("runs/<int:pk>/export/", views.ScanRunExportView.as_view(), name="scanrun_export"),
+    path("findings/<int:pk>/details/", views.ScanFindingDetailsView.as_view(), name="scanfinding_details"),
     path("runs/delete/", views.ScanRunBulkDeleteView.as_view(), name="scanrun_bulk_delete"),
 
 
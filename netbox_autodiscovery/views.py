@@ -1,11 +1,21 @@
-from django.shortcuts import get_object_or_404, redirect
+import json
+import time
+from django.core.paginator import Paginator
+from django.db.models import Count
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.views import View
 from django.contrib import messages
-from django_rq import enqueue
+from django_rq import get_queue
+from django_tables2 import RequestConfig
+from django_tables2.paginators import LazyPaginator
 from netbox.views import generic
 from .models import Scanner, ScanRun,ScanFinding
 from .tables import ScannerTable, ScanRunTable,ScanFindingTable
 from .forms import ScannerForm
 from .tasks import run_scanner
+from .progress import FINISHED, read_progress
+from .findings_store import artifact_summary, export_response
 # Scanner views
 class ScannerListView(generic.ObjectListView):
     queryset = Scanner.objects.all()
@@ -16,6 +26,13 @@ class ScannerView(generic.ObjectView):
     queryset = Scanner.objects.all()
     template_name = "netbox_autodiscovery/scanner.html"
 
+    runs_shown = 10
+
+    def get_extra_context(self, request, instance):
+        # the table only shows run columns; the bitmap and findings artifact can take megabytes
+        runs = instance.runs.defer("alive_hosts", "findings_blob")[:self.runs_shown]
+        return {"runs": ScanRunTable(runs, user=request.user, orderable=False)}
+
 
 class ScannerEditView(generic.ObjectEditView):
     queryset = Scanner.objects.all()
@@ -29,17 +46,159 @@ class ScannerDeleteView(generic.ObjectDeleteView):
 
 
 class ScanRunListView(generic.ObjectListView):
-    queryset = ScanRun.objects.all()
+    # the bitmap and findings artifact of a large run can take megabytes
+    queryset = ScanRun.objects.defer("alive_hosts", "findings_blob")
     table = ScanRunTable
 
 class ScanRunView(generic.ObjectView):
-    queryset = ScanRun.objects.all()
+    # the page never reads the bitmap or the findings artifact
+    queryset = ScanRun.objects.defer("alive_hosts", "findings_blob")
     template_name = "netbox_autodiscovery/scanrun.html"
 
+    log_page_size = 200
+    diff_preview = 100
+    findings_page_size = 50
+
     def get_extra_context(self, request, instance):
         findings = ScanFinding.objects.filter(run=instance)
-        table = ScanFindingTable(findings, orderable=False)
-        return {"findings": table}
+        summary = request.GET.get("summary")
+        rows = findings.filter(summary=summary) if summary else findings
+        # details are left out here and loaded per row on demand; the lazy
+        # paginator fetches one page (+1 row) and never counts the run's findings
+        table = ScanFindingTable(rows.only("pk", "summary"), orderable=False, page_field="findings_page")
+        RequestConfig(request, paginate={
+            "per_page": self.findings_page_size, "paginator_class": LazyPaginator,
+        }).configure(table)
+
+        # hosts that appeared/disappeared since the previous run, when diffed
+        diff = None
+        previous = (instance.stats or {}).get("previous_run")
+        if previous:
+            diff = {"previous": previous}
+            wanted = {
+                key: (summary, f"{summary} (fake)")
+                for key, summary in (("appeared", "Host appeared"), ("disappeared", "Host disappeared"))
+            }
+            stored = (instance.stats or {}).get("findings")
+            if stored:
+                # columnar runs keep the start of the diff on the finding that points to the artifact
+                pointer = findings.filter(
+                    summary__in=(artifact_summary(stored["codec"]), artifact_summary(stored["codec"], fake=True))
+                ).values_list("details", flat=True).first() or {}
+                preview = pointer.get("preview") or {}
+                for key in wanted:
+                    diff[key] = (preview.get(key) or [])[:self.diff_preview]
+            else:
+                for key, summaries in wanted.items():
+                    # exact matches stay on the (run, summary) index, unlike a LIKE prefix
+                    rows = findings.filter(summary__in=summaries).values_list("details", flat=True)
+                    diff[key] = [d["ip"] for d in rows[:self.diff_preview]]
+
+        # log lines are paginated; the newest page is shown by default
+        paginator = Paginator(instance.log_lines.only("created", "message"), self.log_page_size)
+        log_page = paginator.get_page(request.GET.get("log_page") or paginator.num_pages)
+        return {
+            "findings": table, "summary": summary, "log_page": log_page,
+            "shards": instance.shards.defer("alive_hosts", "findings_blob"), "diff": diff,
+        }
+
+
+class ScanRunFindingSummaryView(generic.ObjectView):
+    """Number of findings per summary of one run, counted on the (run, summary) index."""
+    queryset = ScanRun.objects.defer("alive_hosts", "findings_blob")
+    template_name = "netbox_autodiscovery/scanrun_findings.html"
+
+    def get_extra_context(self, request, instance):
+        counts = (
+            ScanFinding.objects.filter(run=instance)
+            .values("summary")
+            .annotate(count=Count("pk"))
+            .order_by("-count", "summary")
+        )
+        # rows of a columnar artifact are counted when it is written
+        stored = ((instance.stats or {}).get("findings") or {}).get("counts") or {}
+        return {"counts": counts, "stored_counts": sorted(stored.items(), key=lambda item: (-item[1], item[0]))}
+
+
+class ScanFindingDetailsView(generic.ObjectView):
+    """The details of one finding as an HTML fragment, requested by the run page."""
+    queryset = ScanFinding.objects.all()
+
+    def get(self, request, pk):
+        finding = get_object_or_404(self.queryset.restrict(request.user, "view"), pk=pk)
+        return render(request, "netbox_autodiscovery/inc/finding_details.html", {
+            "details": json.dumps(finding.details, indent=2, sort_keys=True) if finding.details else "",
+        })
+
+
+class ScanRunProgressView(View):
+    """
+    Live counters of runs as JSON, read from Redis only (see RunProgress):
+    runs/<pk>/progress/ for one run, runs/progress/?id=1&id=2 for many in
+    one round trip. Runs that have not started (or expired) return {}.
+    """
+    max_runs = 500
+
+    def get(self, request, pk=None):
+        if not request.user.has_perm("netbox_autodiscovery.view_scanrun"):
+            return JsonResponse({"detail": "Permission denied"}, status=403)
+        if pk is not None:
+            return JsonResponse(read_progress([pk])[pk])
+        ids = [int(i) for i in request.GET.getlist("id") if i.isdigit()][:self.max_runs]
+        return JsonResponse({str(run_id): progress for run_id, progress in read_progress(ids).items()})
+
+
+class ScanRunProgressStreamView(View):
+    """
+    The counters of one run as server-sent events, pushed when they change
+    until the run finishes. Opt-in for dashboards; the run page polls the
+    JSON view instead. Under WSGI an open stream holds a server worker, so
+    it ends after `max_seconds` and the client's EventSource reconnects
+    after `retry` milliseconds.
+    """
+    interval = 1.0
+    keepalive = 15
+    max_seconds = 30
+    retry = 2000
+
+    def get(self, request, pk):
+        if not request.user.has_perm("netbox_autodiscovery.view_scanrun"):
+            return JsonResponse({"detail": "Permission denied"}, status=403)
+
+        def events():
+            last, idle = None, 0
+            deadline = time.monotonic() + self.max_seconds
+            yield f"retry: {self.retry}\n\n"
+            while time.monotonic() < deadline:
+                progress = read_progress([pk])[pk]
+                if progress != last:
+                    yield f"data: {json.dumps(progress)}\n\n"
+                    last, idle = progress, 0
+                elif (idle := idle + 1) >= self.keepalive:
+                    yield ": keep-alive\n\n"
+                    idle = 0
+                if progress.get("status") in FINISHED:
+                    return
+                time.sleep(self.interval)
+
+        response = StreamingHttpResponse(events(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # nginx: do not buffer the stream
+        return response
+
+
+class ScanRunExportView(View):
+    """
+    All findings of a run, streamed as ?output=csv (default) or jsonl;
+    ?output=raw returns the run's columnar artifact as stored.
+    """
+
+    def get(self, request, pk):
+        run = get_object_or_404(ScanRun.objects.restrict(request.user, "view").only("pk"), pk=pk)
+        try:
+            return export_response(run.pk, request.GET.get("output") or "csv")
+        except ValueError as e:
+            return JsonResponse({"detail": str(e)}, status=400)
 
 
 class ScannerRunView(generic.ObjectView):
@@ -49,7 +208,7 @@ class ScannerRunView(generic.ObjectView):
         scanner = get_object_or_404(Scanner, pk=pk)
 
         run = ScanRun.objects.create(scanner=scanner)
-        enqueue(run_scanner, run.id)
+        get_queue(scanner.queue_name).enqueue(run_scanner, run.id)
 
         messages.success(request, f"Started scan run {run.id} for {scanner.name}")
         return redirect("plugins:netbox_autodiscovery:scanrun", pk=run.id)